@@ -1,8 +1,10 @@
 """
 Advanced validation API endpoints for templates, participant configs, and batch validation
 """
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, List, Any, Optional
+import json
 import logging
 from api.dependencies import get_db
 from services.shift_templates import (
@@ -21,6 +23,8 @@ from services.batch_validation import (
     BatchValidationService, BatchValidationRequest, 
     get_batch_validation_service
 )
+from services.roster_store import get_roster_store
+from services.shift_conflicts import ScheduleIndex, section_conflict_index
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/validation/advanced", tags=["advanced-validation"])
@@ -442,14 +446,35 @@ async def get_smart_validation_rules():
 async def validate_with_smart_rules(
     shift_data: Dict[str, Any],
     workers: Dict[str, Any],
-    participants: Dict[str, Any] = None
+    participants: Dict[str, Any] = None,
+    week_type: Optional[str] = None
 ):
-    """Validate a shift using smart validation rules"""
+    """
+    Validate a shift using smart validation rules
+
+    With ``week_type``, the shift (which then needs date and participant) is
+    checked against each of its workers' existing shifts in that roster
+    section (an indexed schedule, so every planner edit can be checked
+    cheaply); otherwise only per-shift rules apply.
+    """
+    if week_type is not None and week_type not in ['roster_last', 'roster', 'roster_next', 'roster_after', 'planner']:
+        raise HTTPException(status_code=400, detail=f"Invalid week type: {week_type}")
     try:
         smart_engine = get_smart_validation_engine()
         
-        # Run smart validation
-        results = smart_engine.validate_shift(shift_data, [], participants)
+        schedules = [ScheduleIndex(())]
+        if week_type and shift_data.get('workers'):
+            index = section_conflict_index(get_roster_store(), week_type)
+            schedules = [index.schedule(worker_id) for worker_id in shift_data['workers']]
+        
+        # Run smart validation per worker; a rule is reported once even if several workers trip it
+        results = []
+        seen_rules = set()
+        for schedule in schedules:
+            for result in smart_engine.validate_shift(shift_data, schedule, participants):
+                if result.rule_id not in seen_rules:
+                    seen_rules.add(result.rule_id)
+                    results.append(result)
         
         # Generate summary
         summary = smart_engine.get_validation_summary(results)
@@ -490,6 +515,42 @@ async def validate_batch(
         logger.error(f"Failed to run batch validation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch/validate/stream")
+async def stream_batch_validation(request_data: Dict[str, Any], http_request: Request):
+    """
+    Validate multiple shifts in batch, streaming results as partitions finish
+
+    Sends NDJSON (one event per line) by default, or server-sent events when
+    the client accepts text/event-stream. Events: start, partition (with that
+    partition's per-shift results), complete (batch summary).
+    """
+    try:
+        request = BatchValidationRequest(**request_data)
+    except TypeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    batch_service = get_batch_validation_service()
+    use_sse = 'text/event-stream' in http_request.headers.get('accept', '')
+    
+    async def events():
+        try:
+            async for event in batch_service.stream_batch(request):
+                payload = json.dumps(event, default=str)
+                if use_sse:
+                    yield f"event: {event['event']}\ndata: {payload}\n\n"
+                else:
+                    yield payload + "\n"
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.error(f"Streaming batch validation failed: {e}")
+            payload = json.dumps({'event': 'error', 'error': str(e)})
+            yield f"event: error\ndata: {payload}\n\n" if use_sse else payload + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson"
+    )
+
 @router.get("/batch/history")
 async def get_validation_history(limit: int = 100):
     """Get validation history"""
@@ -5,6 +5,9 @@ from database import SupabaseDatabase
 from api.dependencies import get_db, require_admin
 from core.security import get_rate_limiter
 from core.logging_config import get_logger
+from core.etags import expected_versions, version_conflict
+from services.roster_store import get_roster_store, VersionConflict
+from services.roster_writer import get_roster_writer
 from validation_rules import validate_roster_data
 from models import RosterState
 from datetime import datetime, timedelta
@@ -13,13 +16,10 @@ router = APIRouter(prefix="/api/roster", tags=["roster"])
 limiter = get_rate_limiter()
 logger = get_logger("roster")
 
-# Global roster state - we'll use a simple dict for now
-ROSTER_DATA = {
-    'roster': {},
-    'planner': {},
-    'roster_next': {},
-    'roster_after': {}
-}
+# Roster state shared with every other worker process through the roster store;
+# Supabase keeps a mirror of each saved section, written behind in batches
+ROSTER_DATA = get_roster_store()
+roster_writer = get_roster_writer()
 
 def get_current_week_dates():
     """Calculate current week start and end dates (Monday to Sunday)"""
@@ -60,20 +60,25 @@ def check_and_transition_weeks():
         if now.weekday() == 6:  # Sunday
             logger.info("sunday_detected", message="Checking for week transition")
             
-            # Move planner to roster
-            planner = ROSTER_DATA.get("planner", {})
-            if planner and planner.get("data"):
-                ROSTER_DATA["roster"] = planner.copy()
-                logger.info("planner_to_roster", message="Moved planner to roster")
-            
-            # Move next week to planner
-            next_week = ROSTER_DATA.get("roster_next", {})
-            if next_week and next_week.get("data"):
-                ROSTER_DATA["planner"] = next_week.copy()
-                logger.info("next_to_planner", message="Moved next week to planner")
-            
-            # Clear next week
-            ROSTER_DATA["roster_next"] = {}
+            with ROSTER_DATA.transaction("roster", "planner", "roster_next"):
+                # Move planner to roster
+                planner = ROSTER_DATA.get("planner", {})
+                if planner and planner.get("data"):
+                    ROSTER_DATA["roster"] = planner.copy()
+                    ROSTER_DATA.save("roster")
+                    logger.info("planner_to_roster", message="Moved planner to roster")
+                
+                # Move next week to planner
+                next_week = ROSTER_DATA.get("roster_next", {})
+                if next_week and next_week.get("data"):
+                    ROSTER_DATA["planner"] = next_week.copy()
+                    ROSTER_DATA.save("planner")
+                    logger.info("next_to_planner", message="Moved next week to planner")
+                
+                # Clear next week
+                ROSTER_DATA["roster_next"] = {}
+                ROSTER_DATA.save("roster_next")
+            roster_writer.mark("roster", "planner", "roster_next")
             logger.info("week_transition_completed")
         else:
             logger.debug("not_sunday", weekday=now.weekday())
@@ -87,21 +92,21 @@ async def get_roster(
     week_type: str,
     db: SupabaseDatabase = Depends(get_db)
 ):
-    """Get roster for specific week type from database"""
+    """Get roster for specific week type from the roster store"""
     try:
         # Check and perform week transition if needed
         # check_and_transition_weeks()  # TODO: Implement this function
         
-        # Get data from database
-        week_data = db.get_roster_data(week_type)
+        # The store is current; the database mirror can trail it by a flush
+        week_data = ROSTER_DATA.get(week_type)
         
         if week_data:
-            logger.info("roster_fetched", week_type=week_type, from_db=True)
+            logger.info("roster_fetched", week_type=week_type, from_store=True)
             return week_data
         else:
-            # Fallback to in-memory data
-            week_data = ROSTER_DATA.get(week_type, {})
-            logger.info("roster_fetched", week_type=week_type, from_memory=True)
+            # Fallback to database
+            week_data = db.get_roster_data(week_type)
+            logger.info("roster_fetched", week_type=week_type, from_db=True)
             return week_data
     except Exception as e:
         logger.error("roster_fetch_failed", week_type=week_type, error=str(e))
@@ -136,33 +141,34 @@ async def update_roster(
                     detail=f"Roster validation failed: {'; '.join(errors)}"
                 )
             
-            # Save to database
-            success = db.save_roster_data(week_type, roster_data)
-            if success:
-                # Also update in-memory cache
+            with ROSTER_DATA.transaction(week_type, expected=expected_versions(request, week_type)):
+                previous = ROSTER_DATA.get(week_type)
                 ROSTER_DATA[week_type] = roster_data
-                logger.info("roster_updated", week_type=week_type)
-                return {"message": f"{week_type} roster updated successfully"}
-            else:
-                raise HTTPException(status_code=500, detail="Failed to save roster data")
+                ROSTER_DATA.save(week_type, previous=previous)
+            roster_writer.mark(week_type)
+            logger.info("roster_updated", week_type=week_type)
+            return {
+                "message": f"{week_type} roster updated successfully",
+                "version": ROSTER_DATA.version(week_type)
+            }
         
         elif week_type == 'planner':
             if not roster_data:
                 raise HTTPException(status_code=400, detail="Planner data is required")
             
-            # Save to database
-            success = db.save_roster_data(week_type, roster_data)
-            if success:
-                # Also update in-memory cache
+            with ROSTER_DATA.transaction(week_type, expected=expected_versions(request, week_type)):
+                previous = ROSTER_DATA.get(week_type)
                 ROSTER_DATA[week_type] = roster_data
-                logger.info("planner_updated", week_type=week_type)
-                return {"message": "Planner updated successfully"}
-            else:
-                raise HTTPException(status_code=500, detail="Failed to save planner data")
+                ROSTER_DATA.save(week_type, previous=previous)
+            roster_writer.mark(week_type)
+            logger.info("planner_updated", week_type=week_type)
+            return {"message": "Planner updated successfully", "version": ROSTER_DATA.version(week_type)}
         
         else:
             raise HTTPException(status_code=400, detail=f"Invalid week type: {week_type}")
 
+    except VersionConflict as e:
+        raise version_conflict(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -174,21 +180,17 @@ async def update_roster(
 async def copy_to_planner(request: Request, db: SupabaseDatabase = Depends(get_db)):
     """Copy roster to planner with week_type flip"""
     try:
-        roster = ROSTER_DATA.get("roster", {})
-        if not roster or not roster.get("data"):
-            raise HTTPException(status_code=400, detail="No roster data to copy")
-        
-        # Copy roster to planner
-        planner_data = roster.copy()
-        ROSTER_DATA["planner"] = planner_data
-        
-        # Save to database
-        success = db.save_roster_data("planner", planner_data)
-        if success:
-            logger.info("roster_copied_to_planner")
-            return {"message": "Roster copied to planner successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save planner data")
+        with ROSTER_DATA.transaction("roster", "planner"):
+            roster = ROSTER_DATA.get("roster", {})
+            if not roster or not roster.get("data"):
+                raise HTTPException(status_code=400, detail="No roster data to copy")
+            
+            # Copy roster to planner
+            ROSTER_DATA["planner"] = roster.copy()
+            ROSTER_DATA.save("planner")
+        roster_writer.mark("planner")
+        logger.info("roster_copied_to_planner")
+        return {"message": "Roster copied to planner successfully"}
         
     except HTTPException:
         raise
@@ -201,20 +203,17 @@ async def copy_to_planner(request: Request, db: SupabaseDatabase = Depends(get_d
 async def transition_to_roster(request: Request, db: SupabaseDatabase = Depends(get_db)):
     """Move planner to roster (Sunday automation)"""
     try:
-        planner = ROSTER_DATA.get("planner", {})
-        if not planner or not planner.get("data"):
-            raise HTTPException(status_code=400, detail="No planner data to transition")
-        
-        # Move planner to roster
-        ROSTER_DATA["roster"] = planner.copy()
-        
-        # Save to database
-        success = db.save_roster_data("roster", planner)
-        if success:
-            logger.info("planner_transitioned_to_roster")
-            return {"message": "Planner moved to roster successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save roster data")
+        with ROSTER_DATA.transaction("roster", "planner"):
+            planner = ROSTER_DATA.get("planner", {})
+            if not planner or not planner.get("data"):
+                raise HTTPException(status_code=400, detail="No planner data to transition")
+            
+            # Move planner to roster
+            ROSTER_DATA["roster"] = planner.copy()
+            ROSTER_DATA.save("roster")
+        roster_writer.mark("roster")
+        logger.info("planner_transitioned_to_roster")
+        return {"message": "Planner moved to roster successfully"}
         
     except HTTPException:
         raise
@@ -263,12 +262,18 @@ async def validate_roster(
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
 def load_roster_data():
-    """Load roster data from database on startup"""
+    """Open the shared roster store on startup, seeding missing sections from the database"""
     try:
-        for week_type in ['roster', 'planner', 'roster_next', 'roster_after']:
-            data = db.get_roster_data(week_type)
-            if data:
-                ROSTER_DATA[week_type] = data
-                logger.info("roster_data_loaded", week_type=week_type)
+        ROSTER_DATA.open()
+        db = get_db()
+        with ROSTER_DATA.write_lock():
+            for week_type in ['roster', 'planner', 'roster_next', 'roster_after']:
+                if week_type in ROSTER_DATA:
+                    continue
+                data = db.get_roster_data(week_type)
+                if data:
+                    ROSTER_DATA[week_type] = data
+                    ROSTER_DATA.save(week_type)
+                    logger.info("roster_data_loaded", week_type=week_type)
     except Exception as e:
         logger.error("roster_data_load_failed", error=str(e))
@@ -12,6 +12,7 @@ from services.validation_config import (
     set_validation_level
 )
 from services.enhanced_validation_service import EnhancedValidationService
+from services.validation_cache import get_validation_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/validation", tags=["validation"])
@@ -104,9 +105,11 @@ async def validate_roster(
         config = get_validation_config()
         validation_config = config_override or config.get_config()
         
-        # Perform validation
-        validator = EnhancedValidationService(workers, validation_config)
-        result = validator.validate_roster_data(roster_data)
+        # Perform validation (cached by roster, worker and config content)
+        result = get_validation_cache().validate(
+            roster_data, workers, validation_config,
+            lambda: EnhancedValidationService(workers, validation_config).validate_roster_data(roster_data)
+        )
         
         return {
             "success": True,
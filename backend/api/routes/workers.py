@@ -6,6 +6,7 @@ from models import Worker, WorkerCreate, AvailabilityRule, UnavailabilityPeriod
 from api.dependencies import get_db, require_admin
 from core.security import optional_admin_auth, get_rate_limiter
 from core.logging_config import get_logger
+from services.worker_availability import invalidate_availability_index
 
 router = APIRouter(prefix="/api/workers", tags=["workers"])
 limiter = get_rate_limiter()
@@ -160,6 +161,7 @@ async def update_worker_availability(
         
         success = db.set_worker_availability(worker_id, availability_data)
         if success:
+            invalidate_availability_index()
             logger.info("worker_availability_updated", worker_id=worker_id)
             return {"message": "Availability updated successfully", "worker_id": worker_id}
         else:
@@ -206,6 +208,7 @@ async def add_unavailability_period(
         )
         
         if result:
+            invalidate_availability_index()
             logger.info("unavailability_period_added", worker_id=worker_id)
             return {"message": "Unavailability period added successfully", "period": result}
         else:
@@ -227,6 +230,7 @@ async def delete_unavailability_period(
     try:
         success = db.delete_unavailability_period(period_id)
         if success:
+            invalidate_availability_index()
             logger.info("unavailability_period_deleted", period_id=period_id)
             return {"message": "Unavailability period deleted successfully"}
         else:
@@ -0,0 +1,56 @@
+"""Entity tags for versioned roster sections"""
+from typing import Optional, Any, Dict
+from fastapi import HTTPException, Request
+import hashlib
+
+from services.roster_store import VersionConflict
+
+
+def roster_etag(week_type: str, version: int, *parts: Any) -> str:
+    """Entity tag for a served roster section: its version plus whatever else shapes the response"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:12]
+    return f'"{week_type}-{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header already names ``etag`` (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def if_match_version(if_match: Optional[str], week_type: str) -> Optional[int]:
+    """
+    Section version a write was based on, from an If-Match header
+
+    Accepts a roster ETag ("roster-12-ab34...") or a bare version number.
+    Returns None when the header is absent or "*" (no version check).
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    tag = if_match.split(",")[0].strip().removeprefix("W/").strip('"')
+    if tag.isdigit():
+        return int(tag)
+    prefix = f"{week_type}-"
+    if tag.startswith(prefix):
+        version = tag[len(prefix):].split("-", 1)[0]
+        if version.isdigit():
+            return int(version)
+    raise ValueError(f"If-Match does not name a {week_type} version: {if_match}")
+
+
+def expected_versions(request: Request, week_type: str) -> Optional[Dict[str, int]]:
+    """{week_type: version} named by the request's If-Match header, for RosterStore.transaction"""
+    try:
+        version = if_match_version(request.headers.get("if-match"), week_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return None if version is None else {week_type: version}
+
+
+def version_conflict(error: VersionConflict) -> HTTPException:
+    """409 for a write based on an outdated section version"""
+    return HTTPException(status_code=409, detail=f"{error} - reload the roster and reapply your changes")
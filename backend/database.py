@@ -6,6 +6,9 @@ from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 from fastapi import HTTPException
+from time import monotonic
+
+from services.worker_availability import AVAILABILITY_TTL_SECONDS, UnavailabilityIndex
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -19,6 +22,8 @@ class SupabaseDatabase:
     
     def __init__(self):
         self.client: Optional[Client] = None
+        # (loaded_at, index) of every unavailability period
+        self._unavailability: Optional[tuple] = None
         self.connect()
     
     def connect(self):
@@ -127,22 +132,18 @@ class SupabaseDatabase:
             
             # Now, optimize unavailability checking
             check_date = check_date or datetime.now().date()
-            today_iso = check_date.isoformat()
             unavailable_worker_ids = set()
 
             try:
-                # Fetch all unavailability periods that are active today in a single query
-                unavailability_response = self.client.table('unavailability_periods').select('worker_id').lte('from_date', today_iso).gte('to_date', today_iso).execute()
-                if unavailability_response.data:
-                    for period in unavailability_response.data:
-                        unavailable_worker_ids.add(period['worker_id'])
+                # Workers with a period active on the check date, from the in-memory index
+                unavailable_worker_ids = set(self.get_unavailable_workers(check_date, check_date))
             except Exception as e:
                 logger.error(f"Could not pre-fetch unavailability periods: {e}")
 
             workers = []
             for w in response.data:
                 # Check against the pre-fetched set instead of making a new DB call
-                is_unavailable = w['id'] in unavailable_worker_ids
+                is_unavailable = str(w['id']) in unavailable_worker_ids
                 
                 workers.append({
                     'id': str(w['id']),
@@ -227,21 +228,42 @@ class SupabaseDatabase:
     def _check_worker_unavailability(self, worker_id: int, check_date: date) -> bool:
         """Check if a worker is unavailable on a specific date"""
         try:
-            response = self.client.table('unavailability_periods').select('*').eq('worker_id', worker_id).execute()
-            
-            for period in response.data:
-                from_date = datetime.strptime(period['from_date'], '%Y-%m-%d').date()
-                to_date = datetime.strptime(period['to_date'], '%Y-%m-%d').date()
-                
-                # Check if the check_date falls within this unavailability period
-                if from_date <= check_date <= to_date:
-                    return True
-            
-            return False
+            return self.unavailability_index().is_unavailable(worker_id, check_date)
         except Exception as e:
             logger.error(f"Error checking worker unavailability: {e}")
             return False
     
+    def unavailability_index(self) -> UnavailabilityIndex:
+        """
+        In-memory index of every unavailability period
+
+        Loaded on first use and kept current by create/delete_unavailability_period;
+        reloaded every AVAILABILITY_TTL_SECONDS to pick up other processes' changes.
+        """
+        cached = self._unavailability
+        if cached is None or monotonic() - cached[0] > AVAILABILITY_TTL_SECONDS:
+            cached = self._unavailability = (monotonic(), UnavailabilityIndex(self.get_all_unavailability_periods()))
+            logger.info(f"Indexed {len(cached[1])} unavailability periods")
+        return cached[1]
+    
+    def _index_unavailability(self, period: Dict[str, Any]) -> None:
+        """Add a newly created period to the in-memory index, if it is loaded"""
+        if self._unavailability is not None:
+            self._unavailability[1].add(period)
+    
+    def get_unavailable_workers(self, from_date: Any, to_date: Any) -> Dict[str, List[Dict]]:
+        """Unavailability periods of workers unavailable at any point in [from_date, to_date], by worker ID"""
+        return self.unavailability_index().unavailable_workers(from_date, to_date)
+    
+    def get_all_unavailability_periods(self) -> List[Dict]:
+        """Get every worker's unavailability periods; raises if they can't be fetched"""
+        try:
+            response = self.client.table('unavailability_periods').select('*').execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error fetching all unavailability periods: {e}")
+            raise
+    
     def get_unavailability_periods(self, worker_id: Optional[int] = None) -> List[Dict]:
         """Get unavailability periods for workers"""
         try:
@@ -274,6 +296,7 @@ class SupabaseDatabase:
             
             if response.data:
                 logger.info(f"Successfully inserted unavailability for worker {worker_id}")
+                self._index_unavailability(response.data[0])
                 return response.data[0]
             else:
                 logger.error(f"Supabase insert failed for worker {worker_id}, response: {response}")
@@ -292,6 +315,8 @@ class SupabaseDatabase:
             # If the data list is not empty, it means the deletion was successful.
             if response.data:
                 logger.info(f"Successfully deleted unavailability period {period_id}")
+                if self._unavailability is not None:
+                    self._unavailability[1].remove(period_id)
                 return True
             else:
                 logger.warning(f"Attempted to delete non-existent unavailability period {period_id}")
@@ -309,6 +334,15 @@ class SupabaseDatabase:
             logger.error(f"Error fetching availability rules: {e}")
             return []
 
+    def get_all_availability_rules(self) -> List[Dict]:
+        """Get availability rules for every worker; raises if they can't be fetched"""
+        try:
+            response = self.client.table('availability_rule').select('*').execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error fetching all availability rules: {e}")
+            raise
+
     def get_availability_rules_batch(self, worker_ids: List[int]) -> Dict[int, List[Dict]]:
         """Get availability rules for multiple workers in a single query"""
         try:
@@ -535,34 +569,22 @@ class SupabaseDatabase:
     
     def save_roster_data(self, week_type: str, data: Dict) -> bool:
         """Save roster data for a specific week type to Supabase"""
+        return self.save_roster_sections({week_type: data})
+
+    def save_roster_sections(self, sections: Dict[str, Dict]) -> bool:
+        """Upsert several week sections to Supabase in a single request (one row per week_type)"""
         try:
-            # Create roster_data table structure if it doesn't exist
-            # For now, we'll use a simple JSON storage approach
-            
-            # Check if record exists
-            existing = self.client.table('roster_data').select('*').eq('week_type', week_type).execute()
-            
-            if existing.data:
-                # Update existing record
-                response = self.client.table('roster_data').update({
-                    'data': data,
-                    'updated_at': datetime.now(timezone.utc).isoformat()
-                }).eq('week_type', week_type).execute()
-            else:
-                # Insert new record
-                response = self.client.table('roster_data').insert({
-                    'week_type': week_type,
-                    'data': data,
-                    'created_at': datetime.now(timezone.utc).isoformat(),
-                    'updated_at': datetime.now(timezone.utc).isoformat()
-                }).execute()
-            
-            logger.info(f"Successfully saved roster data for {week_type}")
+            now = datetime.now(timezone.utc).isoformat()
+            rows = [
+                {'week_type': week_type, 'data': data, 'updated_at': now}
+                for week_type, data in sections.items()
+            ]
+            self.client.table('roster_data').upsert(rows, on_conflict='week_type').execute()
+            logger.info(f"Successfully saved roster data for {', '.join(sections)}")
             return True
         except Exception as e:
-            logger.error(f"Error saving roster data for {week_type}: {e}")
-            # Fallback to memory storage for now
-            return True
+            logger.error(f"Error saving roster data for {', '.join(sections)}: {e}")
+            return False
 
     def get_worker(self, worker_id: int) -> Optional[Dict]:
         """Retrieve a single worker by ID"""
@@ -605,15 +627,6 @@ class SupabaseDatabase:
             logger.error(f"Error setting availability for worker {worker_id}: {e}")
             return False
 
-    def get_unavailability_periods(self, worker_id: str) -> List[Dict]:
-        """Get worker unavailability periods"""
-        try:
-            response = self.client.table('unavailability_periods').select('*').eq('worker_id', worker_id).execute()
-            return response.data
-        except Exception as e:
-            logger.error(f"Error fetching unavailability periods for worker {worker_id}: {e}")
-            return []
-
     def add_unavailability_period(self, worker_id: str, from_date: str, to_date: str, reason: str = 'Other') -> Dict:
         """Add unavailability period for worker"""
         try:
@@ -623,19 +636,13 @@ class SupabaseDatabase:
                 'to_date': to_date,
                 'reason': reason
             }).execute()
-            return response.data[0] if response.data else {}
+            if not response.data:
+                return {}
+            self._index_unavailability(response.data[0])
+            return response.data[0]
         except Exception as e:
             logger.error(f"Error adding unavailability period for worker {worker_id}: {e}")
             raise
 
-    def delete_unavailability_period(self, period_id: str) -> bool:
-        """Delete unavailability period"""
-        try:
-            self.client.table('unavailability_periods').delete().eq('id', period_id).execute()
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting unavailability period {period_id}: {e}")
-            return False
-
 # Global database instance
-db = SupabaseDatabase()
\ No newline at end of file
+db = SupabaseDatabase()
@@ -53,6 +53,10 @@ async def lifespan(app: FastAPI):
         logger.error("application_startup_failed", error=str(e))
         raise
     # Shutdown
+    from services.roster_writer import get_roster_writer
+    get_roster_writer().close()
+    from services.batch_validation import close_batch_validation_service
+    close_batch_validation_service()
     logger.info("application_shutdown")
 
 # Create the main app
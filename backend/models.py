@@ -85,6 +85,7 @@ class ConflictCheck(BaseModel):
     shift_date: str
     start_time: str
     end_time: str
+    shift_id: Optional[str] = None  # existing shift being re-checked, ignored in the result
 
 class HoursCalculation(BaseModel):
     worker_id: int
@@ -104,4 +105,15 @@ class RosterState(BaseModel):
 class TelegramMessage(BaseModel):
     worker_id: int
     message: str
-    urgent: bool = False
\ No newline at end of file
+    urgent: bool = False
+
+class ShiftOperation(BaseModel):
+    op: str  # add, update, move or delete
+    id: Optional[str] = None
+    participant: Optional[str] = None
+    date: Optional[str] = None
+    position: Optional[int] = None
+    shift: Optional[Dict[str, Any]] = None
+
+class ShiftPatchRequest(BaseModel):
+    operations: List[ShiftOperation]
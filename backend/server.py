@@ -1,6 +1,6 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi_cache import cache
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
@@ -10,8 +10,7 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta, date, timezone
 import uuid
-import json
-import copy
+import asyncio
 from collections import defaultdict
 import sentry_sdk
 from sentry_sdk.integrations.fastapi import FastApiIntegration
@@ -26,9 +25,20 @@ from validation_rules import validate_roster_data
 from models import (
     Worker, WorkerCreate, AvailabilityRule, UnavailabilityPeriod, 
     Participant, Shift, WorkerAvailabilityCheck, ConflictCheck, 
-    HoursCalculation, RosterState, TelegramMessage
+    HoursCalculation, RosterState, TelegramMessage, ShiftPatchRequest
 )
 from validation_rules import validate_roster_data
+from services.roster_store import get_roster_store, VersionConflict
+from services.roster_writer import get_roster_writer
+from services.roster_archive import get_roster_archive
+from services.shift_conflicts import section_conflict_index
+from services.roster_index import resolve as resolve_shift
+from services.roster_projection import TemplateProjections
+from services.roster_patch import ShiftPatch, ShiftPatchError
+from services.week_boundary import WeekBoundary
+from services.incremental_validation import get_incremental_validator
+from services.validation_config import get_validation_config
+from services.worker_availability import get_availability_index, invalidate_availability_index
 from calendar_service import calendar_service
 from telegram_service import telegram_service
 from openai import OpenAI
@@ -37,6 +47,7 @@ from openai import OpenAI
 from core.config import get_settings, get_allowed_origins, is_production
 from core.security import setup_rate_limiting, get_rate_limiter, require_admin, optional_admin
 from core.logging_config import setup_logging, get_logger
+from core.etags import roster_etag, etag_matches, expected_versions, version_conflict
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -63,12 +74,16 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         load_roster_data()
+        check_and_transition_weeks()
+        transition_task = asyncio.create_task(run_week_transitions())
         logger.info("application_started", database="supabase")
-        yield
     except Exception as e:
         logger.error("application_startup_failed", error=str(e))
         raise
+    yield
     # Shutdown
+    transition_task.cancel()
+    await asyncio.to_thread(roster_writer.close)
     logger.info("application_shutdown")
 
 # Create the main app with lifespan events
@@ -179,26 +194,135 @@ def get_week_after_next_dates():
     
     return week_after_monday.strftime('%Y-%m-%d'), week_after_sunday.strftime('%Y-%m-%d')
 
-# File-based persistence for roster data
-ROSTER_FILE = Path(__file__).parent / 'roster_data.json'
+# File-based persistence for roster data: one snapshot + journal per section,
+# parsed lazily on first access. Every worker process shares the same files
+# (writes are locked and versioned); roster_data.json is only read once to migrate.
+roster_store = get_roster_store()
+incremental_validator = get_incremental_validator()
+roster_store.add_listener(incremental_validator.invalidate)
+# Saved sections are mirrored to the Supabase roster_data table in batched upserts
+roster_writer = get_roster_writer()
+# Weeks leaving the live roster at each transition, for history queries
+roster_archive = get_roster_archive()
+template_projections = TemplateProjections()
+
+# Latest validation result per section, stored with the version it was computed for
+VALIDATION_RESULTS: Dict[str, Dict[str, Any]] = {}
+_revalidation_pending = set()
+
+def revalidate_section(week_type: str) -> Dict[str, Any]:
+    """
+    Validate a roster section and store the result with the section version
+
+    Only rules affected by what changed since the last call are re-run.
+    """
+    version = roster_store.version(week_type)
+    section = ROSTER_DATA.get(week_type) or {}
+    workers_dict = {str(w['id']): w for w in db.get_support_workers()}
+    try:
+        availability = get_availability_index(db)
+    except Exception as e:
+        logger.error(f"Could not load worker availability, skipping availability checks: {e}")
+        availability = None
+    try:
+        result = incremental_validator.validate(
+            week_type,
+            section.get('data') or {},
+            roster_store.index(week_type),
+            workers_dict,
+            get_validation_config().get_config(),
+            availability
+        )
+    except Exception as e:
+        logger.error(f"Incremental validation failed for {week_type}, running full validation: {e}")
+        result = validate_roster_data(section, workers_dict)
+    VALIDATION_RESULTS[week_type] = {
+        "version": version,
+        "validated_at": datetime.now(timezone.utc).isoformat(),
+        "result": result
+    }
+    if not result['valid']:
+        logger.warning(f"⚠️ Roster {week_type} has validation errors: {result['errors']}")
+    elif result['warnings']:
+        logger.info(f"ℹ️ Roster {week_type} has warnings: {result['warnings']}")
+    return result
+
+def _run_revalidation(week_type: str):
+    try:
+        revalidate_section(week_type)
+    except Exception as e:
+        logger.error(f"❌ Validation failed for {week_type}: {e}")
+    finally:
+        _revalidation_pending.discard(week_type)
+
+def schedule_revalidation(background_tasks: BackgroundTasks, *week_types: str):
+    """Queue validation of sections whose stored result is out of date"""
+    for week_type in week_types:
+        stored = VALIDATION_RESULTS.get(week_type)
+        if stored and stored["version"] == roster_store.version(week_type):
+            continue
+        if week_type in _revalidation_pending:
+            continue
+        _revalidation_pending.add(week_type)
+        background_tasks.add_task(_run_revalidation, week_type)
+
+def validation_status(week_type: str) -> Dict[str, Any]:
+    """Summary of the stored validation result for a section (no validation is run)"""
+    stored = VALIDATION_RESULTS.get(week_type)
+    if not stored:
+        return {"status": "pending", "version": None}
+    result = stored["result"]
+    return {
+        "status": "current" if stored["version"] == roster_store.version(week_type) else "stale",
+        "version": stored["version"],
+        "validated_at": stored["validated_at"],
+        "valid": result["valid"],
+        "total_errors": len(result["errors"]),
+        "total_warnings": len(result["warnings"]),
+        "details": f"/api/roster/{week_type}/validation"
+    }
+
+def availability_changed():
+    """Recompile availability and treat stored validation results as out of date"""
+    invalidate_availability_index()
+    VALIDATION_RESULTS.clear()
 
 def load_roster_data():
-    """Load roster data from file"""
+    """Open the per-section roster store (sections are loaded on first access)"""
     global ROSTER_DATA
     try:
-        if ROSTER_FILE.exists():
-            with open(ROSTER_FILE, 'r') as f:
-                ROSTER_DATA = json.load(f)
-                logger.info(f"Loaded roster data from {ROSTER_FILE}")
+        ROSTER_DATA = roster_store.open()
+        incremental_validator.invalidate()
+        VALIDATION_RESULTS.clear()
+        logger.info(f"Opened roster store at {roster_store.directory}")
     except Exception as e:
         logger.error(f"Error loading roster data: {e}")
         
-def save_roster_data():
-    """Save roster data to file"""
+def save_roster_data(*keys, previous=None):
+    """
+    Journal changed top-level roster keys
+
+    Args:
+        keys: Top-level ROSTER_DATA keys that changed; with none, every loaded
+              section is compacted into its snapshot
+        previous: Optional {key: value before the change} so only the
+                  difference is journaled
+    """
     try:
-        with open(ROSTER_FILE, 'w') as f:
-            json.dump(ROSTER_DATA, f, indent=2)
-            logger.info(f"Saved roster data to {ROSTER_FILE}")
+        if not keys:
+            roster_store.compact()
+            return
+        previous = previous or {}
+        for key in keys:
+            if key in previous:
+                cells = roster_store.save(key, previous[key])
+                previous_data = (previous[key] or {}).get('data') if isinstance(previous[key], dict) else None
+            else:
+                cells = roster_store.save(key)
+                previous_data = None
+            incremental_validator.mark_changed(key, cells, previous_data)
+        roster_writer.mark(*keys)
+        logger.info(f"Journaled roster changes for {', '.join(keys)}")
     except Exception as e:
         logger.error(f"Error saving roster data: {e}")
 
@@ -316,79 +440,131 @@ async def get_participants():
         logger.error(f"Error fetching participants: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch participants")
 
+# Week transitions run at the Monday 00:00 boundary; requests only compare
+# against the cached week start
+week_boundary = WeekBoundary()
+_roster_week_start = None  # week start the current roster was last confirmed for
+
+async def ensure_current_week():
+    """Request-path guard: a cached string comparison unless the week has rolled over"""
+    if _roster_week_start != week_boundary.current_start:
+        await asyncio.to_thread(check_and_transition_weeks)
+
+async def run_week_transitions():
+    """Background task: transition the roster at each week boundary"""
+    while True:
+        await asyncio.sleep(week_boundary.seconds_until_boundary() + 1)
+        await asyncio.to_thread(check_and_transition_weeks)
+
 def check_and_transition_weeks():
     """Check if current week data is outdated and transition if needed"""
+    global _roster_week_start
+    # Recorded whatever the outcome, so requests don't retry a failed or
+    # no-op transition; the boundary task tries again at the next boundary
+    _roster_week_start = week_boundary.current_start
     try:
-        current_start, current_end = get_current_week_dates()
-        current_roster = ROSTER_DATA.get('roster', {})
-        
-        # Check if current roster dates match current week
-        if current_roster.get('start_date') != current_start:
-            logger.info(f"Week transition needed: current roster shows {current_roster.get('start_date')}, should be {current_start}")
-            
-            # Move next week data to current week
-            next_roster = ROSTER_DATA.get('roster_next', {})
-            if next_roster.get('data'):
-                logger.info("Transitioning next week data to current week")
-                ROSTER_DATA['roster'] = {
-                    'week_type': next_roster.get('week_type', 'weekA'),
-                    'start_date': current_start,
-                    'end_date': current_end,
-                    'data': next_roster.get('data', {})
-                }
-                
-                # Move week after data to next week
-                after_roster = ROSTER_DATA.get('roster_after', {})
-                next_start, next_end = get_next_week_dates()
-                ROSTER_DATA['roster_next'] = {
-                    'week_type': after_roster.get('week_type', 'weekA'),
-                    'start_date': next_start,
-                    'end_date': next_end,
-                    'data': after_roster.get('data', {})
-                }
-                
-                # Clear week after
-                ROSTER_DATA['roster_after'] = {
-                    'week_type': 'weekA',
-                    'start_date': '',
-                    'end_date': '',
-                    'data': {}
-                }
-                
-                # Save the transitioned data
-                save_roster_data()
-                logger.info("Week transition completed successfully")
-            else:
-                logger.warning("No next week data available for transition")
+        # Store transaction: only one worker process moves the weeks along,
+        # the others see the transitioned sections when it's done
+        with roster_store.transaction('roster', 'roster_next', 'roster_after'):
+            _transition_weeks()
     except Exception as e:
         logger.error(f"Error during week transition: {e}")
 
+def _archive_week(section: Dict[str, Any]):
+    """Keep a roster week leaving the live roster in the archive; failures are logged, not raised"""
+    try:
+        roster_archive.archive(section)
+    except Exception as e:
+        logger.error(f"Error archiving roster week {(section or {}).get('start_date')}: {e}")
+
+def _transition_weeks():
+    current_start, current_end = week_boundary.current_week()
+    current_roster = ROSTER_DATA.get('roster', {})
+    
+    # Check if current roster dates match current week
+    if current_roster.get('start_date') != current_start:
+        logger.info(f"Week transition needed: current roster shows {current_roster.get('start_date')}, should be {current_start}")
+        
+        # Move next week data to current week
+        next_roster = ROSTER_DATA.get('roster_next', {})
+        if next_roster.get('data'):
+            # Keep the outgoing week before it's replaced
+            _archive_week(current_roster)
+            
+            logger.info("Transitioning next week data to current week")
+            ROSTER_DATA['roster'] = {
+                'week_type': next_roster.get('week_type', 'weekA'),
+                'start_date': current_start,
+                'end_date': current_end,
+                'data': next_roster.get('data', {})
+            }
+            
+            # Move week after data to next week
+            after_roster = ROSTER_DATA.get('roster_after', {})
+            next_start, next_end = week_boundary.week(1)
+            ROSTER_DATA['roster_next'] = {
+                'week_type': after_roster.get('week_type', 'weekA'),
+                'start_date': next_start,
+                'end_date': next_end,
+                'data': after_roster.get('data', {})
+            }
+            
+            # Clear week after
+            ROSTER_DATA['roster_after'] = {
+                'week_type': 'weekA',
+                'start_date': '',
+                'end_date': '',
+                'data': {}
+            }
+            
+            # Save the transitioned data
+            save_roster_data('roster', 'roster_next', 'roster_after')
+            logger.info("Week transition completed successfully")
+        else:
+            logger.warning("No next week data available for transition")
+
 # Roster Management Routes
+@api_router.get("/roster/archive")
+@limiter.limit("30/minute")
+async def get_roster_archive_range(request: Request, start_date: str, end_date: str):
+    """
+    Archived shifts between start_date and end_date (YYYY-MM-DD, inclusive)
+
+    Only the archived weeks overlapping the range are read.
+    """
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    try:
+        return await asyncio.to_thread(roster_archive.query, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error querying roster archive {start_date}..{end_date}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to query roster archive")
+
+@api_router.get("/roster/archive/weeks")
+async def get_roster_archive_weeks():
+    """Mondays of every archived roster week"""
+    return {"weeks": roster_archive.weeks()}
+
 @api_router.get("/roster/{week_type}")
 @limiter.limit("30/minute")
-@cache(expire=300)  # Cache for 5 minutes
-async def get_roster(request: Request, week_type: str):
+async def get_roster(request: Request, week_type: str, background_tasks: BackgroundTasks):
     """Get roster for specific week type from database"""
     try:
-        # Check and perform week transition if needed
-        check_and_transition_weeks()
+        # Cheap guard; the transition itself normally runs from the boundary scheduler
+        await ensure_current_week()
         
         # Handle roster structure (last, current, next, week after)
         if week_type in ['roster_last', 'roster', 'roster_next', 'roster_after']:
             roster_section = ROSTER_DATA.get(week_type, {})
+            source_version = None
             
             # If roster_next or roster_after is empty, copy from current roster as template
             # Check if data has actual shifts, not just empty participant objects
-            has_shifts = False
-            if roster_section.get('data'):
-                for participant_code, dates in roster_section['data'].items():
-                    if isinstance(dates, dict):
-                        for date_key, shifts in dates.items():
-                            if isinstance(shifts, list) and len(shifts) > 0:
-                                has_shifts = True
-                                break
-                    if has_shifts:
-                        break
+            has_shifts = len(roster_store.shift_table(week_type)) > 0
             
             if week_type in ['roster_next', 'roster_after'] and not has_shifts:
                 # For roster_after, prefer roster_next if it has data, otherwise use roster
@@ -396,112 +572,59 @@ async def get_roster(request: Request, week_type: str):
                 days_to_shift = 7 if week_type == 'roster_next' else 14  # Default shift amount
                 
                 if week_type == 'roster_after':
-                    roster_next = ROSTER_DATA.get('roster_next', {})
                     # Check if roster_next has shifts
-                    next_has_shifts = False
-                    if roster_next.get('data'):
-                        for pc, dates in roster_next['data'].items():
-                            if isinstance(dates, dict):
-                                for dk, shifts in dates.items():
-                                    if isinstance(shifts, list) and len(shifts) > 0:
-                                        next_has_shifts = True
-                                        break
-                            if next_has_shifts:
-                                break
-                    if next_has_shifts:
+                    if len(roster_store.shift_table('roster_next')) > 0:
                         template_source = 'roster_next'
                         days_to_shift = 7  # Only shift 7 days if copying from roster_next
                 
                 source_roster = ROSTER_DATA.get(template_source, {})
                 if source_roster.get('data'):
-                    # Copy and shift dates forward
-                    roster_section = copy.deepcopy(source_roster)
-                    
-                    # Shift all dates forward and CLEAR worker assignments
-                    new_data = {}
-                    for participant_code, dates_dict in roster_section.get('data', {}).items():
-                        new_data[participant_code] = {}
-                        
-                        # Handle both dict and list formats
-                        if not isinstance(dates_dict, dict):
-                            new_data[participant_code] = dates_dict
-                            continue
-                            
-                        for date_str, shifts in dates_dict.items():
-                            if not isinstance(shifts, list):
-                                new_data[participant_code][date_str] = shifts
-                                continue
-                                
-                            try:
-                                old_date = datetime.strptime(date_str, '%Y-%m-%d')
-                                new_date = old_date + timedelta(days=days_to_shift)
-                                new_date_str = new_date.strftime('%Y-%m-%d')
-                                
-                                # Copy shift structure INCLUDING worker assignments
-                                updated_shifts = []
-                                for shift in shifts:
-                                    shift_copy = shift.copy()
-                                    shift_copy['date'] = new_date_str
-                                    # Keep worker assignments from template
-                                    updated_shifts.append(shift_copy)
-                                
-                                new_data[participant_code][new_date_str] = updated_shifts
-                            except Exception as e:
-                                # If date parsing fails, keep original
-                                logger.warning(f"Error shifting date {date_str}: {e}")
-                                new_data[participant_code][date_str] = shifts
-                    
-                    roster_section['data'] = new_data
+                    # Shifted copy is memoized until the source section changes
+                    source_version = f"{template_source}:{roster_store.version(template_source)}"
+                    roster_section = template_projections.get(
+                        template_source,
+                        roster_store.version(template_source),
+                        days_to_shift,
+                        lambda: ROSTER_DATA.get(template_source, {})
+                    )
                     logger.info(f"Auto-populated {week_type} from {template_source}, shifted dates by {days_to_shift} days")
                     # Don't save it yet - user can modify and save themselves
             
+            # Served sections may be shared (stored or cached projections): don't modify them
+            roster_section = dict(roster_section)
+            
             # Always calculate dates dynamically based on current time
-            if week_type == 'roster_last':
-                start_date, end_date = get_last_week_dates()
-                roster_section["start_date"] = start_date
-                roster_section["end_date"] = end_date
-            elif week_type == 'roster':
-                start_date, end_date = get_current_week_dates()
-                roster_section["start_date"] = start_date
-                roster_section["end_date"] = end_date
-            elif week_type == 'roster_after':
-                start_date, end_date = get_week_after_next_dates()
-                roster_section["start_date"] = start_date
-                roster_section["end_date"] = end_date
-            elif week_type == 'roster_next':
-                start_date, end_date = get_next_week_dates()
-                roster_section["start_date"] = start_date
-                roster_section["end_date"] = end_date
+            week_offsets = {'roster_last': -1, 'roster': 0, 'roster_next': 1, 'roster_after': 2}
+            start_date, end_date = week_boundary.week(week_offsets[week_type])
+            roster_section["start_date"] = start_date
+            roster_section["end_date"] = end_date
             
-            # VALIDATE DATA BEFORE RETURNING - Fixed validation logic
+            # Validation runs on write / in the background; only its stored result is reported here
             data_to_return = roster_section.get("data", {})
-            if data_to_return:
-                try:
-                    # Get workers for validation
-                    workers_list = db.get_support_workers()
-                    workers_dict = {str(w['id']): w for w in workers_list}
-                    
-                    # Run validation on the participant data (not the full structure)
-                    validation_result = validate_roster_data(data_to_return, workers_dict)
-                    
-                    if not validation_result['valid']:
-                        logger.warning(f"⚠️ Roster {week_type} has validation errors: {validation_result['errors']}")
-                        # For now, return data with warnings instead of blocking
-                        logger.info(f"ℹ️ Returning data with validation warnings: {validation_result['errors']}")
-                    elif validation_result['warnings']:
-                        logger.info(f"ℹ️ Roster {week_type} has warnings: {validation_result['warnings']}")
-                        
-                except Exception as validation_error:
-                    logger.error(f"❌ Validation failed for {week_type}: {validation_error}")
-                    # Return data anyway if validation fails
-                    logger.info(f"ℹ️ Returning data despite validation error: {validation_error}")
+            schedule_revalidation(background_tasks, week_type)
             
-            return {
-                "week_type": roster_section.get("week_type", "weekA"),
-                "start_date": roster_section.get("start_date", ""),
-                "end_date": roster_section.get("end_date", ""),
-                "data": data_to_return
-            }
+            validation = validation_status(week_type)
+            etag = roster_etag(
+                week_type,
+                roster_store.version(week_type),
+                source_version,
+                roster_section.get("start_date", ""),
+                validation.get("validated_at")
+            )
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            
+            return JSONResponse(
+                content={
+                    "week_type": roster_section.get("week_type", "weekA"),
+                    "start_date": roster_section.get("start_date", ""),
+                    "end_date": roster_section.get("end_date", ""),
+                    "data": data_to_return,
+                    "validation": validation
+                },
+                headers=headers
+            )
         
         # Backward compatibility for old structure
         week_data = {}
@@ -549,7 +672,8 @@ async def get_roster(request: Request, week_type: str):
 
 @api_router.post("/roster/{week_type}", dependencies=[require_admin()])
 @limiter.limit("5/minute")
-async def update_roster(request: Request, week_type: str, roster_data: Dict[str, Any]):
+async def update_roster(request: Request, week_type: str, roster_data: Dict[str, Any],
+                        background_tasks: BackgroundTasks):
     """Robust roster update with comprehensive validation"""
     try:
         # Handle roster structure (current, next, week after)
@@ -557,91 +681,159 @@ async def update_roster(request: Request, week_type: str, roster_data: Dict[str,
             if not roster_data:
                 raise HTTPException(status_code=400, detail="No roster data provided")
             
-            # Validate structure for new format
-            if "data" in roster_data:
-                # Full structure update with metadata
-                ROSTER_DATA[week_type] = {
-                    "week_type": roster_data.get("week_type", "weekA"),
-                    "start_date": roster_data.get("start_date", ""),
-                    "end_date": roster_data.get("end_date", ""),
-                    "data": roster_data.get("data", {})
-                }
-            else:
-                # Legacy: just updating data, keep existing metadata
-                if week_type not in ROSTER_DATA:
-                    ROSTER_DATA[week_type] = {"week_type": "weekA", "start_date": "", "end_date": "", "data": {}}
-                ROSTER_DATA[week_type]["data"] = roster_data
+            with roster_store.transaction(week_type, expected=expected_versions(request, week_type)):
+                # Shallow copy is enough: only top-level section keys are reassigned below
+                previous_section = dict(ROSTER_DATA.get(week_type) or {})
+            
+                # Validate structure for new format
+                if "data" in roster_data:
+                    # Full structure update with metadata
+                    ROSTER_DATA[week_type] = {
+                        "week_type": roster_data.get("week_type", "weekA"),
+                        "start_date": roster_data.get("start_date", ""),
+                        "end_date": roster_data.get("end_date", ""),
+                        "data": roster_data.get("data", {})
+                    }
+                else:
+                    # Legacy: just updating data, keep existing metadata
+                    if week_type not in ROSTER_DATA:
+                        ROSTER_DATA[week_type] = {"week_type": "weekA", "start_date": "", "end_date": "", "data": {}}
+                    ROSTER_DATA[week_type]["data"] = roster_data
             
-            save_roster_data()
-            logger.info(f"Updated {week_type}: {len(ROSTER_DATA[week_type].get('data', {}))} participants")
-            return {"message": f"{week_type.capitalize()} updated successfully"}
+                save_roster_data(week_type, previous={week_type: previous_section})
+                logger.info(f"Updated {week_type}: {len(ROSTER_DATA[week_type].get('data', {}))} participants")
+
+            # Revalidated in the background; only the workers and days this update touched are re-run
+            schedule_revalidation(background_tasks, week_type)
+            return {
+                "message": f"{week_type.capitalize()} updated successfully",
+                "version": roster_store.version(week_type)
+            }
         
         # Backward compatibility for old structure
         if not roster_data:
             logger.warning(f"Attempted to update {week_type} with empty data")
             raise HTTPException(status_code=400, detail="No roster data provided")
 
-        # Ensure global ROSTER_DATA structure
-        if 'admin' not in ROSTER_DATA:
-            ROSTER_DATA['admin'] = {}
-        if 'hours' not in ROSTER_DATA:
-            ROSTER_DATA['hours'] = {}
-
-        # REPLACE roster data (not merge) - clear ALL participants for this week first
-        # Step 1: Clear the week for all existing participants
-        for participant_code in list(ROSTER_DATA.keys()):
-            if participant_code in ['admin', 'hours']:
-                continue
-            if isinstance(ROSTER_DATA[participant_code], dict) and week_type in ROSTER_DATA[participant_code]:
-                ROSTER_DATA[participant_code][week_type] = {}
+        with roster_store.write_lock():
+            # Ensure global ROSTER_DATA structure
+            if 'admin' not in ROSTER_DATA:
+                ROSTER_DATA['admin'] = {}
+            if 'hours' not in ROSTER_DATA:
+                ROSTER_DATA['hours'] = {}
+
+            # REPLACE roster data (not merge) - clear ALL participants for this week first
+            # Step 1: Clear the week for all existing participants
+            touched_participants = []
+            for participant_code in list(ROSTER_DATA.keys()):
+                if participant_code in ['admin', 'hours']:
+                    continue
+                if isinstance(ROSTER_DATA[participant_code], dict) and week_type in ROSTER_DATA[participant_code]:
+                    ROSTER_DATA[participant_code][week_type] = {}
+                    touched_participants.append(participant_code)
         
-        # Step 2: Set new data for participants in the POST
-        for participant_code, participant_shifts in roster_data.items():
-            if participant_code in ['admin', 'hours']:
-                continue
+            # Step 2: Set new data for participants in the POST
+            for participant_code, participant_shifts in roster_data.items():
+                if participant_code in ['admin', 'hours']:
+                    continue
 
-            if participant_code not in ROSTER_DATA:
-                ROSTER_DATA[participant_code] = {}
+                if participant_code not in ROSTER_DATA:
+                    ROSTER_DATA[participant_code] = {}
 
-            # Set the new week data
-            ROSTER_DATA[participant_code][week_type] = participant_shifts
+                # Set the new week data
+                ROSTER_DATA[participant_code][week_type] = participant_shifts
+                if participant_code not in touched_participants:
+                    touched_participants.append(participant_code)
 
-        # Save updated roster
-        save_roster_data()
+            # Save updated roster
+            save_roster_data(*touched_participants)
 
         logger.info(f"Successfully updated {week_type} roster with {len(roster_data)} participants")
         return {"message": f"Roster {week_type} updated successfully", "participants": len(roster_data)}
 
+    except VersionConflict as e:
+        raise version_conflict(e)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating {week_type} roster: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to update roster: {str(e)}")
 
+@api_router.patch("/roster/{week_type}/shifts", dependencies=[require_admin()])
+@limiter.limit("60/minute")
+async def patch_roster_shifts(request: Request, week_type: str, patch: ShiftPatchRequest,
+                              background_tasks: BackgroundTasks):
+    """
+    Add, update, move or delete individual shifts by id
+
+    Operations are applied in order as one batch; if any fails none are kept.
+    Only the participant/date cells they touch are journaled and revalidated.
+    """
+    try:
+        if week_type not in ['roster', 'roster_next', 'roster_after', 'planner']:
+            raise HTTPException(status_code=400, detail=f"Shifts can't be patched in {week_type}")
+        if not patch.operations:
+            raise HTTPException(status_code=400, detail="No operations provided")
+        with roster_store.transaction(week_type, expected=expected_versions(request, week_type)):
+            section = ROSTER_DATA.get(week_type)
+            if not isinstance(section, dict):
+                raise HTTPException(status_code=404, detail=f"No {week_type} roster to patch")
+            if not isinstance(section.get("data"), dict):
+                section["data"] = {}
+        
+            shift_patch = ShiftPatch(section["data"], roster_store.index(week_type))
+            try:
+                applied = shift_patch.apply([op.model_dump(exclude_none=True) for op in patch.operations])
+            except ShiftPatchError as e:
+                raise HTTPException(status_code=404 if e.not_found else 400, detail=str(e))
+        
+            cells = roster_store.save_cells(week_type, shift_patch.cells)
+            roster_writer.mark(week_type)
+            incremental_validator.mark_changed(week_type, cells, shift_patch.previous_data)
+        schedule_revalidation(background_tasks, week_type)
+        logger.info(f"Patched {week_type}: {len(applied)} operations over {len(cells)} days")
+        return {
+            "message": f"{week_type.capitalize()} patched successfully",
+            "version": roster_store.version(week_type),
+            "applied": applied
+        }
+    except VersionConflict as e:
+        raise version_conflict(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error patching {week_type} roster: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to patch roster: {str(e)}")
+
 @api_router.post("/roster/copy_to_planner", dependencies=[require_admin()])
 @limiter.limit("5/minute")
-async def copy_to_planner(request: Request):
+async def copy_to_planner(request: Request, background_tasks: BackgroundTasks):
     """Copy roster to planner with week_type flip"""
     try:
-        roster = ROSTER_DATA.get("roster", {})
-        if not roster or not roster.get("data"):
-            raise HTTPException(status_code=400, detail="No roster data to copy")
-        
-        # Get current week_type and flip it
-        current_week_type = roster.get("week_type", "weekA")
-        new_week_type = "weekB" if current_week_type == "weekA" else "weekA"
-        
-        # Deep copy the data
-        import copy
-        planner_data = copy.deepcopy(roster.get("data", {}))
-        
-        # Create planner with flipped week_type
-        ROSTER_DATA["planner"] = {
-            "week_type": new_week_type,
-            "start_date": "",  # Will be set when user selects dates
-            "end_date": "",
-            "data": planner_data
-        }
+        with roster_store.transaction("roster", "planner"):
+            roster = ROSTER_DATA.get("roster", {})
+            if not roster or not roster.get("data"):
+                raise HTTPException(status_code=400, detail="No roster data to copy")
+        
+            # Get current week_type and flip it
+            current_week_type = roster.get("week_type", "weekA")
+            new_week_type = "weekB" if current_week_type == "weekA" else "weekA"
+        
+            # Deep copy the data
+            import copy
+            planner_data = copy.deepcopy(roster.get("data", {}))
+            previous_planner = ROSTER_DATA.get("planner")
+        
+            # Create planner with flipped week_type
+            ROSTER_DATA["planner"] = {
+                "week_type": new_week_type,
+                "start_date": "",  # Will be set when user selects dates
+                "end_date": "",
+                "data": planner_data
+            }
         
-        save_roster_data()
+            save_roster_data("planner", previous={"planner": previous_planner})
+        schedule_revalidation(background_tasks, "planner")
         logger.info(f"Copied roster ({current_week_type}) to planner ({new_week_type})")
         return {"message": "Copied to planner successfully", "flipped_to": new_week_type}
     except HTTPException:
@@ -650,38 +842,47 @@ async def copy_to_planner(request: Request):
         logger.error(f"Error copying to planner: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _transition_planner(planner: Dict[str, Any]) -> Dict[str, Any]:
+    """Move the planner into the roster, archiving the outgoing week; returns both sections' previous values"""
+    previous = {"roster": ROSTER_DATA.get("roster"), "planner": planner}
+    _archive_week(previous["roster"])
+    
+    # Get current week dates for the roster
+    start_date, end_date = get_current_week_dates()
+    
+    # Move planner to roster (keeping the week_type and updating dates)
+    ROSTER_DATA["roster"] = {
+        "week_type": planner.get("week_type", "weekA"),
+        "start_date": start_date,
+        "end_date": end_date,
+        "data": planner.get("data", {})
+    }
+    
+    # Get next week dates for the new planner
+    next_start_date, next_end_date = get_next_week_dates()
+    
+    # Clear planner and set it up for next week
+    ROSTER_DATA["planner"] = {
+        "week_type": "weekA",  # Default for empty planner
+        "start_date": next_start_date,
+        "end_date": next_end_date,
+        "data": {}
+    }
+    return previous
+
 @api_router.post("/roster/transition_to_roster", dependencies=[require_admin()])
 @limiter.limit("5/minute")
-async def transition_to_roster(request: Request):
+async def transition_to_roster(request: Request, background_tasks: BackgroundTasks):
     """Move planner to roster (Sunday automation)"""
     try:
-        planner = ROSTER_DATA.get("planner", {})
-        if not planner or not planner.get("data"):
-            raise HTTPException(status_code=400, detail="No planner data to transition")
-        
-        # Get current week dates for the roster
-        start_date, end_date = get_current_week_dates()
-        
-        # Move planner to roster (keeping the week_type and updating dates)
-        ROSTER_DATA["roster"] = {
-            "week_type": planner.get("week_type", "weekA"),
-            "start_date": start_date,
-            "end_date": end_date,
-            "data": planner.get("data", {})
-        }
-        
-        # Get next week dates for the new planner
-        next_start_date, next_end_date = get_next_week_dates()
-        
-        # Clear planner and set it up for next week
-        ROSTER_DATA["planner"] = {
-            "week_type": "weekA",  # Default for empty planner
-            "start_date": next_start_date,
-            "end_date": next_end_date,
-            "data": {}
-        }
-        
-        save_roster_data()
+        with roster_store.transaction("roster", "planner"):
+            planner = ROSTER_DATA.get("planner", {})
+            if not planner or not planner.get("data"):
+                raise HTTPException(status_code=400, detail="No planner data to transition")
+        
+            previous = _transition_planner(planner)
+            save_roster_data("roster", "planner", previous=previous)
+        schedule_revalidation(background_tasks, "roster", "planner")
         logger.info(f"Transitioned planner to roster")
         return {"message": "Planner transitioned to roster successfully"}
     except HTTPException:
@@ -695,7 +896,7 @@ async def force_week_transition():
     """Manually trigger week transition (for immediate fixes)"""
     try:
         logger.info("🔄 Manual week transition triggered")
-        check_and_transition_weeks()
+        await asyncio.to_thread(check_and_transition_weeks)
         return {"message": "Week transition completed successfully"}
     except Exception as e:
         logger.error(f"Error in manual week transition: {e}")
@@ -708,15 +909,19 @@ async def validate_roster(week_type: str, roster_data: Optional[Dict[str, Any]]
     Returns errors and warnings
     """
     try:
-        # Use provided data or current roster
-        data_to_validate = roster_data if roster_data else ROSTER_DATA.get(week_type, {})
-        
-        # Get all workers for validation
-        workers_list = db.get_support_workers()
-        workers_dict = {str(w['id']): w for w in workers_list}
-        
-        # Run validation
-        result = validate_roster_data(data_to_validate, workers_dict)
+        if not roster_data and week_type in ['roster', 'roster_next', 'roster_after', 'planner']:
+            # Stored section: reuse cached results for everything unchanged since the last save
+            result = revalidate_section(week_type)
+        else:
+            # Use provided data or current roster
+            data_to_validate = roster_data if roster_data else ROSTER_DATA.get(week_type, {})
+            
+            # Get all workers for validation
+            workers_list = db.get_support_workers()
+            workers_dict = {str(w['id']): w for w in workers_list}
+            
+            # Run validation
+            result = validate_roster_data(data_to_validate, workers_dict)
         
         logger.info(f"Validated {week_type}: {len(result['errors'])} errors, {len(result['warnings'])} warnings")
         return result
@@ -724,6 +929,78 @@ async def validate_roster(week_type: str, roster_data: Optional[Dict[str, Any]]
         logger.error(f"Error validating roster {week_type}: {e}")
         raise HTTPException(status_code=500, detail=f"Validation error: {str(e)}")
 
+@api_router.get("/roster/{week_type}/validation")
+async def get_roster_validation(week_type: str, background_tasks: BackgroundTasks):
+    """Stored validation result for a roster section; never validates on the request path"""
+    stored = VALIDATION_RESULTS.get(week_type)
+    schedule_revalidation(background_tasks, week_type)
+    if not stored:
+        return {"status": "pending", "version": None}
+    return {**validation_status(week_type), **stored["result"]}
+
+# Overlap indexes for "would this assignment conflict" checks, per section version
+@api_router.post("/roster/{week_type}/conflicts")
+@limiter.limit("120/minute")
+async def check_shift_conflicts(request: Request, week_type: str, check: ConflictCheck):
+    """Shifts in a section that assigning the worker to the given date and times would overlap"""
+    if week_type not in ['roster_last', 'roster', 'roster_next', 'roster_after', 'planner']:
+        raise HTTPException(status_code=400, detail=f"Invalid week type: {week_type}")
+    try:
+        overlapping = section_conflict_index(roster_store, week_type).conflicts(
+            check.worker_id, check.shift_date, check.start_time, check.end_time,
+            exclude_shift_id=check.shift_id
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="shift_date must be YYYY-MM-DD and times HH:MM")
+    except Exception as e:
+        logger.error(f"Error checking conflicts for worker {check.worker_id} in {week_type}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "worker_id": check.worker_id,
+        "conflict": bool(overlapping),
+        "conflicts": [
+            {"id": shift.shift_id, "participant": shift.participant, "date": shift.date,
+             "startTime": shift.start_time, "endTime": shift.end_time}
+            for shift in overlapping
+        ]
+    }
+
+@api_router.get("/roster/{week_type}/workers/{worker_id}/shifts")
+async def get_worker_shifts(week_type: str, worker_id: str):
+    """All shifts for one worker in a roster section, served from the worker index"""
+    try:
+        section_data = (ROSTER_DATA.get(week_type) or {}).get('data', {})
+        shifts = []
+        for location in roster_store.index(week_type).worker_locations(worker_id):
+            shift = resolve_shift(section_data, location)
+            if shift:
+                shifts.append({**shift, 'participant': location.participant, 'date': location.date})
+        return {"week_type": week_type, "worker_id": worker_id, "shifts": shifts}
+    except Exception as e:
+        logger.error(f"Error fetching shifts for worker {worker_id} in {week_type}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/roster/{week_type}/dates/{shift_date}")
+async def get_shifts_on_date(week_type: str, shift_date: str):
+    """Shifts and rostered workers on one date, served from the date index"""
+    try:
+        section_data = (ROSTER_DATA.get(week_type) or {}).get('data', {})
+        roster_index = roster_store.index(week_type)
+        shifts = []
+        for location in roster_index.date_locations(shift_date):
+            shift = resolve_shift(section_data, location)
+            if shift:
+                shifts.append({**shift, 'participant': location.participant})
+        return {
+            "week_type": week_type,
+            "date": shift_date,
+            "workers": sorted(roster_index.workers_on(shift_date)),
+            "shifts": shifts
+        }
+    except Exception as e:
+        logger.error(f"Error fetching shifts on {shift_date} in {week_type}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Location Routes
 @api_router.get("/locations")
 async def get_locations():
@@ -784,15 +1061,46 @@ async def get_availability_rules_batch(weekday: Optional[int] = None):
 async def get_unavailability_periods_batch(check_date: Optional[str] = None):
     """Get unavailability periods for all workers on a specific date"""
     try:
-        from datetime import datetime
-        check_date = check_date or datetime.now().date().isoformat()
-        
-        response = db.client.table('unavailability_periods').select('worker_id').lte('from_date', check_date).gte('to_date', check_date).execute()
-        return response.data or []
+        check = date.fromisoformat(check_date) if check_date else datetime.now().date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid check_date: {check_date}")
+    try:
+        periods = db.unavailability_index().overlapping(check, check)
+        return [{'worker_id': period['worker_id']} for period in periods]
     except Exception as e:
         logger.error(f"Error fetching unavailability periods batch: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/unavailability-periods/week")
+async def get_unavailability_week(start_date: Optional[str] = None):
+    """
+    Unavailability for all workers over the 7 days from start_date (default: this week's Monday)
+
+    Returns each unavailable worker's periods, and per day the workers unavailable on it.
+    """
+    today = datetime.now().date()
+    try:
+        start = date.fromisoformat(start_date) if start_date else today - timedelta(days=today.weekday())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid start_date: {start_date}")
+    end = start + timedelta(days=6)
+    try:
+        index = db.unavailability_index()
+        workers = index.unavailable_workers(start, end)
+        days = {}
+        for offset in range(7):
+            day = start + timedelta(days=offset)
+            days[day.isoformat()] = [worker_id for worker_id in workers if index.is_unavailable(worker_id, day)]
+        return {
+            'from_date': start.isoformat(),
+            'to_date': end.isoformat(),
+            'workers': workers,
+            'days': days
+        }
+    except Exception as e:
+        logger.error(f"Error fetching unavailability for week of {start}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.post("/workers/{worker_id}/availability")
 async def set_worker_availability(worker_id: str, availability_data: dict):
     """Save worker availability rules"""
@@ -801,6 +1109,7 @@ async def set_worker_availability(worker_id: str, availability_data: dict):
         rules = availability_data.get('rules', [])
         success = db.save_availability_rules(int(worker_id), rules)
         if success:
+            availability_changed()
             return {"message": "Availability updated successfully", "worker_id": worker_id}
         else:
             raise HTTPException(status_code=400, detail="Failed to update availability")
@@ -836,6 +1145,7 @@ async def add_unavailability_period(worker_id: str, period: UnavailabilityPeriod
 
         if not created_period:
             raise HTTPException(status_code=500, detail="Failed to create unavailability period in database.")
+        availability_changed()
 
         logger.info(f"Successfully created unavailability for worker {worker_id}")
         return created_period
@@ -852,6 +1162,7 @@ async def delete_unavailability(period_id: int):
         success = db.delete_unavailability_period(period_id)
         if not success:
             raise HTTPException(status_code=404, detail="Unavailability period not found or could not be deleted.")
+        availability_changed()
         
         logger.info(f"Successfully deleted unavailability period {period_id}")
         return {"message": "Unavailability period deleted successfully."}
@@ -1418,25 +1729,24 @@ async def chat_with_ai(data: Dict[str, Any]):
                 roster_data_dict = roster_response['data']
                 logger.info(f"AI Chat - Found {len(roster_data_dict)} participants in roster")
                 
-                # Roster structure: { participant_code: { date: [shifts] } }
-                for participant_code, dates_dict in roster_data_dict.items():
-                    # Skip entries that aren't participant codes (e.g., stray date keys)
-                    if not isinstance(dates_dict, dict):
-                        continue
-                    if participant_code.startswith('2025-'):  # Skip date keys
-                        continue
-                        
-                    participant_name = participant_map.get(participant_code, participant_code)
-                    for date_str, shifts in dates_dict.items():
-                        if isinstance(shifts, list):
-                            for shift in shifts:
-                                worker_ids = shift.get('workers', [])
-                                worker_names = [worker_map.get(str(wid), f'ID{wid}') for wid in worker_ids]
-                                if worker_names:
-                                    shift_time = f"{shift.get('startTime', '')}-{shift.get('endTime', '')}"
-                                    shift_assignments.append(
-                                        f"{date_str}: {participant_name} with {', '.join(worker_names)} ({shift_time})"
-                                    )
+                # Walk the date index so the earliest shifts make the 150-line cut
+                roster_index = roster_store.index('roster')
+                for date_str in roster_index.dates():
+                    for location in roster_index.date_locations(date_str):
+                        # Skip entries that aren't participant codes (e.g., stray date keys)
+                        if location.participant.startswith('2025-'):
+                            continue
+                        shift = resolve_shift(roster_data_dict, location)
+                        if not shift:
+                            continue
+                        participant_name = participant_map.get(location.participant, location.participant)
+                        worker_ids = shift.get('workers', [])
+                        worker_names = [worker_map.get(str(wid), f'ID{wid}') for wid in worker_ids]
+                        if worker_names:
+                            shift_time = f"{shift.get('startTime', '')}-{shift.get('endTime', '')}"
+                            shift_assignments.append(
+                                f"{date_str}: {participant_name} with {', '.join(worker_names)} ({shift_time})"
+                            )
                 logger.info(f"AI Chat - Built {len(shift_assignments)} shift assignments")
         except Exception as e:
             logger.error(f"Error parsing roster for AI: {e}", exc_info=True)
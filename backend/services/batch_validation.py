@@ -1,21 +1,49 @@
 """
 Batch validation service for validating multiple shifts at once
+
+A batch is validated as one roster: BatchContext groups every shift once,
+runs the per-worker enhanced rules over each worker's batch shifts and the
+per-shift rules over each shift, and keeps each worker's schedule in time
+order. Cross-shift rules (conflicts, rest, daily and weekly hours) see the
+whole batch, and each finding is reported on the shifts it concerns.
+
+Every rule only relates shifts that share a worker or a participant/date
+cell, so shifts split into independent groups. Large batches are
+partitioned along those groups and validated in a process pool;
+stream_batch yields each partition's results as soon as it completes.
 """
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
+from dataclasses import dataclass, asdict, replace
 from datetime import datetime
+from bisect import bisect_left
 import logging
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import json
 
 from .enhanced_validation_service import EnhancedValidationService
+from .incremental_validation import WORKER_RULES, SHIFT_RULES, Findings, worker_roster
+from .roster_index import RosterIndex
+from .shift_conflicts import ScheduleIndex
+from .worker_timeline import absolute_span, day_number, time_to_minutes
+from .validation_config import get_validation_config
 from .smart_validation import SmartValidationEngine, SmartValidationResult
 from .shift_templates import ShiftTemplateManager
-from .participant_validation_config import ParticipantValidationManager
+from .participant_validation_config import ParticipantValidationManager, get_participant_validation_manager
 
 logger = logging.getLogger(__name__)
 
+# Below this many shifts a batch is validated in one go; process startup and pickling cost more
+PARALLEL_MIN_SHIFTS = 1000
+
+# Partitions per pool process, so one slow partition doesn't hold up the rest
+PARTITIONS_PER_PROCESS = 2
+
+# Order of a Findings tuple
+FINDING_LEVELS = ('errors', 'warnings', 'info')
+
 @dataclass
 class BatchValidationRequest:
     """Request for batch validation"""
@@ -48,15 +76,208 @@ class BatchValidationResult:
         """Convert to dictionary for API responses"""
         return asdict(self)
 
+class BatchContext:
+    """
+    Everything a batch's shifts are checked against, built once per batch
+
+    A shift's enhanced findings are the per-worker rule findings that concern
+    it (a conflict or rest finding concerns the pair of shifts, an hours
+    finding every shift of that day or week) plus the per-shift rules run on
+    it alone. Shifts that can't be placed on the timeline (bad date or times)
+    are recorded in ``invalid`` and left out of everyone else's checks.
+    """
+
+    def __init__(self, shifts: List[Dict[str, Any]], workers: Dict[str, Any],
+                 config: Dict[str, Any], participant_manager: ParticipantValidationManager):
+        self.shifts = shifts
+        self.config = config
+        self.participant_manager = participant_manager
+        self.invalid: Dict[int, str] = {}
+        self.data: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._cells: Dict[int, Tuple[str, str]] = {}
+        self._workers: Dict[int, List[str]] = {}
+        self._order: Dict[int, Tuple[int, int]] = {}
+        self._by_worker: Dict[str, List[Tuple[int, int]]] = {}
+        self._schedules: Dict[str, List[Dict[str, Any]]] = {}
+        self._indexes: Dict[str, ScheduleIndex] = {}
+        self._id_counts: Dict[Any, int] = {}
+        for shift in shifts:
+            shift_id = shift.get('id')
+            self._id_counts[shift_id] = self._id_counts.get(shift_id, 0) + 1
+        self._participant_rules: Dict[str, Dict[str, Any]] = {}
+
+        placed: Dict[int, Dict[str, Any]] = {}
+        for i, shift in enumerate(shifts):
+            try:
+                day = day_number(shift['date'])
+                abs_start, _ = absolute_span(
+                    day, time_to_minutes(shift['startTime']), time_to_minutes(shift['endTime'])
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                self.invalid[i] = f"Invalid shift date/time: {e}"
+                continue
+            cell = (shift.get('participant', 'unknown'), shift['date'])
+            # Batch position as the ID, so findings map back to this shift
+            placed[i] = dict(shift, id=i)
+            self.data.setdefault(cell[0], {}).setdefault(cell[1], []).append(placed[i])
+            self._cells[i] = cell
+            self._workers[i] = list(dict.fromkeys(str(w) for w in shift.get('workers', [])))
+            self._order[i] = (abs_start, i)
+            for worker_id in self._workers[i]:
+                self._by_worker.setdefault(worker_id, []).append(self._order[i])
+        for entries in self._by_worker.values():
+            entries.sort()
+
+        service = EnhancedValidationService(workers, config)
+        index = RosterIndex.build(self.data)
+        # Per shift: rule -> findings that concern it
+        self.findings: Dict[int, Dict[str, Findings]] = {}
+        for worker_id in index.by_worker:
+            roster_data = worker_roster(self.data, index, worker_id)
+            if roster_data is not None:
+                self._attribute(service, WORKER_RULES, roster_data)
+        for i, entry in placed.items():
+            participant, date = self._cells[i]
+            self._attribute(service, SHIFT_RULES, {'data': {participant: {date: [entry]}}})
+
+    def _attribute(self, service: EnhancedValidationService, rules: Tuple[str, ...],
+                   roster_data: Dict[str, Any]) -> None:
+        """Run ``rules`` over ``roster_data`` and file each finding under the shifts it concerns"""
+        for rule in rules:
+            service.errors, service.warnings, service.info, service.attributions = [], [], [], []
+            getattr(service, rule)(roster_data)
+            for level, message, shift_ids in service.attributions:
+                for i in dict.fromkeys(shift_ids):
+                    findings = self.findings.setdefault(i, {}).setdefault(rule, ([], [], []))
+                    findings[FINDING_LEVELS.index(level)].append(message)
+
+    def enhanced(self, i: int) -> Tuple[List[str], List[str], List[str]]:
+        """(errors, warnings, info) for shift ``i``, in rule order"""
+        findings = self.findings.get(i, {})
+        errors: List[str] = []
+        warnings: List[str] = []
+        info: List[str] = []
+        for rule in WORKER_RULES + SHIFT_RULES:
+            rule_errors, rule_warnings, rule_info = findings.get(rule, ([], [], []))
+            errors.extend(rule_errors)
+            warnings.extend(rule_warnings)
+            info.extend(rule_info)
+        return errors, warnings, info
+
+    def worker_schedule(self, i: int, preceding_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        The other batch shifts of shift ``i``'s workers, in start order
+
+        Args:
+            preceding_only: Only shifts starting before this one
+        """
+        workers = self._workers.get(i, ())
+        if len(workers) == 1:
+            # Common case: slice the worker's own ordered schedule
+            entries = self._by_worker[workers[0]]
+            schedule = self._schedules.get(workers[0])
+            if schedule is None:
+                schedule = self._schedules[workers[0]] = [self.shifts[j] for _, j in entries]
+            position = bisect_left(entries, self._order[i])
+            return schedule[:position] if preceding_only else schedule[:position] + schedule[position + 1:]
+        seen = set()
+        for worker_id in workers:
+            entries = self._by_worker[worker_id]
+            end = bisect_left(entries, self._order[i]) if preceding_only else len(entries)
+            seen.update(entry for entry in entries[:end] if entry[1] != i)
+        return [self.shifts[j] for _, j in sorted(seen)]
+
+    def schedule_indexes(self, i: int) -> List[ScheduleIndex]:
+        """
+        One ScheduleIndex per worker of shift ``i``, of that worker's batch shifts other than ``i``
+
+        A shift with a batch-unique id shares each worker's one index, which
+        excludes it by id; anything else gets indexes of its own. A shift
+        without workers gets a single empty index.
+        """
+        workers = self._workers.get(i, ())
+        if not workers:
+            return [ScheduleIndex(())]
+        shift_id = self.shifts[i].get('id')
+        shared = shift_id is not None and self._id_counts.get(shift_id) == 1
+        indexes = []
+        for worker_id in workers:
+            entries = self._by_worker[worker_id]
+            if not shared:
+                indexes.append(ScheduleIndex.from_dicts(self.shifts[j] for _, j in entries if j != i))
+                continue
+            index = self._indexes.get(worker_id)
+            if index is None:
+                index = self._indexes[worker_id] = ScheduleIndex.from_dicts(self.shifts[j] for _, j in entries)
+            indexes.append(index)
+        return indexes
+
+    def participant_rules(self, participant_id: str) -> Dict[str, Any]:
+        """Participant validation rules, looked up once per participant"""
+        rules = self._participant_rules.get(participant_id)
+        if rules is None:
+            rules = self.participant_manager.get_participant_validation_rules(participant_id)
+            self._participant_rules[participant_id] = rules
+        return rules
+
+
+def partition_batch(shifts: List[Dict[str, Any]], partitions: int) -> List[List[int]]:
+    """
+    Split a batch into at most ``partitions`` groups of shift indices
+
+    Shifts sharing a worker or a participant/date cell (directly or through
+    other shifts) always land in the same group, so validating groups
+    separately gives the same results as validating the whole batch. Groups
+    are balanced by shift count.
+    """
+    parent = list(range(len(shifts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    first_shift: Dict[Any, int] = {}
+    for i, shift in enumerate(shifts):
+        keys = [('worker', str(worker_id)) for worker_id in shift.get('workers', []) or []]
+        keys.append(('cell', shift.get('participant', 'unknown'), shift.get('date')))
+        for key in keys:
+            j = first_shift.setdefault(key, i)
+            parent[find(i)] = find(j)
+
+    components: Dict[int, List[int]] = {}
+    for i in range(len(shifts)):
+        components.setdefault(find(i), []).append(i)
+
+    # Largest first onto the lightest bin
+    bins: List[List[int]] = [[] for _ in range(max(1, partitions))]
+    for component in sorted(components.values(), key=len, reverse=True):
+        min(bins, key=len).extend(component)
+    return [sorted(indices) for indices in bins if indices]
+
+
+# Per-process service for pool workers
+_partition_service = None
+
+def _validate_partition(request: 'BatchValidationRequest') -> List[Dict[str, Any]]:
+    """Validate one partition's shifts (runs in a pool process)"""
+    global _partition_service
+    if _partition_service is None:
+        _partition_service = BatchValidationService()
+    return _partition_service._validate_all(request)
+
+
 class BatchValidationService:
     """Service for batch validation of multiple shifts"""
     
     def __init__(self):
-        self.enhanced_validator = EnhancedValidationService({})
         self.smart_engine = SmartValidationEngine()
         self.template_manager = ShiftTemplateManager()
-        self.participant_manager = ParticipantValidationManager()
+        self.participant_manager = get_participant_validation_manager()
         self.executor = ThreadPoolExecutor(max_workers=4)
+        self.processes = min(4, os.cpu_count() or 1)
+        self._process_pool: Optional[ProcessPoolExecutor] = None
     
     async def validate_batch(self, request: BatchValidationRequest) -> BatchValidationResult:
         """Validate a batch of shifts"""
@@ -66,112 +287,165 @@ class BatchValidationService:
         logger.info(f"Starting batch validation {request_id} for {len(request.shifts)} shifts")
         
         try:
-            # Prepare validation results
-            results = []
-            validated_count = 0
-            failed_count = 0
-            
-            # Process shifts in parallel batches
-            batch_size = 10  # Process 10 shifts at a time
-            shift_batches = [request.shifts[i:i + batch_size] 
-                           for i in range(0, len(request.shifts), batch_size)]
-            
-            for batch in shift_batches:
-                batch_results = await self._validate_shift_batch(
-                    batch, request.workers, request.participants, request
-                )
-                results.extend(batch_results)
-                
-                for result in batch_results:
-                    if result.get('status') in ['success', 'warning']:
-                        validated_count += 1
-                    else:
-                        failed_count += 1
-            
-            # Calculate overall status
-            overall_status = self._calculate_overall_status(results)
-            
-            # Generate summary
-            summary = self._generate_batch_summary(results)
-            
-            processing_time = (datetime.now() - start_time).total_seconds()
+            results: List[Optional[Dict[str, Any]]] = [None] * len(request.shifts)
+            async for indices, partition_results in self._run_partitions(request):
+                for i, result in zip(indices, partition_results):
+                    results[i] = result
             
-            batch_result = BatchValidationResult(
-                request_id=request_id,
-                total_shifts=len(request.shifts),
-                validated_shifts=validated_count,
-                failed_validations=failed_count,
-                overall_status=overall_status,
-                results=results,
-                summary=summary,
-                processing_time=processing_time,
-                created_at=start_time.isoformat()
-            )
-            
-            logger.info(f"Batch validation {request_id} completed in {processing_time:.2f}s")
+            batch_result = self._build_result(request_id, start_time, request, results)
+            logger.info(f"Batch validation {request_id} completed in {batch_result.processing_time:.2f}s")
             return batch_result
             
         except Exception as e:
             logger.error(f"Batch validation {request_id} failed: {e}")
             raise
     
-    async def _validate_shift_batch(self, shifts: List[Dict[str, Any]], 
-                                  workers: Dict[str, Any], participants: Dict[str, Any],
-                                  request: BatchValidationRequest) -> List[Dict[str, Any]]:
-        """Validate a batch of shifts"""
-        tasks = []
+    async def stream_batch(self, request: BatchValidationRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Validate a batch, yielding progress events as partitions complete
+
+        Events, in order:
+            {'event': 'start', 'request_id', 'total_shifts', 'partitions'}
+            {'event': 'partition', 'results', 'completed_shifts', 'total_shifts'} per partition
+            {'event': 'complete', ...BatchValidationResult fields except results}
+        """
+        start_time = datetime.now()
+        request_id = f"batch_{int(start_time.timestamp())}"
+        partitions = self._partitions(request)
         
-        for shift in shifts:
-            task = self._validate_single_shift(shift, workers, participants, request)
-            tasks.append(task)
+        logger.info(f"Streaming batch validation {request_id} for {len(request.shifts)} shifts "
+                    f"in {len(partitions)} partition(s)")
+        yield {
+            'event': 'start',
+            'request_id': request_id,
+            'total_shifts': len(request.shifts),
+            'partitions': len(partitions)
+        }
         
-        # Run validations in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(request.shifts)
+        completed = 0
+        async for indices, partition_results in self._run_partitions(request, partitions):
+            for i, result in zip(indices, partition_results):
+                results[i] = result
+            completed += len(indices)
+            yield {
+                'event': 'partition',
+                'results': partition_results,
+                'completed_shifts': completed,
+                'total_shifts': len(request.shifts)
+            }
         
-        # Handle any exceptions
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Validation failed for shift {i}: {result}")
-                processed_results.append({
-                    'shift_id': shifts[i].get('id', f'shift_{i}'),
-                    'status': 'error',
-                    'error': str(result),
-                    'validations': []
-                })
-            else:
-                processed_results.append(result)
+        summary = self._build_result(request_id, start_time, request, results).to_dict()
+        summary.pop('results')
+        logger.info(f"Batch validation {request_id} completed in {summary['processing_time']:.2f}s")
+        yield {'event': 'complete', **summary}
+    
+    def _partitions(self, request: BatchValidationRequest) -> List[List[int]]:
+        if len(request.shifts) < PARALLEL_MIN_SHIFTS or self.processes < 2:
+            return [list(range(len(request.shifts)))] if request.shifts else []
+        return partition_batch(request.shifts, self.processes * PARTITIONS_PER_PROCESS)
+    
+    async def _run_partitions(self, request: BatchValidationRequest,
+                              partitions: Optional[List[List[int]]] = None):
+        """Yield (shift indices, results) per partition, in completion order"""
+        if partitions is None:
+            partitions = self._partitions(request)
+        loop = asyncio.get_running_loop()
+        
+        if len(partitions) <= 1:
+            # Off the event loop, in this process
+            for indices in partitions:
+                yield indices, await loop.run_in_executor(self.executor, self._validate_all, request)
+            return
         
-        return processed_results
+        # Pool processes can't see this process's in-memory validation config
+        options = dict(request.validation_options)
+        options['config'] = options.get('config') or get_validation_config().get_config()
+        pool = self._get_process_pool()
+        
+        async def run(indices: List[int]) -> Tuple[List[int], List[Dict[str, Any]]]:
+            partition = replace(
+                request,
+                shifts=[request.shifts[i] for i in indices],
+                validation_options=options
+            )
+            partition_results = await loop.run_in_executor(pool, _validate_partition, partition)
+            for i, result in zip(indices, partition_results):
+                # Fallback IDs are positions in the whole batch, not the partition
+                if 'id' not in request.shifts[i]:
+                    result['shift_id'] = f'shift_{i}'
+            return indices, partition_results
+        
+        for finished in asyncio.as_completed([run(indices) for indices in partitions]):
+            yield await finished
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # Spawned, not forked: the server process runs threads
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._process_pool
+    
+    def close(self) -> None:
+        """Shut down the worker pools"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+            self._process_pool = None
+        self.executor.shutdown(wait=False)
     
-    async def _validate_single_shift(self, shift: Dict[str, Any], 
-                                   workers: Dict[str, Any], participants: Dict[str, Any],
-                                   request: BatchValidationRequest) -> Dict[str, Any]:
+    def _build_result(self, request_id: str, start_time: datetime, request: BatchValidationRequest,
+                      results: List[Dict[str, Any]]) -> BatchValidationResult:
+        validated_count = sum(1 for result in results if result.get('status') in ['success', 'warning'])
+        return BatchValidationResult(
+            request_id=request_id,
+            total_shifts=len(request.shifts),
+            validated_shifts=validated_count,
+            failed_validations=len(results) - validated_count,
+            overall_status=self._calculate_overall_status(results),
+            results=results,
+            summary=self._generate_batch_summary(results),
+            processing_time=(datetime.now() - start_time).total_seconds(),
+            created_at=start_time.isoformat()
+        )
+    
+    def _validate_all(self, request: BatchValidationRequest) -> List[Dict[str, Any]]:
+        """Build the batch context once and validate every shift against it"""
+        config = request.validation_options.get('config') or get_validation_config().get_config()
+        context = BatchContext(request.shifts, request.workers, config, self.participant_manager)
+        return [
+            self._validate_single_shift(i, shift, context, request)
+            for i, shift in enumerate(request.shifts)
+        ]
+    
+    def _validate_single_shift(self, i: int, shift: Dict[str, Any], context: BatchContext,
+                               request: BatchValidationRequest) -> Dict[str, Any]:
         """Validate a single shift with all enabled validation types"""
-        shift_id = shift.get('id', 'unknown')
+        shift_id = shift.get('id', f'shift_{i}')
         validations = []
         
         try:
             # Enhanced validation
-            enhanced_result = await self._run_enhanced_validation(shift, workers, request)
+            enhanced_result = self._run_enhanced_validation(i, context)
             if enhanced_result:
                 validations.append(enhanced_result)
             
             # Template validation
             if request.template_validation:
-                template_result = await self._run_template_validation(shift)
+                template_result = self._run_template_validation(shift)
                 if template_result:
                     validations.append(template_result)
             
             # Participant-specific validation
             if request.participant_specific:
-                participant_result = await self._run_participant_validation(shift, participants)
+                participant_result = self._run_participant_validation(i, shift, context)
                 if participant_result:
                     validations.append(participant_result)
             
             # Smart validation
             if request.smart_validation:
-                smart_result = await self._run_smart_validation(shift, workers, participants)
+                smart_result = self._run_smart_validation(i, shift, context)
                 if smart_result:
                     validations.append(smart_result)
             
@@ -194,44 +468,32 @@ class BatchValidationService:
                 'validations': []
             }
     
-    async def _run_enhanced_validation(self, shift: Dict[str, Any], 
-                                     workers: Dict[str, Any], 
-                                     request: BatchValidationRequest) -> Optional[Dict[str, Any]]:
-        """Run enhanced validation on a shift"""
-        try:
-            # Create roster data structure for single shift
-            roster_data = {
-                'data': {
-                    shift.get('participant', 'unknown'): {
-                        shift.get('date', 'unknown'): [shift]
-                    }
-                }
-            }
-            
-            # Update validator with current workers
-            self.enhanced_validator.workers = workers
-            
-            # Run validation
-            result = self.enhanced_validator.validate_roster_data(roster_data)
-            
-            return {
-                'type': 'enhanced',
-                'status': 'success' if result['valid'] else 'error',
-                'errors': result.get('errors', []),
-                'warnings': result.get('warnings', []),
-                'info': result.get('info', []),
-                'summary': result.get('summary', {})
-            }
-            
-        except Exception as e:
-            logger.error(f"Enhanced validation failed: {e}")
+    def _run_enhanced_validation(self, i: int, context: BatchContext) -> Optional[Dict[str, Any]]:
+        """Enhanced findings for a shift from the shared batch context"""
+        if i in context.invalid:
             return {
                 'type': 'enhanced',
                 'status': 'error',
-                'error': str(e)
+                'error': context.invalid[i]
+            }
+        errors, warnings, info = context.enhanced(i)
+        return {
+            'type': 'enhanced',
+            'status': 'success' if not errors else 'error',
+            'errors': errors,
+            'warnings': warnings,
+            'info': info,
+            'summary': {
+                'total_errors': len(errors),
+                'total_warnings': len(warnings),
+                'total_info': len(info),
+                'is_valid': len(errors) == 0,
+                'has_warnings': len(warnings) > 0,
+                'config_used': context.config
             }
+        }
     
-    async def _run_template_validation(self, shift: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _run_template_validation(self, shift: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Run template validation on a shift"""
         try:
             # Suggest best matching template
@@ -268,21 +530,25 @@ class BatchValidationService:
                 'error': str(e)
             }
     
-    async def _run_participant_validation(self, shift: Dict[str, Any], 
-                                        participants: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Run participant-specific validation"""
+    def _run_participant_validation(self, i: int, shift: Dict[str, Any],
+                                    context: BatchContext) -> Optional[Dict[str, Any]]:
+        """Run participant-specific validation against each worker's indexed batch schedule"""
         try:
             participant_id = shift.get('participant')
             if not participant_id:
                 return None
             
             # Get participant configuration
-            participant_config = self.participant_manager.get_participant_validation_rules(participant_id)
+            participant_config = context.participant_rules(participant_id)
             
-            # Validate shift against participant rules
-            validation_results = self.participant_manager.validate_participant_shift(
-                participant_id, shift, []
-            )
+            # Validate shift against participant rules per worker; a field is reported once
+            validation_results = []
+            seen_fields = set()
+            for schedule in context.schedule_indexes(i):
+                for result in self.participant_manager.validate_participant_shift(participant_id, shift, schedule):
+                    if result['field'] not in seen_fields:
+                        seen_fields.add(result['field'])
+                        validation_results.append(result)
             
             return {
                 'type': 'participant',
@@ -300,19 +566,24 @@ class BatchValidationService:
                 'error': str(e)
             }
     
-    async def _run_smart_validation(self, shift: Dict[str, Any], 
-                                  workers: Dict[str, Any], 
-                                  participants: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Run smart validation on a shift"""
+    def _run_smart_validation(self, i: int, shift: Dict[str, Any],
+                              context: BatchContext) -> Optional[Dict[str, Any]]:
+        """Run smart validation on a shift against each worker's indexed batch schedule"""
         try:
             # Get participant configuration
             participant_id = shift.get('participant')
             participant_config = None
             if participant_id:
-                participant_config = self.participant_manager.get_participant_validation_rules(participant_id)
+                participant_config = context.participant_rules(participant_id)
             
-            # Run smart validation
-            smart_results = self.smart_engine.validate_shift(shift, [], participant_config)
+            # Run smart validation per worker; a rule is reported once even if several workers trip it
+            smart_results = []
+            seen_rules = set()
+            for schedule in context.schedule_indexes(i):
+                for result in self.smart_engine.validate_shift(shift, schedule, participant_config):
+                    if result.rule_id not in seen_rules:
+                        seen_rules.add(result.rule_id)
+                        smart_results.append(result)
             
             # Generate summary
             summary = self.smart_engine.get_validation_summary(smart_results)
@@ -455,3 +726,10 @@ def get_batch_validation_service() -> BatchValidationService:
     if _batch_validation_service is None:
         _batch_validation_service = BatchValidationService()
     return _batch_validation_service
+
+def close_batch_validation_service():
+    """Shut down the global service's worker pools, if it was ever created"""
+    global _batch_validation_service
+    if _batch_validation_service is not None:
+        _batch_validation_service.close()
+        _batch_validation_service = None
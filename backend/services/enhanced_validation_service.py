@@ -1,10 +1,13 @@
 """
 Enhanced validation service with improved conflict detection and flexible rules
 """
-from typing import Dict, List, Any, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, List, Any, Tuple, Optional, Iterable
 import logging
 
+from .worker_timeline import MINUTES_PER_DAY, WorkerTimeline, build_timelines, hour_of, time_to_minutes
+from .shift_conflicts import overlapping_pairs
+from .worker_availability import AvailabilityIndex
+
 logger = logging.getLogger(__name__)
 
 class EnhancedValidationService:
@@ -13,12 +16,19 @@ class EnhancedValidationService:
     flexible rest periods, and support for intentional split shifts
     """
     
-    def __init__(self, workers: Dict[str, Any], config: Dict[str, Any] = None):
+    def __init__(self, workers: Dict[str, Any], config: Dict[str, Any] = None,
+                 availability: Optional[AvailabilityIndex] = None):
         self.workers = workers
         self.config = config or self._get_default_config()
+        # Compiled availability rules and unavailability periods; None skips availability checks
+        self.availability = availability
         self.errors = []
         self.warnings = []
         self.info = []
+        # (level, message, IDs of the shifts it concerns) for every finding
+        self.attributions: List[Tuple[str, str, Tuple[Any, ...]]] = []
+        self._timeline_source = None
+        self._timelines: Dict[Any, WorkerTimeline] = {}
     
     def _get_default_config(self) -> Dict[str, Any]:
         """Get default validation configuration"""
@@ -46,6 +56,9 @@ class EnhancedValidationService:
         self.errors = []
         self.warnings = []
         self.info = []
+        self.attributions = []
+        # Rebuilt from the current data, then shared by every rule below
+        self._timeline_source = None
         
         logger.info("Starting enhanced roster validation")
         
@@ -74,237 +87,152 @@ class EnhancedValidationService:
     def check_worker_conflicts(self, roster_data: Dict[str, Any]):
         """
         Enhanced worker conflict detection with support for intentional split shifts
+
+        Overlaps are found across the whole week, so a shift that runs past
+        midnight or spans several later shifts is caught.
         """
-        worker_schedule = {}
-        
-        # Build worker schedule
-        for p_code, dates in roster_data.get('data', {}).items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    start = self._time_to_minutes(shift['startTime'])
-                    end = self._time_to_minutes(shift['endTime'])
-                    
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_schedule:
-                            worker_schedule[worker_id] = []
-                        worker_schedule[worker_id].append({
-                            'date': date,
-                            'start': start,
-                            'end': end,
-                            'participant': p_code,
-                            'shift_time': f"{shift['startTime']}-{shift['endTime']}",
-                            'funding_category': shift.get('funding_category', 'default'),
-                            'is_split_shift': shift.get('is_split_shift', False),
-                            'shift_id': shift.get('id', 'unknown'),
-                            'duration': float(shift.get('duration', 0))
-                        })
-        
-        # Check for conflicts
-        for worker_id, schedule in worker_schedule.items():
+        for worker_id, timeline in self._worker_timelines(roster_data).items():
             worker_name = self._get_worker_name(worker_id)
-            schedule.sort(key=lambda x: (x['date'], x['start']))
             
-            for i in range(len(schedule) - 1):
-                current = schedule[i]
-                next_shift = schedule[i + 1]
-                
-                if current['date'] != next_shift['date']:
+            # Every overlapping pair, including long and cross-midnight shifts
+            for current, next_shift in overlapping_pairs(timeline.shifts):
+                # Different participants = conflict
+                if current.participant != next_shift.participant:
+                    self._report(
+                        'errors', (current.shift_id, next_shift.shift_id),
+                        f"❌ CONFLICT: {worker_name} double-booked on {current.date} "
+                        f"for {current.participant} ({current.shift_time}) "
+                        f"and {next_shift.participant} ({next_shift.shift_time})"
+                    )
+                else:
+                    # Overlapping shifts for same participant
+                    self._report(
+                        'errors', (current.shift_id, next_shift.shift_id),
+                        f"❌ INVALID: {worker_name} has overlapping shifts "
+                        f"for {current.participant} on {current.date}"
+                    )
+            
+            # Same participant, same day, no overlap = check if intentional split shift
+            for current, next_shift in timeline.pairs():
+                if (current.date != next_shift.date or current.participant != next_shift.participant
+                        or current.abs_end > next_shift.abs_start):
                     continue
                 
-                # Different participants = conflict
-                if current['participant'] != next_shift['participant']:
-                    if current['end'] > next_shift['start']:
-                        self.errors.append(
-                            f"❌ CONFLICT: {worker_name} double-booked on {current['date']} "
-                            f"for {current['participant']} ({current['shift_time']}) "
-                            f"and {next_shift['participant']} ({next_shift['shift_time']})"
+                if current.abs_end == next_shift.abs_start:
+                    # Back-to-back for same participant
+                    if current.funding_category != next_shift.funding_category:
+                        # Different funding = valid split shift
+                        self._report(
+                            'info', (current.shift_id, next_shift.shift_id),
+                            f"ℹ️ SPLIT SHIFT: {worker_name} has back-to-back shifts "
+                            f"for {current.participant} with different funding categories"
                         )
-                
-                # Same participant = check if intentional split shift
-                elif current['participant'] == next_shift['participant']:
-                    if current['end'] == next_shift['start']:
-                        # Back-to-back for same participant
-                        if current['funding_category'] != next_shift['funding_category']:
-                            # Different funding = valid split shift
-                            self.info.append(
-                                f"ℹ️ SPLIT SHIFT: {worker_name} has back-to-back shifts "
-                                f"for {current['participant']} with different funding categories"
-                            )
-                        elif current.get('is_split_shift') and next_shift.get('is_split_shift'):
-                            # Marked as intentional split shift
-                            self.info.append(
-                                f"ℹ️ INTENTIONAL SPLIT: {worker_name} has planned split shift "
-                                f"for {current['participant']}"
-                            )
-                        else:
-                            self.warnings.append(
-                                f"⚠️ SPLIT SHIFT: {worker_name} has back-to-back shifts "
-                                f"for {current['participant']} - verify this is intentional"
-                            )
-                    elif current['end'] > next_shift['start']:
-                        # Overlapping shifts for same participant
-                        self.errors.append(
-                            f"❌ INVALID: {worker_name} has overlapping shifts "
-                            f"for {current['participant']} on {current['date']}"
+                    elif current.is_split_shift and next_shift.is_split_shift:
+                        # Marked as intentional split shift
+                        self._report(
+                            'info', (current.shift_id, next_shift.shift_id),
+                            f"ℹ️ INTENTIONAL SPLIT: {worker_name} has planned split shift "
+                            f"for {current.participant}"
                         )
                     else:
-                        # Gap between shifts - check if it meets minimum requirements
-                        gap_hours = (next_shift['start'] - current['end']) / 60
-                        if gap_hours < self.config['min_split_shift_gap']:
-                            self.warnings.append(
-                                f"⚠️ SHORT GAP: {worker_name} has {gap_hours:.1f}h gap "
-                                f"between shifts for {current['participant']} "
-                                f"(minimum: {self.config['min_split_shift_gap']}h)"
-                            )
+                        self._report(
+                            'warnings', (current.shift_id, next_shift.shift_id),
+                            f"⚠️ SPLIT SHIFT: {worker_name} has back-to-back shifts "
+                            f"for {current.participant} - verify this is intentional"
+                        )
+                else:
+                    # Gap between shifts - check if it meets minimum requirements
+                    gap_hours = (next_shift.abs_start - current.abs_end) / 60
+                    if gap_hours < self.config['min_split_shift_gap']:
+                        self._report(
+                            'warnings', (current.shift_id, next_shift.shift_id),
+                            f"⚠️ SHORT GAP: {worker_name} has {gap_hours:.1f}h gap "
+                            f"between shifts for {current.participant} "
+                            f"(minimum: {self.config['min_split_shift_gap']}h)"
+                        )
     
     def check_rest_periods(self, roster_data: Dict[str, Any]):
         """
         Flexible rest period validation with configurable rules
         """
-        worker_schedule = {}
-        
-        # Build worker schedule
-        for p_code, dates in roster_data.get('data', {}).items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    start = self._time_to_minutes(shift['startTime'])
-                    end = self._time_to_minutes(shift['endTime'])
-                    
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_schedule:
-                            worker_schedule[worker_id] = []
-                        worker_schedule[worker_id].append({
-                            'date': date,
-                            'start': start,
-                            'end': end,
-                            'duration': float(shift.get('duration', 0)),
-                            'shift_id': shift.get('id', 'unknown')
-                        })
-        
         # Check rest periods
-        for worker_id, schedule in worker_schedule.items():
+        for worker_id, timeline in self._worker_timelines(roster_data).items():
             worker_name = self._get_worker_name(worker_id)
-            schedule.sort(key=lambda x: (x['date'], x['start']))
             
-            for i in range(len(schedule) - 1):
-                current = schedule[i]
-                next_shift = schedule[i + 1]
-                
-                # Calculate rest period
-                current_date = datetime.strptime(current['date'], '%Y-%m-%d')
-                next_date = datetime.strptime(next_shift['date'], '%Y-%m-%d')
+            # Rest runs from the end of one shift to the start of the next, across midnight
+            for current, next_shift, break_hours in timeline.rest_pairs():
+                # Check against configurable minimum
+                min_rest = self.config['min_rest_hours']
                 
-                if (next_date - current_date).days <= 1:
-                    # Calculate break time
-                    current_end_mins = current['end']
-                    next_start_mins = next_shift['start']
-                    
-                    if current_date == next_date:
-                        # Same day
-                        break_hours = (next_start_mins - current_end_mins) / 60
+                if break_hours < min_rest:
+                    if self.config['strict_rest_validation']:
+                        self._report(
+                            'errors', (current.shift_id, next_shift.shift_id),
+                            f"❌ INSUFFICIENT REST: {worker_name} has {break_hours:.1f}h rest "
+                            f"between {current.date} ({self._minutes_to_time(current.start)}-{self._minutes_to_time(current.end)}) "
+                            f"and {next_shift.date} ({self._minutes_to_time(next_shift.start)}-{self._minutes_to_time(next_shift.end)}) "
+                            f"(minimum: {min_rest}h)"
+                        )
                     else:
-                        # Overnight
-                        break_hours = ((24 * 60 - current_end_mins) + next_start_mins) / 60
-                    
-                    # Check against configurable minimum
-                    min_rest = self.config['min_rest_hours']
-                    
-                    if break_hours < min_rest:
-                        if self.config['strict_rest_validation']:
-                            self.errors.append(
-                                f"❌ INSUFFICIENT REST: {worker_name} has {break_hours:.1f}h rest "
-                                f"between {current['date']} ({self._minutes_to_time(current['start'])}-{self._minutes_to_time(current['end'])}) "
-                                f"and {next_shift['date']} ({self._minutes_to_time(next_shift['start'])}-{self._minutes_to_time(next_shift['end'])}) "
-                                f"(minimum: {min_rest}h)"
-                            )
-                        else:
-                            self.warnings.append(
-                                f"⚠️ SHORT REST: {worker_name} has {break_hours:.1f}h rest "
-                                f"between shifts (recommended: {min_rest}h)"
-                            )
-                    
-                    # Check for excessive continuous work
-                    total_work_hours = current['duration'] + next_shift['duration']
-                    if total_work_hours > self.config['max_continuous_hours']:
-                        self.warnings.append(
-                            f"⚠️ LONG WORK PERIOD: {worker_name} has {total_work_hours:.1f}h "
-                            f"continuous work (max recommended: {self.config['max_continuous_hours']}h)"
+                        self._report(
+                            'warnings', (current.shift_id, next_shift.shift_id),
+                            f"⚠️ SHORT REST: {worker_name} has {break_hours:.1f}h rest "
+                            f"between shifts (recommended: {min_rest}h)"
                         )
+                
+                # Check for excessive continuous work
+                total_work_hours = current.duration + next_shift.duration
+                if total_work_hours > self.config['max_continuous_hours']:
+                    self._report(
+                        'warnings', (current.shift_id, next_shift.shift_id),
+                        f"⚠️ LONG WORK PERIOD: {worker_name} has {total_work_hours:.1f}h "
+                        f"continuous work (max recommended: {self.config['max_continuous_hours']}h)"
+                    )
     
     def check_continuous_hours(self, roster_data: Dict[str, Any]):
         """
         Check for excessive continuous work hours
         """
-        worker_schedule = {}
-        
-        # Build worker schedule
-        for p_code, dates in roster_data.get('data', {}).items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_schedule:
-                            worker_schedule[worker_id] = []
-                        worker_schedule[worker_id].append({
-                            'date': date,
-                            'duration': float(shift.get('duration', 0)),
-                            'start_time': shift['startTime'],
-                            'end_time': shift['endTime']
-                        })
-        
         # Check daily and weekly limits
-        for worker_id, schedule in worker_schedule.items():
+        for worker_id, timeline in self._worker_timelines(roster_data).items():
             worker_name = self._get_worker_name(worker_id)
             
-            # Group by date
-            daily_hours = {}
-            for shift in schedule:
-                date = shift['date']
-                if date not in daily_hours:
-                    daily_hours[date] = 0
-                daily_hours[date] += shift['duration']
-            
             # Check daily limits
-            for date, hours in daily_hours.items():
+            for date, hours in timeline.daily_hours.items():
                 if hours > self.config['max_daily_hours']:
-                    self.warnings.append(
+                    self._report(
+                        'warnings', [shift.shift_id for shift in timeline.days[date]],
                         f"⚠️ DAILY LIMIT: {worker_name} has {hours:.1f}h on {date} "
                         f"(max recommended: {self.config['max_daily_hours']}h)"
                     )
             
-            # Check weekly limits
-            total_weekly_hours = sum(daily_hours.values())
-            if total_weekly_hours > self.config['max_weekly_hours']:
-                self.warnings.append(
-                    f"⚠️ WEEKLY LIMIT: {worker_name} has {total_weekly_hours:.1f}h this week "
-                    f"(max recommended: {self.config['max_weekly_hours']}h)"
-                )
+            # Check weekly limits, one Monday-Sunday week at a time
+            for week, hours in timeline.weekly_hours.items():
+                if hours > self.config['max_weekly_hours']:
+                    self._report(
+                        'warnings', [shift.shift_id for shift in timeline.week_shifts(week)],
+                        f"⚠️ WEEKLY LIMIT: {worker_name} has {hours:.1f}h "
+                        f"{timeline.week_label(week) or 'this week '}"
+                        f"(max recommended: {self.config['max_weekly_hours']}h)"
+                    )
     
     def check_weekly_limits(self, roster_data: Dict[str, Any]):
         """
         Check weekly hour limits for workers
         """
-        worker_weekly_hours = {}
-        
-        # Calculate weekly hours for each worker
-        for p_code, dates in roster_data.get('data', {}).items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_weekly_hours:
-                            worker_weekly_hours[worker_id] = 0
-                        worker_weekly_hours[worker_id] += float(shift.get('duration', 0))
-        
-        # Check against worker-specific limits
-        for worker_id, total_hours in worker_weekly_hours.items():
+        # Check against worker-specific limits, one Monday-Sunday week at a time
+        for worker_id, timeline in self._worker_timelines(roster_data).items():
             worker_name = self._get_worker_name(worker_id)
             worker_data = self.workers.get(str(worker_id), {})
             max_hours = worker_data.get('max_hours', self.config['max_weekly_hours'])
             
-            if total_hours > max_hours:
-                self.errors.append(
-                    f"❌ WEEKLY LIMIT EXCEEDED: {worker_name} has {total_hours:.1f}h "
-                    f"(max: {max_hours}h)"
-                )
+            for week, total_hours in timeline.weekly_hours.items():
+                if total_hours > max_hours:
+                    self._report(
+                        'errors', [shift.shift_id for shift in timeline.week_shifts(week)],
+                        f"❌ WEEKLY LIMIT EXCEEDED: {worker_name} has {total_hours:.1f}h "
+                        f"{timeline.week_label(week)}(max: {max_hours}h)"
+                    )
     
     def check_overnight_staffing(self, roster_data: Dict[str, Any]):
         """
@@ -316,8 +244,8 @@ class EnhancedValidationService:
         for p_code, dates in roster_data.get('data', {}).items():
             for date, shifts in dates.items():
                 for shift in shifts:
-                    start_hour = int(shift['startTime'].split(':')[0])
-                    end_hour = int(shift['endTime'].split(':')[0])
+                    start_hour = hour_of(shift['startTime'])
+                    end_hour = hour_of(shift['endTime'])
                     
                     # Check if this is an overnight shift
                     is_overnight = (
@@ -331,7 +259,8 @@ class EnhancedValidationService:
                         workers = shift.get('workers', [])
                         
                         if ratio == '2:1' and len(workers) < 2:
-                            self.warnings.append(
+                            self._report(
+                                'warnings', (shift.get('id'),),
                                 f"⚠️ OVERNIGHT UNDERSTAFFED: {p_code} {date} "
                                 f"{shift['startTime']}-{shift['endTime']} needs 2:1 ratio "
                                 f"(currently {len(workers)} worker(s))"
@@ -340,24 +269,52 @@ class EnhancedValidationService:
     def check_availability_compliance(self, roster_data: Dict[str, Any]):
         """
         Check if shifts comply with worker availability rules
+
+        Shifts on a worker's unavailability periods are errors; shifts outside
+        their weekly availability (to 15-minute slot precision) are warnings.
+        Workers without compiled availability are taken as always available.
         """
-        for p_code, dates in roster_data.get('data', {}).items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    for worker_id in shift.get('workers', []):
-                        worker_data = self.workers.get(str(worker_id), {})
-                        if not worker_data:
-                            continue
-                        
-                        # Check if worker is available on this day/time
-                        # This would integrate with the availability system
-                        # For now, just log that we're checking
-                        pass
+        if self.availability is None:
+            return
+        
+        for worker_id, timeline in self._worker_timelines(roster_data).items():
+            availability = self.availability.get(worker_id)
+            if availability is None:
+                continue
+            worker_name = self._get_worker_name(worker_id)
+            
+            for shift in timeline.shifts:
+                # A shift ending exactly at midnight doesn't touch the next date
+                last_day = (shift.abs_end - 1) // MINUTES_PER_DAY
+                period = availability.unavailable_period(shift.day, last_day)
+                if period is not None:
+                    self._report(
+                        'errors', (shift.shift_id,),
+                        f"❌ UNAVAILABLE: {worker_name} is unavailable ({period[2]}) on {shift.date} "
+                        f"for {shift.participant} ({shift.shift_time})"
+                    )
+                elif not availability.covers(shift.day, shift.start, shift.abs_end - shift.day * MINUTES_PER_DAY):
+                    self._report(
+                        'warnings', (shift.shift_id,),
+                        f"⚠️ OUTSIDE AVAILABILITY: {worker_name} is rostered on {shift.date} "
+                        f"for {shift.participant} ({shift.shift_time}) outside their availability"
+                    )
+    
+    def _report(self, level: str, shift_ids: Iterable[Any], message: str):
+        """Add a finding to ``errors``, ``warnings`` or ``info``, noting which shifts it concerns"""
+        getattr(self, level).append(message)
+        self.attributions.append((level, message, tuple(shift_ids)))
+    
+    def _worker_timelines(self, roster_data: Dict[str, Any]) -> Dict[Any, WorkerTimeline]:
+        """Per-worker timelines of ``roster_data``, built once and shared by every rule"""
+        if roster_data is not self._timeline_source:
+            self._timelines = build_timelines(roster_data.get('data', {}))
+            self._timeline_source = roster_data
+        return self._timelines
     
     def _time_to_minutes(self, time_str: str) -> int:
         """Convert HH:MM to minutes since midnight"""
-        h, m = map(int, time_str.split(':'))
-        return h * 60 + m
+        return time_to_minutes(time_str)
     
     def _minutes_to_time(self, minutes: int) -> str:
         """Convert minutes since midnight to HH:MM"""
@@ -391,7 +348,8 @@ class EnhancedValidationService:
         return self.config.copy()
 
 
-def validate_roster_data_enhanced(roster_data: dict, workers: dict, config: dict = None) -> dict:
+def validate_roster_data_enhanced(roster_data: dict, workers: dict, config: dict = None,
+                                  availability: Optional[AvailabilityIndex] = None) -> dict:
     """
     Enhanced main validation function
     
@@ -399,9 +357,10 @@ def validate_roster_data_enhanced(roster_data: dict, workers: dict, config: dict
         roster_data: The roster data to validate
         workers: Worker data for validation
         config: Optional validation configuration
+        availability: Optional compiled worker availability
         
     Returns:
         Dict with validation results
     """
-    validator = EnhancedValidationService(workers, config)
+    validator = EnhancedValidationService(workers, config, availability)
     return validator.validate_roster_data(roster_data)
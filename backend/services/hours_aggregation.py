@@ -0,0 +1,118 @@
+"""
+Vectorized hour totals per worker, day and week
+
+Daily and weekly limit checks and hours reports all sum shift durations by
+worker and by day or week. HoursTable holds one (worker, day, duration) row
+per worker on each shift as NumPy arrays and computes every grouping with a
+single unique/bincount pass, so validating several weeks across all
+locations doesn't mean one Python dict update per shift per worker per rule.
+"""
+from typing import Dict, List, Any, Iterable, Mapping, Sequence
+from datetime import date as date_type
+
+import numpy as np
+
+
+def week_start(day):
+    """Ordinal of the Monday on or before a date ordinal (or an array of them)"""
+    # Ordinal 1 (0001-01-01) is a Monday
+    return day - (day - 1) % 7
+
+
+class HoursTable:
+    """Shift hours as (worker, day, duration) rows with grouped sums"""
+
+    def __init__(self, workers: Sequence[Any], days: Sequence[int], durations: Sequence[float]):
+        """
+        Args:
+            workers: Worker ID per row, as they appear on shifts
+            days: Date ordinal per row
+            durations: Hours per row
+        """
+        codes: Dict[Any, int] = {}
+        self.worker_ids: List[Any] = []
+        worker_codes = np.empty(len(workers), dtype=np.int64)
+        for i, worker_id in enumerate(workers):
+            code = codes.get(worker_id)
+            if code is None:
+                code = codes[worker_id] = len(self.worker_ids)
+                self.worker_ids.append(worker_id)
+            worker_codes[i] = code
+        self.workers = worker_codes
+        self.days = np.asarray(days, dtype=np.int64)
+        self.durations = np.asarray(durations, dtype=np.float64)
+
+    @classmethod
+    def from_timelines(cls, timelines: Mapping[Any, Any]) -> 'HoursTable':
+        """Rows from build_timelines output"""
+        workers: List[Any] = []
+        days: List[int] = []
+        durations: List[float] = []
+        for worker_id, timeline in timelines.items():
+            for shift in timeline.shifts:
+                workers.append(worker_id)
+                days.append(shift.day)
+                durations.append(shift.duration)
+        return cls(workers, days, durations)
+
+    @classmethod
+    def from_shifts(cls, shifts: Iterable[Dict[str, Any]]) -> 'HoursTable':
+        """
+        Rows from flat shift records with 'workers', 'duration' and an optional 'date'
+
+        Shifts without a parseable date all fall on day 0; per-worker totals
+        are still correct.
+        """
+        workers: List[Any] = []
+        days: List[int] = []
+        durations: List[float] = []
+        for shift in shifts:
+            shift_date = shift.get('date')
+            if isinstance(shift_date, date_type):
+                day = shift_date.toordinal()
+            else:
+                try:
+                    day = date_type.fromisoformat(shift_date[:10]).toordinal()
+                except (TypeError, ValueError):
+                    day = 0
+            duration = float(shift.get('duration', 0))
+            for worker_id in shift.get('workers', []):
+                workers.append(worker_id)
+                days.append(day)
+                durations.append(duration)
+        return cls(workers, days, durations)
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def _grouped(self, keys: np.ndarray) -> Dict[Any, Dict[int, float]]:
+        # One combined (worker, key) code per row, then a single weighted bincount
+        if not len(self.durations):
+            return {}
+        low = keys.min()
+        span = int(keys.max() - low) + 1
+        combined = self.workers * span + (keys - low)
+        groups, inverse = np.unique(combined, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.durations)
+        result: Dict[Any, Dict[int, float]] = {}
+        for group, total in zip(groups.tolist(), sums.tolist()):
+            worker_code, offset = divmod(group, span)
+            result.setdefault(self.worker_ids[worker_code], {})[int(low) + offset] = total
+        return result
+
+    def daily(self) -> Dict[Any, Dict[int, float]]:
+        """{worker_id: {date ordinal: hours}}"""
+        return self._grouped(self.days)
+
+    def weekly(self) -> Dict[Any, Dict[int, float]]:
+        """{worker_id: {Monday ordinal: hours}}"""
+        return self._grouped(week_start(self.days))
+
+    def totals(self) -> Dict[Any, float]:
+        """{worker_id: hours}"""
+        sums = np.bincount(self.workers, weights=self.durations, minlength=len(self.worker_ids))
+        return dict(zip(self.worker_ids, sums.tolist()))
+
+    def total(self) -> float:
+        return float(self.durations.sum())
+
@@ -0,0 +1,266 @@
+"""
+Incremental roster validation
+
+Every EnhancedValidationService rule is either per-worker (conflicts, rest,
+continuous and weekly hours, availability) or per-shift (overnight staffing).
+IncrementalValidator keeps each section's rule output split by worker and by
+participant/date cell, so after a save only the workers and cells touched by
+the diff are re-evaluated and merged with the cached output for the rest.
+"""
+from typing import Dict, List, Any, Optional, Set, Iterable, Tuple
+import threading
+import logging
+import json
+
+from .enhanced_validation_service import EnhancedValidationService
+from .worker_availability import AvailabilityIndex
+from .roster_index import RosterIndex, Cell, resolve
+
+logger = logging.getLogger(__name__)
+
+# Rules that only look at one worker's shifts, in EnhancedValidationService order
+WORKER_RULES = (
+    'check_worker_conflicts',
+    'check_rest_periods',
+    'check_continuous_hours',
+    'check_weekly_limits',
+    'check_availability_compliance',
+)
+
+# Rules that only look at one shift at a time
+SHIFT_RULES = (
+    'check_overnight_staffing',
+)
+
+# (errors, warnings, info) produced by one rule
+Findings = Tuple[List[str], List[str], List[str]]
+
+
+def workers_in_cells(data: Optional[Dict[str, Any]], cells: Iterable[Cell]) -> Set[str]:
+    """IDs of every worker on a shift in the given participant/date cells"""
+    workers = set()
+    for participant, date in cells:
+        dates = (data or {}).get(participant)
+        shifts = dates.get(date) if isinstance(dates, dict) else None
+        for shift in shifts if isinstance(shifts, list) else []:
+            if isinstance(shift, dict):
+                workers.update(str(w) for w in shift.get('workers', []) or [])
+    return workers
+
+
+class _SectionResults:
+    """Cached rule output for one section, split by worker and by cell"""
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.by_worker: Dict[str, Dict[str, Findings]] = {}
+        self.by_cell: Dict[Cell, Dict[str, Findings]] = {}
+        # Changes saved since the last validation
+        self.dirty_cells: Set[Cell] = set()
+        self.dirty_workers: Set[str] = set()
+
+
+class IncrementalValidator:
+    """
+    Section validation that re-runs rules only for what saves changed
+
+    Saves report the cells they touched through ``mark_changed``; the next
+    ``validate`` re-evaluates the workers on those cells (before and after the
+    change) and the cells themselves. The merged result has the same shape as
+    EnhancedValidationService.validate_roster_data. Cached output is thrown
+    away whenever the worker details, the validation config or the compiled
+    worker availability change.
+    """
+
+    def __init__(self):
+        self._sections: Dict[str, _SectionResults] = {}
+        self._lock = threading.RLock()
+
+    def mark_changed(self, key: str, cells: Optional[Set[Cell]],
+                     previous_data: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record a saved change to a section
+
+        Args:
+            key: Roster section name
+            cells: Changed (participant, date) cells, or None if the whole section changed
+            previous_data: The section's data before the change, to find
+                           workers removed from the changed cells
+        """
+        with self._lock:
+            results = self._sections.get(key)
+            if results is None:
+                return
+            if cells is None:
+                del self._sections[key]
+                return
+            results.dirty_cells.update(cells)
+            results.dirty_workers.update(workers_in_cells(previous_data, cells))
+
+    def validate(self, key: str, data: Dict[str, Any], index: RosterIndex,
+                 workers: Dict[str, Any], config: Dict[str, Any],
+                 availability: Optional[AvailabilityIndex] = None) -> Dict[str, Any]:
+        """
+        Validate a section, reusing cached output for untouched workers and cells
+
+        Args:
+            key: Roster section name (roster, roster_next, ...)
+            data: The section's {participant_code: {date: [shifts]}}
+            index: RosterIndex kept in sync with ``data``
+            workers: {worker_id: worker} used for names and hour limits
+            config: Validation configuration
+            availability: Compiled worker availability, if availability is checked
+
+        Returns:
+            Dict with valid, errors, warnings, info and summary
+        """
+        fingerprint = _fingerprint(workers, config, availability)
+        with self._lock:
+            results = self._sections.get(key)
+            try:
+                if results is None or results.fingerprint != fingerprint:
+                    results = _SectionResults(fingerprint)
+                    changed_workers = set(index.by_worker)
+                    changed_cells = {
+                        (participant, date)
+                        for participant, dates in data.items() if isinstance(dates, dict)
+                        for date in dates
+                    }
+                else:
+                    changed_cells = results.dirty_cells
+                    changed_workers = results.dirty_workers | workers_in_cells(data, changed_cells)
+                service = EnhancedValidationService(workers, config, availability)
+                for worker_id in changed_workers:
+                    self._validate_worker(service, results, data, index, worker_id)
+                for cell in changed_cells:
+                    self._validate_cell(service, results, data, cell)
+            except Exception:
+                # Never keep a half-updated cache around
+                self._sections.pop(key, None)
+                raise
+            logger.info(
+                f"Revalidated {key}: {len(changed_workers)} workers, {len(changed_cells)} cells"
+            )
+            results.dirty_cells = set()
+            results.dirty_workers = set()
+            self._sections[key] = results
+            return _merge(results, config)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop cached output for one section, or for all of them"""
+        with self._lock:
+            if key is None:
+                self._sections.clear()
+            else:
+                self._sections.pop(key, None)
+
+    def _validate_worker(self, service: EnhancedValidationService, results: _SectionResults,
+                         data: Dict[str, Any], index: RosterIndex, worker_id: str) -> None:
+        findings = worker_findings(service, data, index, worker_id)
+        if findings is None:
+            results.by_worker.pop(worker_id, None)
+        else:
+            results.by_worker[worker_id] = findings
+
+    def _validate_cell(self, service: EnhancedValidationService, results: _SectionResults,
+                       data: Dict[str, Any], cell: Cell) -> None:
+        findings = cell_findings(service, data, cell)
+        if findings is None:
+            results.by_cell.pop(cell, None)
+        else:
+            results.by_cell[cell] = findings
+
+
+def worker_findings(service: EnhancedValidationService, data: Dict[str, Any],
+                    index: RosterIndex, worker_id: str) -> Optional[Dict[str, Findings]]:
+    """WORKER_RULES output for one worker's shifts, or None if they have none"""
+    roster_data = worker_roster(data, index, worker_id)
+    if roster_data is None:
+        return None
+    return _run_rules(service, WORKER_RULES, roster_data)
+
+
+def worker_roster(data: Dict[str, Any], index: RosterIndex, worker_id: str) -> Optional[Dict[str, Any]]:
+    """Roster data of one worker's shifts, each listing only that worker, or None if they have none"""
+    sub_data: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for location in index.worker_locations(worker_id):
+        shift = resolve(data, location)
+        if shift is None:
+            continue
+        own = [w for w in shift.get('workers', []) if str(w) == worker_id]
+        sub_data.setdefault(location.participant, {}).setdefault(location.date, []).append(
+            dict(shift, workers=own)
+        )
+    if not sub_data:
+        return None
+    return {'data': sub_data}
+
+
+def cell_findings(service: EnhancedValidationService, data: Dict[str, Any],
+                  cell: Cell) -> Optional[Dict[str, Findings]]:
+    """SHIFT_RULES output for one participant/date cell, or None if it is empty"""
+    participant, date = cell
+    dates = data.get(participant)
+    shifts = dates.get(date) if isinstance(dates, dict) else None
+    if not isinstance(shifts, list) or not shifts:
+        return None
+    return _run_rules(service, SHIFT_RULES, {'data': {participant: {date: shifts}}})
+
+
+def _run_rules(service: EnhancedValidationService, rules: Iterable[str],
+               roster_data: Dict[str, Any]) -> Dict[str, Findings]:
+    findings = {}
+    for rule in rules:
+        service.errors, service.warnings, service.info, service.attributions = [], [], [], []
+        getattr(service, rule)(roster_data)
+        findings[rule] = (service.errors, service.warnings, service.info)
+    return findings
+
+
+def _merge(results: _SectionResults, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine cached findings rule by rule, like a single full validation pass"""
+    errors: List[str] = []
+    warnings: List[str] = []
+    info: List[str] = []
+    groups = [
+        (WORKER_RULES, [results.by_worker[w] for w in sorted(results.by_worker)]),
+        (SHIFT_RULES, [results.by_cell[c] for c in sorted(results.by_cell)]),
+    ]
+    for rules, cached in groups:
+        for rule in rules:
+            for findings in cached:
+                rule_errors, rule_warnings, rule_info = findings.get(rule, ([], [], []))
+                errors.extend(rule_errors)
+                warnings.extend(rule_warnings)
+                info.extend(rule_info)
+    return {
+        'valid': len(errors) == 0,
+        'errors': errors,
+        'warnings': warnings,
+        'info': info,
+        'summary': {
+            'total_errors': len(errors),
+            'total_warnings': len(warnings),
+            'total_info': len(info),
+            'is_valid': len(errors) == 0,
+            'has_warnings': len(warnings) > 0,
+            'config_used': config
+        }
+    }
+
+
+def _fingerprint(workers: Dict[str, Any], config: Dict[str, Any],
+                 availability: Optional[AvailabilityIndex] = None) -> str:
+    availability_fingerprint = availability.fingerprint if availability is not None else None
+    return json.dumps([workers, config, availability_fingerprint], sort_keys=True, default=str)
+
+
+# Global instance
+_incremental_validator = None
+
+def get_incremental_validator() -> IncrementalValidator:
+    """Get the global incremental validator instance"""
+    global _incremental_validator
+    if _incremental_validator is None:
+        _incremental_validator = IncrementalValidator()
+    return _incremental_validator
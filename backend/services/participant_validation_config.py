@@ -1,13 +1,18 @@
 """
 Per-participant validation configuration for customized break times and rules
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Union, Callable
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import json
 import logging
+import os
+import threading
 from enum import Enum
 
+from .worker_timeline import WorkerShift, hour_of, worker_shift
+from .shift_conflicts import ScheduleIndex
+
 logger = logging.getLogger(__name__)
 
 class ParticipantValidationLevel(Enum):
@@ -62,23 +67,181 @@ class ParticipantValidationConfig:
         if not self.updated_at:
             self.updated_at = datetime.now().isoformat()
 
+# A check sees the shift dict, the shift placed on the timeline (None if it
+# has no usable date/times), the worker's schedule and the id to ignore there
+ParticipantCheck = Callable[[Dict[str, Any], Optional[WorkerShift], ScheduleIndex, Optional[str]],
+                            Optional[Dict[str, Any]]]
+
+class ParticipantRules:
+    """A participant's configuration compiled into the checks it enables"""
+    
+    def __init__(self, config: ParticipantValidationConfig):
+        self.config = config
+        self.participant_id = config.participant_id
+        checks: List[ParticipantCheck] = [self._check_rest, self._check_continuous_hours, self._check_daily_hours]
+        if config.requires_meal_break:
+            checks.append(self._check_meal_break)
+        if not config.allow_split_shifts:
+            checks.append(self._check_split_shift)
+        if config.requires_2_1_ratio:
+            checks.append(self._check_ratio)
+        if config.overnight_restriction:
+            checks.append(self._check_overnight)
+        if config.weekend_restriction:
+            checks.append(self._check_weekend)
+        self.checks: Tuple[ParticipantCheck, ...] = tuple(checks)
+    
+    def validate(self, shift_data: Dict[str, Any], schedule: ScheduleIndex) -> List[Dict[str, Any]]:
+        """Run every enabled check on a shift against the worker's schedule"""
+        try:
+            shift = worker_shift(shift_data.get('participant', self.participant_id), shift_data['date'], shift_data)
+        except (KeyError, TypeError, ValueError):
+            shift = None
+        exclude = shift_data.get('id')
+        results = []
+        for check in self.checks:
+            result = check(shift_data, shift, schedule, exclude)
+            if result is not None:
+                results.append(result)
+        return results
+    
+    def _result(self, severity: str, field: str, message: str) -> Dict[str, Any]:
+        return {
+            'type': severity,
+            'field': field,
+            'message': message,
+            'participant_id': self.participant_id,
+            'severity': severity
+        }
+    
+    def _check_rest(self, shift_data, shift, schedule, exclude):
+        """Rest since the worker's previous shift ended"""
+        if shift is None:
+            return None
+        previous = schedule.previous(shift.abs_start, exclude)
+        if previous is None:
+            return None
+        # The gaps inside a split shift are not rest periods
+        if shift.is_split_shift and previous.participant == shift.participant and previous.day == shift.day:
+            return None
+        gap = shift.abs_start - previous.abs_end
+        # Overlaps are conflicts and back-to-back shifts one continuous run; both are checked elsewhere
+        if gap <= 0:
+            return None
+        rest_hours = gap / 60
+        if rest_hours < self.config.min_rest_hours:
+            return self._result('error', 'rest_period',
+                                f"Insufficient rest: {rest_hours:.1f}h (minimum: {self.config.min_rest_hours}h)")
+        return None
+    
+    def _check_continuous_hours(self, shift_data, shift, schedule, exclude):
+        if shift is None:
+            return None
+        total_continuous_hours = schedule.continuous_run(shift, exclude)[0]
+        if total_continuous_hours > self.config.max_continuous_hours:
+            return self._result('warning', 'continuous_hours',
+                                f"Excessive continuous work: {total_continuous_hours:.1f}h "
+                                f"(max: {self.config.max_continuous_hours}h)")
+        return None
+    
+    def _check_daily_hours(self, shift_data, shift, schedule, exclude):
+        if shift is None:
+            return None
+        daily_hours = schedule.day_hours(shift.day, exclude) + shift.duration
+        if daily_hours > self.config.max_daily_hours:
+            return self._result('error', 'daily_hours',
+                                f"Daily limit exceeded: {daily_hours:.1f}h (max: {self.config.max_daily_hours}h)")
+        return None
+    
+    def _check_meal_break(self, shift_data, shift, schedule, exclude):
+        """
+        Long stretches of work need a break of at least the break duration
+
+        Only shifts that record their break (``break_minutes``) are checked:
+        a shift's hours otherwise cover its whole span, which says nothing
+        about breaks taken. The stretch is the shift's run of back-to-back
+        shifts.
+        """
+        try:
+            break_hours = float(shift_data['break_minutes']) / 60
+        except (KeyError, TypeError, ValueError):
+            return None
+        if shift is not None:
+            hours = schedule.continuous_run(shift, exclude)[0]
+        else:
+            hours = float(shift_data.get('duration', 0))
+        if hours <= self.config.meal_break_after_hours or break_hours >= self.config.meal_break_duration:
+            return None
+        return self._result('warning', 'meal_break',
+                            f"Meal break required for shifts over {self.config.meal_break_after_hours}h")
+    
+    def _check_split_shift(self, shift_data, shift, schedule, exclude):
+        if shift_data.get('is_split_shift', False):
+            return self._result('error', 'split_shifts', "Split shifts not allowed for this participant")
+        return None
+    
+    def _check_ratio(self, shift_data, shift, schedule, exclude):
+        if shift_data.get('ratio') != '2:1':
+            return self._result('error', 'ratio', "2:1 ratio required for this participant")
+        return None
+    
+    def _check_overnight(self, shift_data, shift, schedule, exclude):
+        start_hour = hour_of(shift_data.get('startTime', '00:00'))
+        end_hour = hour_of(shift_data.get('endTime', '00:00'))
+        if start_hour >= 22 or end_hour <= 6 or start_hour > end_hour:
+            return self._result('error', 'overnight', "Overnight shifts not allowed for this participant")
+        return None
+    
+    def _check_weekend(self, shift_data, shift, schedule, exclude):
+        # Ordinal 1 (0001-01-01) is a Monday
+        if shift is not None and (shift.day - 1) % 7 >= 5:
+            return self._result('error', 'weekend', "Weekend shifts not allowed for this participant")
+        return None
+
 class ParticipantValidationManager:
     """Manages per-participant validation configurations"""
     
     def __init__(self, config_file: Optional[str] = None):
         self.configs: Dict[str, ParticipantValidationConfig] = {}
         self.config_file = config_file or "participant_validation_config.json"
+        self._rules: Dict[str, ParticipantRules] = {}
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._reload_lock = threading.Lock()
         self._load_configs_from_file()
     
+    def _stat_config_file(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of the config file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def refresh(self) -> bool:
+        """Reload configurations if the file changed since it was last loaded or saved"""
+        state = self._stat_config_file()
+        if state is None or state == self._file_state:
+            return False
+        with self._reload_lock:
+            if state == self._file_state:
+                return False
+            self._load_configs_from_file()
+        return True
+    
     def _load_configs_from_file(self):
         """Load participant configurations from file"""
+        # Recorded even if loading fails, so a bad file is retried only once it changes
+        self._file_state = self._stat_config_file()
         try:
             with open(self.config_file, 'r') as f:
                 data = json.load(f)
             
+            configs = {}
             for config_data in data.get('configs', []):
                 config = ParticipantValidationConfig(**config_data)
-                self.configs[config.participant_id] = config
+                configs[config.participant_id] = config
+            self.configs = configs
+            self._rules = {}
             
             logger.info(f"Loaded {len(self.configs)} participant validation configurations")
         except FileNotFoundError:
@@ -96,6 +259,7 @@ class ParticipantValidationManager:
             
             with open(self.config_file, 'w') as f:
                 json.dump(data, f, indent=2, default=str)
+            self._file_state = self._stat_config_file()
             
             logger.info(f"Saved {len(self.configs)} participant configurations")
         except Exception as e:
@@ -103,6 +267,7 @@ class ParticipantValidationManager:
     
     def get_config(self, participant_id: str) -> Optional[ParticipantValidationConfig]:
         """Get validation configuration for a participant"""
+        self.refresh()
         return self.configs.get(participant_id)
     
     def get_or_create_config(self, participant_id: str, participant_name: str = "") -> ParticipantValidationConfig:
@@ -141,6 +306,7 @@ class ParticipantValidationManager:
         
         config.updated_at = datetime.now().isoformat()
         self.configs[config.participant_id] = config
+        self._rules.pop(config.participant_id, None)
         logger.info(f"Updated validation config for participant {config.participant_id}")
         return True
     
@@ -151,6 +317,7 @@ class ParticipantValidationManager:
             return False
         
         config = self.configs.pop(participant_id)
+        self._rules.pop(participant_id, None)
         logger.info(f"Deleted validation config for participant {participant_id}")
         return True
     
@@ -225,149 +392,37 @@ class ParticipantValidationManager:
             'notes': config.notes
         }
     
-    def validate_participant_shift(self, participant_id: str, shift_data: Dict[str, Any], 
-                                 worker_schedule: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Validate a shift for a specific participant using their custom rules"""
+    def get_rules(self, participant_id: str) -> 'ParticipantRules':
+        """Compiled rules for a participant, rebuilt only when their config changes"""
         config = self.get_or_create_config(participant_id)
-        validation_results = []
-        
-        # Check rest periods
-        if worker_schedule:
-            last_shift = worker_schedule[-1]
-            rest_hours = self._calculate_rest_hours(last_shift, shift_data)
-            
-            if rest_hours < config.min_rest_hours:
-                validation_results.append({
-                    'type': 'error',
-                    'field': 'rest_period',
-                    'message': f"Insufficient rest: {rest_hours:.1f}h (minimum: {config.min_rest_hours}h)",
-                    'participant_id': participant_id,
-                    'severity': 'error'
-                })
-        
-        # Check continuous hours
-        total_continuous_hours = self._calculate_continuous_hours(worker_schedule, shift_data)
-        if total_continuous_hours > config.max_continuous_hours:
-            validation_results.append({
-                'type': 'warning',
-                'field': 'continuous_hours',
-                'message': f"Excessive continuous work: {total_continuous_hours:.1f}h (max: {config.max_continuous_hours}h)",
-                'participant_id': participant_id,
-                'severity': 'warning'
-            })
-        
-        # Check daily hours
-        daily_hours = self._calculate_daily_hours(worker_schedule, shift_data)
-        if daily_hours > config.max_daily_hours:
-            validation_results.append({
-                'type': 'error',
-                'field': 'daily_hours',
-                'message': f"Daily limit exceeded: {daily_hours:.1f}h (max: {config.max_daily_hours}h)",
-                'participant_id': participant_id,
-                'severity': 'error'
-            })
-        
-        # Check meal break requirements
-        if config.requires_meal_break:
-            shift_duration = shift_data.get('duration', 0)
-            if shift_duration > config.meal_break_after_hours:
-                if not self._has_meal_break(worker_schedule, shift_data, config.meal_break_duration):
-                    validation_results.append({
-                        'type': 'warning',
-                        'field': 'meal_break',
-                        'message': f"Meal break required for shifts over {config.meal_break_after_hours}h",
-                        'participant_id': participant_id,
-                        'severity': 'warning'
-                    })
-        
-        # Check split shift restrictions
-        if not config.allow_split_shifts and self._is_split_shift(worker_schedule, shift_data):
-            validation_results.append({
-                'type': 'error',
-                'field': 'split_shifts',
-                'message': "Split shifts not allowed for this participant",
-                'participant_id': participant_id,
-                'severity': 'error'
-            })
-        
-        # Check special requirements
-        if config.requires_2_1_ratio and shift_data.get('ratio') != '2:1':
-            validation_results.append({
-                'type': 'error',
-                'field': 'ratio',
-                'message': "2:1 ratio required for this participant",
-                'participant_id': participant_id,
-                'severity': 'error'
-            })
-        
-        # Check overnight restrictions
-        if config.overnight_restriction and self._is_overnight_shift(shift_data):
-            validation_results.append({
-                'type': 'error',
-                'field': 'overnight',
-                'message': "Overnight shifts not allowed for this participant",
-                'participant_id': participant_id,
-                'severity': 'error'
-            })
-        
-        # Check weekend restrictions
-        if config.weekend_restriction and self._is_weekend_shift(shift_data):
-            validation_results.append({
-                'type': 'error',
-                'field': 'weekend',
-                'message': "Weekend shifts not allowed for this participant",
-                'participant_id': participant_id,
-                'severity': 'error'
-            })
-        
-        return validation_results
-    
-    def _calculate_rest_hours(self, last_shift: Dict[str, Any], current_shift: Dict[str, Any]) -> float:
-        """Calculate rest hours between shifts"""
-        # Implementation would depend on shift data structure
-        # This is a simplified version
-        return 8.0  # Placeholder
-    
-    def _calculate_continuous_hours(self, worker_schedule: List[Dict[str, Any]], 
-                                  current_shift: Dict[str, Any]) -> float:
-        """Calculate total continuous work hours"""
-        # Implementation would calculate continuous hours
-        return 0.0  # Placeholder
-    
-    def _calculate_daily_hours(self, worker_schedule: List[Dict[str, Any]], 
-                             current_shift: Dict[str, Any]) -> float:
-        """Calculate total hours for the day"""
-        # Implementation would calculate daily hours
-        return 0.0  # Placeholder
-    
-    def _has_meal_break(self, worker_schedule: List[Dict[str, Any]], 
-                       current_shift: Dict[str, Any], required_duration: float) -> bool:
-        """Check if meal break is scheduled"""
-        # Implementation would check for meal breaks
-        return True  # Placeholder
-    
-    def _is_split_shift(self, worker_schedule: List[Dict[str, Any]], 
-                       current_shift: Dict[str, Any]) -> bool:
-        """Check if this is a split shift"""
-        return current_shift.get('is_split_shift', False)
-    
-    def _is_overnight_shift(self, shift_data: Dict[str, Any]) -> bool:
-        """Check if this is an overnight shift"""
-        start_hour = int(shift_data.get('startTime', '00:00').split(':')[0])
-        end_hour = int(shift_data.get('endTime', '00:00').split(':')[0])
-        return start_hour >= 22 or end_hour <= 6 or start_hour > end_hour
-    
-    def _is_weekend_shift(self, shift_data: Dict[str, Any]) -> bool:
-        """Check if this is a weekend shift"""
-        # Implementation would check the date
-        return False  # Placeholder
+        rules = self._rules.get(participant_id)
+        if rules is None or rules.config is not config:
+            rules = self._rules[participant_id] = ParticipantRules(config)
+        return rules
+    
+    def validate_participant_shift(self, participant_id: str, shift_data: Dict[str, Any], 
+                                 worker_schedule: Union[ScheduleIndex, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Validate a shift for a specific participant using their custom rules
+
+        Args:
+            shift_data: The shift, with date, startTime, endTime and duration
+            worker_schedule: The worker's other shifts, as a ScheduleIndex or a
+                list of shift dicts (with dates). The shift itself is ignored
+                there if present (same id).
+        """
+        if not isinstance(worker_schedule, ScheduleIndex):
+            worker_schedule = ScheduleIndex.from_dicts(worker_schedule or [])
+        return self.get_rules(participant_id).validate(shift_data, worker_schedule)
     
     def get_all_configs(self) -> List[ParticipantValidationConfig]:
         """Get all participant configurations"""
+        self.refresh()
         return list(self.configs.values())
     
     def search_configs(self, query: str) -> List[ParticipantValidationConfig]:
         """Search configurations by participant name or ID"""
+        self.refresh()
         query_lower = query.lower()
         return [
             config for config in self.configs.values()
@@ -380,7 +435,12 @@ class ParticipantValidationManager:
 _participant_validation_manager = None
 
 def get_participant_validation_manager() -> ParticipantValidationManager:
-    """Get the global participant validation manager instance"""
+    """
+    Get the global participant validation manager instance
+
+    Shared by the API and batch validation; it reloads the config file
+    whenever the file's modification time changes.
+    """
     global _participant_validation_manager
     if _participant_validation_manager is None:
         _participant_validation_manager = ParticipantValidationManager()
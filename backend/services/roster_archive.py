@@ -0,0 +1,133 @@
+"""
+Compressed archive of past roster weeks
+
+Every week that leaves the live roster (at the week transition) is written
+as one gzip-compressed JSON record named after its Monday, e.g.
+2025-10-20.json.gz. Date-range queries open only the weeks overlapping the
+range, so history can grow for years without slowing down recent lookups.
+"""
+from typing import Dict, Any, List, Optional
+from datetime import date, timedelta
+from pathlib import Path
+import gzip
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIX = '.json.gz'
+
+# Longest range one query may cover
+MAX_QUERY_DAYS = 366
+
+
+def _monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class RosterArchive:
+    """One compressed record per archived week, keyed by its Monday"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def _path(self, monday: date) -> Path:
+        return self.directory / f"{monday.isoformat()}{ARCHIVE_SUFFIX}"
+
+    def archive(self, section: Dict[str, Any]) -> Optional[date]:
+        """
+        Store a roster section as the record for its week
+
+        Re-archiving a week replaces its record. Sections without a parseable
+        start_date or without shifts are skipped.
+
+        Returns:
+            The week's Monday, or None if nothing was written
+        """
+        if not isinstance(section, dict) or not section.get('data'):
+            return None
+        try:
+            monday = _monday(date.fromisoformat(section.get('start_date') or ''))
+        except ValueError:
+            logger.warning(f"Not archiving roster week without a valid start_date: {section.get('start_date')!r}")
+            return None
+        path = self._path(monday)
+        payload = json.dumps(section, separators=(',', ':')).encode()
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        logger.info(f"Archived roster week {monday.isoformat()} ({len(section['data'])} participants)")
+        return monday
+
+    def weeks(self) -> List[str]:
+        """Mondays (YYYY-MM-DD) of every archived week, oldest first"""
+        if not self.directory.exists():
+            return []
+        return sorted(
+            path.name[:-len(ARCHIVE_SUFFIX)]
+            for path in self.directory.iterdir()
+            if path.name.endswith(ARCHIVE_SUFFIX)
+        )
+
+    def get_week(self, monday: date) -> Optional[Dict[str, Any]]:
+        """The archived section for the week starting ``monday``, or None"""
+        path = self._path(_monday(monday))
+        try:
+            with gzip.open(path, 'rb') as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def query(self, start: date, end: date) -> Dict[str, Any]:
+        """
+        Shifts between ``start`` and ``end`` inclusive, across archived weeks
+
+        Returns:
+            {"start_date", "end_date", "weeks": [{"week_type", "start_date",
+            "end_date"}], "data": {participant_code: {date: [shifts]}}}
+
+        Raises:
+            ValueError: If the range is reversed or longer than MAX_QUERY_DAYS
+        """
+        if end < start:
+            raise ValueError("end_date is before start_date")
+        if (end - start).days >= MAX_QUERY_DAYS:
+            raise ValueError(f"Date range is limited to {MAX_QUERY_DAYS} days")
+        first, last = start.isoformat(), end.isoformat()
+        weeks = []
+        data: Dict[str, Dict[str, Any]] = {}
+        monday = _monday(start)
+        while monday <= end:
+            section = self.get_week(monday)
+            monday += timedelta(days=7)
+            if section is None:
+                continue
+            weeks.append({
+                'week_type': section.get('week_type'),
+                'start_date': section.get('start_date'),
+                'end_date': section.get('end_date')
+            })
+            for participant_code, dates in (section.get('data') or {}).items():
+                if not isinstance(dates, dict):
+                    continue
+                in_range = {d: shifts for d, shifts in dates.items() if first <= d <= last}
+                if in_range:
+                    data.setdefault(participant_code, {}).update(in_range)
+        return {'start_date': first, 'end_date': last, 'weeks': weeks, 'data': data}
+
+
+# Global archive
+_roster_archive = None
+
+def get_roster_archive() -> RosterArchive:
+    """Get the global roster archive over backend/roster_archive"""
+    global _roster_archive
+    if _roster_archive is None:
+        _roster_archive = RosterArchive(Path(__file__).resolve().parent.parent / 'roster_archive')
+    return _roster_archive
@@ -0,0 +1,159 @@
+"""
+Secondary indexes over a roster section
+
+RosterIndex maps worker -> shifts, date -> shifts and shift id -> location
+for one section's {participant_code: {date: [shifts]}} data. It is kept in
+sync incrementally from the journal operations of each save, so only the
+participant/date cells that changed are re-indexed.
+"""
+from typing import Dict, List, Any, Optional, Set, Tuple, NamedTuple, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[str, str]
+
+
+class ShiftLocation(NamedTuple):
+    """Where a shift lives inside a section's data"""
+    participant: str
+    date: str
+    position: int
+    shift_id: str
+
+
+def changed_cells(ops: List[Dict[str, Any]], old_data: Optional[Dict[str, Any]] = None,
+                  new_data: Optional[Dict[str, Any]] = None) -> Optional[Set[Cell]]:
+    """
+    Participant/date cells touched by journal operations on one section
+
+    Paths are relative to the store root: [section, 'data', participant, date].
+    A participant-level op expands to that participant's dates before and
+    after the change.
+
+    Returns:
+        Set of (participant, date), or None when the whole section must be re-indexed
+    """
+    cells: Set[Cell] = set()
+    for op in ops:
+        path = op['path']
+        if len(path) < 2:
+            return None
+        if path[1] != 'data':
+            continue
+        if len(path) == 2:
+            return None
+        participant = path[2]
+        if len(path) >= 4:
+            cells.add((participant, path[3]))
+            continue
+        for data in (old_data, new_data):
+            dates = (data or {}).get(participant)
+            if isinstance(dates, dict):
+                cells.update((participant, date) for date in dates)
+    return cells
+
+
+class RosterIndex:
+    """Worker, date and shift-id indexes for one roster section"""
+
+    def __init__(self):
+        self.by_worker: Dict[str, Set[ShiftLocation]] = {}
+        self.by_date: Dict[str, Set[ShiftLocation]] = {}
+        self.by_id: Dict[str, ShiftLocation] = {}
+        # What each cell contributed, so it can be removed without the old data
+        self._cells: Dict[Cell, List[Tuple[ShiftLocation, Tuple[str, ...]]]] = {}
+
+    @classmethod
+    def build(cls, data: Dict[str, Any]) -> 'RosterIndex':
+        """Index a whole section's data"""
+        index = cls()
+        for participant, dates in (data or {}).items():
+            if isinstance(dates, dict):
+                for date in dates:
+                    index._add_cell(data, (participant, date))
+        return index
+
+    def update(self, data: Dict[str, Any], cells: Iterable[Cell]) -> None:
+        """Re-index only the given cells against the section's current data"""
+        for cell in cells:
+            self._remove_cell(cell)
+            self._add_cell(data, cell)
+
+    def _add_cell(self, data: Dict[str, Any], cell: Cell) -> None:
+        participant, date = cell
+        dates = (data or {}).get(participant)
+        shifts = dates.get(date) if isinstance(dates, dict) else None
+        if not isinstance(shifts, list) or not shifts:
+            return
+        entries = []
+        for position, shift in enumerate(shifts):
+            if not isinstance(shift, dict):
+                continue
+            shift_id = str(shift.get('id') or f"{participant}/{date}/{position}")
+            location = ShiftLocation(participant, date, position, shift_id)
+            workers = tuple(str(w) for w in shift.get('workers', []) or [])
+            for worker_id in workers:
+                self.by_worker.setdefault(worker_id, set()).add(location)
+            self.by_date.setdefault(date, set()).add(location)
+            self.by_id[shift_id] = location
+            entries.append((location, workers))
+        self._cells[cell] = entries
+
+    def _remove_cell(self, cell: Cell) -> None:
+        for location, workers in self._cells.pop(cell, []):
+            for worker_id in workers:
+                _discard(self.by_worker, worker_id, location)
+            _discard(self.by_date, location.date, location)
+            if self.by_id.get(location.shift_id) == location:
+                del self.by_id[location.shift_id]
+
+    def locate(self, shift_id: str) -> Optional[ShiftLocation]:
+        """Location of a shift by id"""
+        return self.by_id.get(str(shift_id))
+
+    def worker_locations(self, worker_id: Any) -> List[ShiftLocation]:
+        """All shift locations for a worker, in date order"""
+        return sorted(self.by_worker.get(str(worker_id), ()), key=_location_order)
+
+    def date_locations(self, date: str) -> List[ShiftLocation]:
+        """All shift locations on a date"""
+        return sorted(self.by_date.get(date, ()), key=_location_order)
+
+    def workers_on(self, date: str) -> Set[str]:
+        """IDs of every worker rostered on a date"""
+        return {
+            worker_id
+            for location in self.by_date.get(date, ())
+            for worker_id in self._workers_at(location)
+        }
+
+    def dates(self) -> List[str]:
+        """Dates that have at least one shift, sorted"""
+        return sorted(self.by_date)
+
+    def _workers_at(self, location: ShiftLocation) -> Tuple[str, ...]:
+        for entry_location, workers in self._cells.get((location.participant, location.date), []):
+            if entry_location == location:
+                return workers
+        return ()
+
+
+def resolve(data: Dict[str, Any], location: ShiftLocation) -> Optional[Dict[str, Any]]:
+    """Fetch the shift dict a location points at"""
+    try:
+        return data[location.participant][location.date][location.position]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _location_order(location: ShiftLocation):
+    return (location.date, location.participant, location.position)
+
+
+def _discard(index: Dict[str, Set[ShiftLocation]], key: str, location: ShiftLocation) -> None:
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.discard(location)
+        if not bucket:
+            del index[key]
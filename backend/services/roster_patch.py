@@ -0,0 +1,159 @@
+"""
+Shift-level edits to a roster section
+
+Applies a batch of add / update / move / delete operations to a section's
+{participant_code: {date: [shifts]}} data, finding shifts through the
+section's RosterIndex. Only the participant/date cells an operation touches
+are read or rewritten, and a failed batch leaves the data as it was.
+"""
+from typing import Dict, List, Any, Set
+import logging
+import time
+import uuid
+
+from .roster_index import RosterIndex, Cell
+
+logger = logging.getLogger(__name__)
+
+SHIFT_OPERATIONS = ('add', 'update', 'move', 'delete')
+
+
+class ShiftPatchError(ValueError):
+    """An operation that can't be applied to the section"""
+
+    def __init__(self, message: str, not_found: bool = False):
+        super().__init__(message)
+        self.not_found = not_found
+
+
+class ShiftPatch:
+    """
+    One batch of shift operations against a section's data
+
+    Usage:
+        patch = ShiftPatch(data, index)
+        patch.apply(operations)   # raises ShiftPatchError and rolls back on failure
+        patch.cells               # cells to journal and revalidate
+        patch.previous_data       # those cells as they were before the batch
+    """
+
+    def __init__(self, data: Dict[str, Any], index: RosterIndex):
+        self.data = data
+        self.index = index
+        self.cells: Set[Cell] = set()
+        self.previous_data: Dict[str, Dict[str, Any]] = {}
+        self.applied: List[Dict[str, Any]] = []
+        self._created: Set[str] = set()
+
+    def apply(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply every operation in order, or none of them
+
+        Returns:
+            One {'op', 'id', 'participant', 'date'} entry per operation
+        """
+        try:
+            for number, operation in enumerate(operations, 1):
+                op = operation.get('op')
+                if op not in SHIFT_OPERATIONS:
+                    raise ShiftPatchError(f"Operation {number}: unknown op {op!r}")
+                self.applied.append(getattr(self, f'_{op}')(number, operation))
+        except Exception:
+            self._rollback()
+            raise
+        return self.applied
+
+    def _add(self, number: int, operation: Dict[str, Any]) -> Dict[str, Any]:
+        participant, date = self._target(number, operation)
+        shift = dict(operation.get('shift') or {})
+        shift_id = str(shift.get('id') or operation.get('id') or f"shift_{int(time.time() * 1000)}_{uuid.uuid4().hex[:9]}")
+        if self.index.locate(shift_id) is not None:
+            raise ShiftPatchError(f"Operation {number}: shift {shift_id} already exists")
+        shift['id'] = shift_id
+        shift['date'] = date
+        shifts = self._cell(participant, date, create=True)
+        position = operation.get('position')
+        shifts.insert(len(shifts) if position is None else int(position), shift)
+        self._reindex((participant, date))
+        return {'op': 'add', 'id': shift_id, 'participant': participant, 'date': date}
+
+    def _update(self, number: int, operation: Dict[str, Any]) -> Dict[str, Any]:
+        location, shifts = self._find(number, operation)
+        changes = {k: v for k, v in (operation.get('shift') or {}).items() if k not in ('id', 'date')}
+        shifts[location.position] = dict(shifts[location.position], **changes)
+        self._reindex((location.participant, location.date))
+        return {'op': 'update', 'id': location.shift_id, 'participant': location.participant, 'date': location.date}
+
+    def _move(self, number: int, operation: Dict[str, Any]) -> Dict[str, Any]:
+        location, shifts = self._find(number, operation)
+        participant = operation.get('participant') or location.participant
+        date = operation.get('date') or location.date
+        shift = shifts.pop(location.position)
+        self._reindex((location.participant, location.date))
+        shift = dict(shift, date=date, **{k: v for k, v in (operation.get('shift') or {}).items() if k not in ('id', 'date')})
+        target = self._cell(participant, date, create=True)
+        position = operation.get('position')
+        target.insert(len(target) if position is None else int(position), shift)
+        self._reindex((participant, date))
+        return {'op': 'move', 'id': location.shift_id, 'participant': participant, 'date': date}
+
+    def _delete(self, number: int, operation: Dict[str, Any]) -> Dict[str, Any]:
+        location, shifts = self._find(number, operation)
+        del shifts[location.position]
+        self._reindex((location.participant, location.date))
+        return {'op': 'delete', 'id': location.shift_id, 'participant': location.participant, 'date': location.date}
+
+    def _target(self, number: int, operation: Dict[str, Any]) -> Cell:
+        participant, date = operation.get('participant'), operation.get('date')
+        if not participant or not date:
+            raise ShiftPatchError(f"Operation {number}: participant and date are required")
+        return str(participant), str(date)
+
+    def _find(self, number: int, operation: Dict[str, Any]):
+        shift_id = operation.get('id')
+        if not shift_id:
+            raise ShiftPatchError(f"Operation {number}: id is required")
+        location = self.index.locate(shift_id)
+        if location is None:
+            raise ShiftPatchError(f"Operation {number}: shift {shift_id} not found", not_found=True)
+        return location, self._cell(location.participant, location.date)
+
+    def _cell(self, participant: str, date: str, create: bool = False) -> List[Dict[str, Any]]:
+        """The cell's shift list, copied on first touch so the original can be restored"""
+        cell = (participant, date)
+        dates = self.data.get(participant)
+        if not isinstance(dates, dict):
+            if not create:
+                raise ShiftPatchError(f"No shifts for {participant}")
+            if participant in self.data:
+                raise ShiftPatchError(f"Participant {participant} has no date entries to edit")
+            dates = self.data[participant] = {}
+            self._created.add(participant)
+        if cell not in self.cells:
+            self.cells.add(cell)
+            self.previous_data.setdefault(participant, {})
+            if date in dates:
+                self.previous_data[participant][date] = dates[date]
+            shifts = dates.get(date)
+            if shifts is not None and not isinstance(shifts, list):
+                raise ShiftPatchError(f"{participant} {date} does not hold a shift list")
+            dates[date] = list(shifts or [])
+        return dates[date]
+
+    def _reindex(self, cell: Cell) -> None:
+        self.index.update(self.data, [cell])
+
+    def _rollback(self) -> None:
+        for participant, date in self.cells:
+            dates = self.data.get(participant)
+            previous = self.previous_data.get(participant, {})
+            if date in previous:
+                dates[date] = previous[date]
+            elif isinstance(dates, dict):
+                dates.pop(date, None)
+        for participant in self._created:
+            self.data.pop(participant, None)
+        self.index.update(self.data, self.cells)
+        self.cells = set()
+        self.previous_data = {}
+        self._created = set()
@@ -0,0 +1,90 @@
+"""
+Template projection for empty upcoming weeks
+
+When roster_next or roster_after has no shifts, the API serves the current
+(or next) week shifted forward by 7 or 14 days. Projections are memoized per
+source section version, so the copy is made once per change to the source
+instead of on every request. Cached projections are shared and must be
+treated as read-only.
+"""
+from typing import Dict, Any, Tuple, Callable
+from datetime import date, timedelta
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def shift_dates(data: Dict[str, Any], days: int) -> Dict[str, Any]:
+    """
+    Copy {participant_code: {date: [shifts]}} with every date moved by ``days``
+
+    Shift dicts are copied one level deep (their ``date`` is rewritten);
+    dates that don't parse are kept as they are.
+    """
+    delta = timedelta(days=days)
+    moved: Dict[str, str] = {}
+    new_data = {}
+    for participant_code, dates_dict in data.items():
+        # Handle both dict and list formats
+        if not isinstance(dates_dict, dict):
+            new_data[participant_code] = dates_dict
+            continue
+        participant_dates = new_data[participant_code] = {}
+        for date_str, shifts in dates_dict.items():
+            if not isinstance(shifts, list):
+                participant_dates[date_str] = shifts
+                continue
+            new_date_str = moved.get(date_str)
+            if new_date_str is None:
+                try:
+                    new_date_str = (date.fromisoformat(date_str) + delta).isoformat()
+                except (TypeError, ValueError) as e:
+                    # If date parsing fails, keep original
+                    logger.warning(f"Error shifting date {date_str}: {e}")
+                    participant_dates[date_str] = shifts
+                    continue
+                moved[date_str] = new_date_str
+            # Copy shift structure INCLUDING worker assignments
+            participant_dates[new_date_str] = [dict(shift, date=new_date_str) for shift in shifts]
+    return new_data
+
+
+class TemplateProjections:
+    """Memoized shifted copies of roster sections, keyed by source version"""
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, int], Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source_key: str, version: int, days: int,
+            load_source: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Section ``source_key`` shifted forward by ``days``
+
+        Args:
+            source_key: Section the template comes from (roster, roster_next)
+            version: Current version of the source section
+            days: Number of days to move every date
+            load_source: Returns the source section; only called on a miss
+
+        Returns:
+            A section dict whose ``data`` holds the shifted shifts
+        """
+        cached = self._cache.get((source_key, days))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            cached = self._cache.get((source_key, days))
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            source = load_source() or {}
+            projection = dict(source, data=shift_dates(source.get('data') or {}, days))
+            self._cache[(source_key, days)] = (version, projection)
+            logger.info(f"Projected {source_key} forward by {days} days (version {version})")
+            return projection
+
+    def clear(self) -> None:
+        """Drop every cached projection"""
+        with self._lock:
+            self._cache.clear()
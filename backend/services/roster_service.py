@@ -3,6 +3,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from database import SupabaseDatabase
 from services.validation_service import ValidationService
+from services.hours_aggregation import HoursTable
 from core.logging_config import get_logger
 
 logger = get_logger("roster_service")
@@ -155,10 +156,7 @@ class RosterService:
         total_shifts = len(shifts)
         
         # Worker hours
-        worker_hours = {}
-        for shift in shifts:
-            for worker_id in shift.get('workers', []):
-                worker_hours[worker_id] = worker_hours.get(worker_id, 0) + float(shift.get('duration', 0))
+        worker_hours = HoursTable.from_shifts(shifts).totals()
         
         return {
             "total_hours": total_hours,
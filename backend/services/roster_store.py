@@ -0,0 +1,598 @@
+"""
+Append-only, per-section roster persistence
+
+Each top-level ROSTER_DATA key (roster, roster_next, planner, legacy
+participant codes, ...) is stored as its own shard: a JSON snapshot plus a
+write-ahead journal of mutations. Shards are parsed lazily on first access,
+saves append only the changed paths of one section, and each shard's journal
+is periodically compacted back into its snapshot.
+"""
+from typing import Dict, List, Any, Optional, Sequence, Iterator, Tuple, Set, Callable
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from pathlib import Path
+import threading
+import logging
+import json
+import os
+import re
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
+
+from .shift_store import ShiftTable
+from .roster_index import RosterIndex, Cell, changed_cells
+
+logger = logging.getLogger(__name__)
+
+# Paths deeper than section -> 'data' -> participant -> date are written whole
+MAX_DIFF_DEPTH = 4
+
+SNAPSHOT_SUFFIX = '.json'
+JOURNAL_SUFFIX = '.journal'
+LOCK_FILE = '.lock'
+
+_MISSING = object()
+_SECTION_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_\-]*$')
+
+
+def diff_ops(path: Sequence[str], old: Any, new: Any, max_depth: int = MAX_DIFF_DEPTH) -> List[Dict[str, Any]]:
+    """
+    Compute the journal operations that turn ``old`` into ``new`` at ``path``
+
+    Dicts are compared key by key down to ``max_depth`` path segments, so
+    changing one day of one participant only journals that day's shifts.
+
+    Returns:
+        List of {'op': 'set', 'path': [...], 'value': ...} / {'op': 'del', 'path': [...]}
+    """
+    path = list(path)
+    if new is _MISSING:
+        return [] if old is _MISSING else [{'op': 'del', 'path': path}]
+    if old is _MISSING or not isinstance(old, dict) or not isinstance(new, dict) or len(path) >= max_depth:
+        if old is not _MISSING and old == new:
+            return []
+        return [{'op': 'set', 'path': path, 'value': new}]
+
+    ops = []
+    for key in old:
+        if key not in new:
+            ops.append({'op': 'del', 'path': path + [key]})
+    for key, value in new.items():
+        ops.extend(diff_ops(path + [key], old.get(key, _MISSING), value, max_depth))
+    return ops
+
+
+def apply_ops(data: Dict[str, Any], ops: List[Dict[str, Any]]) -> None:
+    """Apply journal operations to ``data`` in place"""
+    for op in ops:
+        path = op['path']
+        parent = data
+        for key in path[:-1]:
+            child = parent.get(key)
+            if not isinstance(child, dict):
+                child = parent[key] = {}
+            parent = child
+        if op['op'] == 'set':
+            parent[path[-1]] = op['value']
+        elif op['op'] == 'del':
+            parent.pop(path[-1], None)
+        else:
+            raise ValueError(f"Unknown journal operation: {op['op']}")
+
+
+def read_journal(journal_path: Path, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Parse the complete entries of a journal file from byte ``offset``
+
+    A final line without its newline is a write still in progress (or torn
+    by a crash) and is left for the next read.
+
+    Returns:
+        (entries, byte offset just past the last complete line)
+    """
+    try:
+        with open(journal_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return [], 0
+    entries = []
+    end = chunk.rfind(b'\n') + 1
+    for line_number, line in enumerate(chunk[:end].splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            # A torn write from a crash, followed by later appends
+            logger.warning(f"Ignoring unreadable entry {journal_path.name}:+{line_number}")
+    return entries, offset + end
+
+
+def replay_journal(journal_path: Path, data: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Apply every entry of a journal file to ``data``
+
+    Returns:
+        (entries replayed, bytes consumed)
+    """
+    entries, consumed = read_journal(journal_path)
+    for entry in entries:
+        apply_ops(data, entry.get('ops', []))
+    return len(entries), consumed
+
+
+class VersionConflict(Exception):
+    """A write was based on an older version of a section than the stored one"""
+
+    def __init__(self, key: str, expected: int, actual: int):
+        super().__init__(f"Roster section {key} is at version {actual}, not {expected}")
+        self.key = key
+        self.expected = expected
+        self.actual = actual
+
+
+class _Shard:
+    """
+    Snapshot and journal files of one roster section
+
+    Journal entries carry the section version they produced ({"v": n,
+    "ops": [...]}); compaction leaves a single marker entry so the version
+    survives. ``journal_bytes`` is how far this process has read, which lets
+    it pick up entries appended by other processes.
+    """
+
+    def __init__(self, directory: Path, name: str):
+        self.name = name
+        self.snapshot_path = directory / f"{name}{SNAPSHOT_SUFFIX}"
+        self.journal_path = directory / f"{name}{JOURNAL_SUFFIX}"
+        self.journal_entries = 0
+        self.journal_bytes = 0
+        self.version = 0
+        self.snapshot_id = None
+
+    def exists(self) -> bool:
+        return self.snapshot_path.exists() or self.journal_path.exists()
+
+    def _stat_snapshot(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _journal_size(self) -> int:
+        try:
+            return os.stat(self.journal_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def read(self) -> Any:
+        """Parse the snapshot and replay the journal on top of it"""
+        holder = {}
+        self.snapshot_id = self._stat_snapshot()
+        if self.snapshot_id is not None:
+            with open(self.snapshot_path, 'r') as f:
+                holder[self.name] = json.load(f)
+        self.version = 0
+        self.journal_entries = self.journal_bytes = 0
+        self._replay(holder, 0)
+        return holder.get(self.name, _MISSING)
+
+    def _replay(self, holder: Dict[str, Any], offset: int) -> int:
+        # Journal paths start with the section name
+        entries, self.journal_bytes = read_journal(self.journal_path, offset)
+        for entry in entries:
+            ops = entry.get('ops', [])
+            apply_ops(holder, ops)
+            if ops:
+                self.journal_entries += 1
+            self.version = max(self.version, entry.get('v', 0))
+        return len(entries)
+
+    def disk_state(self) -> str:
+        """'same', 'appended' (other writers added entries) or 'replaced' (re-read everything)"""
+        if self._stat_snapshot() != self.snapshot_id:
+            return 'replaced'
+        size = self._journal_size()
+        if size < self.journal_bytes:
+            return 'replaced'
+        return 'appended' if size > self.journal_bytes else 'same'
+
+    def read_appended(self, value: Any) -> Any:
+        """Apply entries other processes appended since the last read"""
+        holder = {self.name: value}
+        self._replay(holder, self.journal_bytes)
+        return holder.get(self.name, _MISSING)
+
+    def append(self, ops: List[Dict[str, Any]], version: int) -> None:
+        line = json.dumps({'v': version, 'ops': ops}, separators=(',', ':')) + '\n'
+        with open(self.journal_path, 'ab') as f:
+            if f.tell() and not self._ends_with_newline():
+                # Never glue an entry onto a torn one
+                line = '\n' + line
+            f.write(line.encode())
+            self.journal_bytes = f.tell()
+        self.journal_entries += 1
+        self.version = version
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.journal_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def write_snapshot(self, value: Any) -> None:
+        tmp_path = self.snapshot_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(value, f, indent=2)
+        os.replace(tmp_path, self.snapshot_path)
+        self.snapshot_id = self._stat_snapshot()
+        # Truncate only after the snapshot containing every entry is in place
+        if self.version or self.journal_path.exists():
+            with open(self.journal_path, 'w') as f:
+                if self.version:
+                    f.write(json.dumps({'v': self.version, 'ops': []}) + '\n')
+                self.journal_bytes = f.tell()
+        self.journal_entries = 0
+
+    def remove(self) -> None:
+        for path in (self.snapshot_path, self.journal_path):
+            if path.exists():
+                path.unlink()
+        self.journal_entries = 0
+        self.journal_bytes = 0
+        self.version = 0
+        self.snapshot_id = None
+
+
+class RosterStore(MutableMapping):
+    """
+    Lazily loaded, per-section roster dictionary
+
+    Behaves like the old ROSTER_DATA dict. Reading a key parses only that
+    section's shard; assignments stay in memory until ``save`` journals them.
+
+    Several processes can share one store directory. Writes take an exclusive
+    file lock, and every read first checks (two stats) whether another
+    process has appended to or compacted the section, replaying only what is
+    new. Writers that need to read-modify-write use ``transaction`` so their
+    edit starts from the latest saved state and can require a known version.
+    """
+
+    def __init__(self, directory: Path, legacy_snapshot: Optional[Path] = None,
+                 compact_every: int = 200, compact_bytes: int = 1024 * 1024):
+        self.directory = Path(directory)
+        self.legacy_snapshot = Path(legacy_snapshot) if legacy_snapshot else None
+        self.compact_every = compact_every
+        self.compact_bytes = compact_bytes
+        self._sections: Dict[str, Any] = {}
+        self._shards: Dict[str, _Shard] = {}
+        self._names: set = set()
+        self._tables: Dict[str, ShiftTable] = {}
+        # Indexes follow saves: they are updated from each save's journal ops
+        self._indexes: Dict[str, RosterIndex] = {}
+        # Called with a section name when another process changed it
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+
+    def open(self) -> 'RosterStore':
+        """List the stored sections without parsing them, migrating the legacy file once"""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with self.write_lock():
+                if not any(self._section_files()):
+                    self._migrate_legacy()
+                self._sections.clear()
+                self._shards.clear()
+                self._tables.clear()
+                self._indexes.clear()
+                self._names = {path.stem for path in self._section_files()}
+            logger.info(f"Opened roster store with {len(self._names)} sections")
+            return self
+
+    def _section_files(self) -> Iterator[Path]:
+        return (
+            path for path in self.directory.iterdir()
+            if path.suffix in (SNAPSHOT_SUFFIX, JOURNAL_SUFFIX) and _SECTION_NAME.match(path.stem)
+        )
+
+    def _migrate_legacy(self) -> None:
+        """Split the single-file roster_data.json (+ journal) into per-section shards"""
+        if not self.legacy_snapshot or not self.legacy_snapshot.exists():
+            return
+        with open(self.legacy_snapshot, 'r') as f:
+            data = json.load(f)
+        # The single-file journal recorded paths from the roster root
+        replay_journal(self.legacy_snapshot.with_suffix(JOURNAL_SUFFIX), data)
+        for key, value in data.items():
+            self._shard(key).write_snapshot(value)
+        logger.info(f"Migrated {len(data)} roster sections from {self.legacy_snapshot}")
+
+    @contextmanager
+    def write_lock(self):
+        """Exclusive lock across threads and processes sharing the directory (re-entrant)"""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self._lock_file = open(self.directory / LOCK_FILE, 'a')
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    @contextmanager
+    def transaction(self, *keys: str, expected: Optional[Dict[str, int]] = None):
+        """
+        Hold the write lock with ``keys`` caught up to the latest saved state
+
+        Args:
+            keys: Sections about to be read and modified
+            expected: Optional {key: version} the caller's edit was based on
+
+        Raises:
+            VersionConflict: If a section has moved past its expected version
+        """
+        with self.write_lock():
+            for key in keys:
+                self.refresh(key)
+            for key, version in (expected or {}).items():
+                actual = self.version(key)
+                if actual != version:
+                    raise VersionConflict(key, version, actual)
+            yield self
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Register a callback for sections changed by another process"""
+        self._listeners.append(callback)
+
+    def refresh(self, key: str) -> None:
+        """Catch a loaded section up with writes made by other processes"""
+        if key not in self._sections:
+            return
+        with self._lock:
+            shard = self._shard(key)
+            state = shard.disk_state()
+            if state == 'same':
+                return
+            if state == 'appended':
+                value = shard.read_appended(self._sections[key])
+            else:
+                value = shard.read()
+            if value is _MISSING:
+                self._sections.pop(key, None)
+                self._names.discard(key)
+            else:
+                self._sections[key] = value
+            self._tables.pop(key, None)
+            self._indexes.pop(key, None)
+            logger.info(f"Reloaded roster section {key} changed by another process")
+            for callback in self._listeners:
+                callback(key)
+
+    def _shard(self, key: str) -> _Shard:
+        shard = self._shards.get(key)
+        if shard is None:
+            if not _SECTION_NAME.match(str(key)):
+                raise KeyError(f"Invalid roster section name: {key!r}")
+            shard = self._shards[key] = _Shard(self.directory, key)
+        return shard
+
+    def _known(self, key: Any) -> bool:
+        """Whether a section exists, without parsing it"""
+        if key in self._sections:
+            self.refresh(key)
+            return key in self._sections
+        if key in self._names:
+            return True
+        # Another process may have created it since open()
+        if isinstance(key, str) and _SECTION_NAME.match(key) and self._shard(key).exists():
+            self._names.add(key)
+            return True
+        return False
+
+    def _load(self, key: str) -> Any:
+        if not self._known(key):
+            return _MISSING
+        if key in self._sections:
+            return self._sections[key]
+        with self._lock:
+            if key not in self._sections:
+                value = self._shard(key).read()
+                if value is _MISSING:
+                    self._names.discard(key)
+                    return _MISSING
+                self._sections[key] = value
+            return self._sections[key]
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._load(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._shard(key)
+        self._sections[key] = value
+        self._names.add(key)
+        self._tables.pop(key, None)
+
+    def __delitem__(self, key: str) -> None:
+        if self._load(key) is _MISSING:
+            raise KeyError(key)
+        del self._sections[key]
+        self._names.discard(key)
+        self._tables.pop(key, None)
+        self._indexes.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return self._known(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._names))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def version(self, key: str) -> int:
+        """Saved version of a section; increases with every journaled change, 0 if absent"""
+        if self._load(key) is _MISSING:
+            return 0
+        return self._shard(key).version
+
+    def is_loaded(self, key: str) -> bool:
+        """Whether a section has been parsed into memory"""
+        return key in self._sections
+
+    def shift_table(self, key: str) -> ShiftTable:
+        """Compact typed view of a section's shifts, rebuilt only after the section changes"""
+        self._load(key)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = ShiftTable.from_roster_data(_section_data(self.get(key)))
+        return table
+
+    def index(self, key: str) -> RosterIndex:
+        """Worker/date/shift-id indexes for a section, maintained incrementally by ``save``"""
+        self._load(key)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = RosterIndex.build(_section_data(self.get(key)))
+        return index
+
+    def save(self, key: str, previous: Any = _MISSING) -> Optional[Set[Cell]]:
+        """
+        Journal the current value of one section
+
+        Args:
+            key: Top-level ROSTER_DATA key that changed
+            previous: Value before the change; when given only the difference is journaled
+
+        Returns:
+            The (participant, date) cells that changed, or None when the whole
+            section must be treated as changed
+        """
+        with self.write_lock():
+            self._tables.pop(key, None)
+            current = self._sections.get(key, _MISSING) if key in self._names else _MISSING
+            shard = self._shard(key)
+            if current is _MISSING:
+                if key not in self._names:
+                    shard.remove()
+                    self._indexes.pop(key, None)
+                return None
+            if previous is _MISSING or not shard.exists():
+                ops = [{'op': 'set', 'path': [key], 'value': current}]
+            else:
+                ops = diff_ops([key], previous, current)
+            if not ops:
+                return set()
+            self._append(key, ops)
+            cells = None if previous is _MISSING else changed_cells(ops, _section_data(previous), _section_data(current))
+            self._update_index(key, cells, current)
+            self._maybe_compact(key)
+            return cells
+
+    def save_cells(self, key: str, cells: Set[Cell]) -> Set[Cell]:
+        """
+        Journal only the given participant/date cells of a section
+
+        For edits that already know what they touched; cost follows the number
+        of cells, not the size of the section. Cells that no longer exist are
+        journaled as deletions.
+        """
+        with self.write_lock():
+            self._tables.pop(key, None)
+            current = self._sections.get(key, _MISSING)
+            if not isinstance(current, dict) or not isinstance(current.get('data'), dict):
+                # No data dict to patch into; journal the whole section
+                self.save(key)
+                return set(cells)
+            data = current['data']
+            ops = []
+            for participant, date in sorted(cells):
+                dates = data.get(participant)
+                if not isinstance(dates, dict):
+                    continue
+                path = [key, 'data', participant, date]
+                if date in dates:
+                    ops.append({'op': 'set', 'path': path, 'value': dates[date]})
+                else:
+                    ops.append({'op': 'del', 'path': path})
+            if not ops:
+                return set()
+            if not self._shard(key).exists():
+                ops = [{'op': 'set', 'path': [key], 'value': current}]
+            self._append(key, ops)
+            self._update_index(key, set(cells), current)
+            self._maybe_compact(key)
+            return set(cells)
+
+    def _append(self, key: str, ops: List[Dict[str, Any]]) -> None:
+        shard = self._shard(key)
+        stale = shard.disk_state() != 'same'
+        if stale:
+            # Written without a transaction while another process also wrote:
+            # version after theirs, and re-read the merged result next time
+            logger.warning(f"Roster section {key} was changed by another process during this edit")
+            other = _Shard(self.directory, key)
+            other.read()
+            shard.version = max(shard.version, other.version)
+        shard.append(ops, shard.version + 1)
+        if stale:
+            self._sections.pop(key, None)
+            self._tables.pop(key, None)
+            self._indexes.pop(key, None)
+
+    def _maybe_compact(self, key: str) -> None:
+        shard = self._shard(key)
+        if key in self._sections and (shard.journal_entries >= self.compact_every or shard.journal_bytes >= self.compact_bytes):
+            self.compact(key)
+
+    def compact(self, key: Optional[str] = None) -> None:
+        """Fold a section's journal (or every loaded section's) into its snapshot"""
+        with self.write_lock():
+            keys = [key] if key else list(self._sections)
+            for name in keys:
+                self.refresh(name)
+                value = self._sections.get(name, _MISSING)
+                if value is _MISSING:
+                    continue
+                self._shard(name).write_snapshot(value)
+                logger.info(f"Compacted roster journal for {name}")
+
+    def _update_index(self, key: str, cells: Optional[Set[Cell]], current: Any) -> None:
+        index = self._indexes.get(key)
+        if index is None:
+            return
+        if cells is None:
+            self._indexes.pop(key, None)
+        else:
+            index.update(_section_data(current), cells)
+
+
+def _section_data(section: Any) -> Dict[str, Any]:
+    data = section.get('data') if isinstance(section, dict) else None
+    return data if isinstance(data, dict) else {}
+
+
+# Shared store for every app and script in this backend
+_roster_store = None
+
+def get_roster_store() -> RosterStore:
+    """Get the global roster store over backend/roster_data"""
+    global _roster_store
+    if _roster_store is None:
+        backend_dir = Path(__file__).resolve().parent.parent
+        _roster_store = RosterStore(backend_dir / 'roster_data', legacy_snapshot=backend_dir / 'roster_data.json')
+    return _roster_store
@@ -0,0 +1,117 @@
+"""
+Write-behind mirroring of roster sections to Supabase
+
+Saves only mark a week section as dirty. The first mark starts a short
+window; when it closes, every dirty section is read once from the roster
+store and written in a single upsert. A burst of planner autosaves therefore
+costs one database write, carrying the section's latest state. The file
+store stays the source of truth, so a failed write is kept pending and
+retried with the next flush.
+"""
+from typing import Dict, Any, Callable, Iterable, Optional, Set
+import copy
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sections mirrored to the roster_data table
+MIRRORED_SECTIONS = ('roster', 'roster_next', 'roster_after', 'planner')
+
+
+class RosterWriteBehind:
+    """
+    Coalesces section saves into periodic batched writes
+
+    Usage:
+        writer = RosterWriteBehind(load, write, delay=2.0)
+        writer.mark('planner')   # cheap; schedules a flush in ``delay`` seconds
+        writer.close()           # on shutdown: write whatever is pending
+    """
+
+    def __init__(self, load: Callable[[Set[str]], Dict[str, Any]],
+                 write: Callable[[Dict[str, Any]], bool], delay: float = 2.0):
+        """
+        Args:
+            load: Returns {section: value} for the given sections, as they are now
+            write: Persists {section: value} in one request; False if it failed
+            delay: Seconds between the first pending save and the write
+        """
+        self._load = load
+        self._write = write
+        self.delay = delay
+        self._pending: Set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        # Flushes run one at a time so writes reach the database in order
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+    def mark(self, *sections: str) -> None:
+        """Queue sections for the next flush"""
+        sections = [s for s in sections if s in MIRRORED_SECTIONS]
+        if not sections:
+            return
+        with self._lock:
+            self._pending.update(sections)
+            if self._timer is None and not self._closed:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @property
+    def pending(self) -> Set[str]:
+        with self._lock:
+            return set(self._pending)
+
+    def flush(self) -> bool:
+        """Write every pending section now; returns False if the write failed"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                sections, self._pending = self._pending, set()
+            if not sections:
+                return True
+            try:
+                batch = self._load(sections)
+                if not batch or self._write(batch):
+                    logger.info(f"Flushed roster sections {', '.join(sorted(sections))}")
+                    return True
+            except Exception as e:
+                logger.error(f"Error flushing roster sections: {e}")
+            # Keep them pending; the next save or shutdown retries
+            with self._lock:
+                self._pending.update(sections)
+            return False
+
+    def close(self) -> bool:
+        """Stop scheduling and write what is pending"""
+        with self._lock:
+            self._closed = True
+        return self.flush()
+
+
+def _load_sections(sections: Iterable[str]) -> Dict[str, Any]:
+    from .roster_store import get_roster_store
+    store = get_roster_store()
+    # Copied under the store lock so concurrent edits can't change them mid-write
+    with store.write_lock():
+        return {key: copy.deepcopy(store[key]) for key in sections if key in store}
+
+
+def _write_sections(sections: Dict[str, Any]) -> bool:
+    from database import db
+    return db.save_roster_sections(sections)
+
+
+# Global writer
+_roster_writer = None
+
+def get_roster_writer() -> RosterWriteBehind:
+    """Get the global write-behind mirror of the roster store to Supabase"""
+    global _roster_writer
+    if _roster_writer is None:
+        _roster_writer = RosterWriteBehind(_load_sections, _write_sections)
+    return _roster_writer
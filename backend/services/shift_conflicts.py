@@ -0,0 +1,203 @@
+"""
+Overlap detection between shifts
+
+Shifts are compared on absolute minutes (see worker_timeline.absolute_span),
+so a shift crossing midnight overlaps the next morning's shifts and a long
+shift overlaps every later shift it spans, not only its neighbour.
+
+overlapping_pairs sweeps one worker's shifts in start order, keeping the
+shifts still running in a heap by end time: O(n log n + k) for k overlaps.
+ConflictIndex answers "would this assignment conflict?" for one worker in
+O(log n + k) with a bisect over start times.
+
+ScheduleIndex is the per-worker structure behind it: shifts ordered by
+absolute start with running hour totals, so neighbours, overlaps and the
+hours worked in any day or week are all binary searches. Stored sections
+are indexed from their ShiftTable, whose records already carry interned
+values and parsed times.
+"""
+from typing import Dict, List, Any, Iterable, Iterator, Tuple, Optional
+from bisect import bisect_left
+from itertools import accumulate
+import heapq
+
+from .shift_store import ShiftTable
+from .worker_timeline import (
+    MINUTES_PER_DAY, WorkerShift, WorkerTimeline, build_timelines, build_timelines_from_records,
+    absolute_span, day_number, time_to_minutes, worker_shift
+)
+
+
+def overlapping_pairs(shifts: Iterable[WorkerShift]) -> Iterator[Tuple[WorkerShift, WorkerShift]]:
+    """
+    Every pair of overlapping shifts, earlier start first
+
+    Touching shifts (one ends exactly when the other starts) don't overlap.
+    """
+    active: List[Tuple[int, int, WorkerShift]] = []
+    # Stable: shifts starting together keep the order they were given in
+    for order, shift in enumerate(sorted(shifts, key=lambda s: s.abs_start)):
+        while active and active[0][0] <= shift.abs_start:
+            heapq.heappop(active)
+        for _, _, running in active:
+            yield running, shift
+        heapq.heappush(active, (shift.abs_end, order, shift))
+
+
+class ScheduleIndex:
+    """One worker's shifts ordered by absolute start, with running hour totals"""
+
+    def __init__(self, shifts: Iterable[WorkerShift]):
+        self.shifts = sorted(shifts, key=lambda s: (s.abs_start, s.abs_end))
+        self.starts = [s.abs_start for s in self.shifts]
+        # hours_before[i] = total duration of shifts[:i]
+        self.hours_before = [0.0, *accumulate(s.duration for s in self.shifts)]
+        self.longest = max((s.abs_end - s.abs_start for s in self.shifts), default=0)
+        self._by_id = {s.shift_id: s for s in self.shifts}
+
+    @classmethod
+    def from_dicts(cls, shifts: Iterable[Dict[str, Any]]) -> 'ScheduleIndex':
+        """Index flat shift dicts carrying 'date' (and 'participant'); unplaceable ones are skipped"""
+        entries = []
+        for shift in shifts:
+            try:
+                entries.append(worker_shift(shift.get('participant', 'unknown'), shift['date'], shift))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.shifts)
+
+    def __contains__(self, shift_id: str) -> bool:
+        return shift_id in self._by_id
+
+    def overlapping(self, abs_start: int, abs_end: int,
+                    exclude_shift_id: Optional[str] = None) -> List[WorkerShift]:
+        """Shifts overlapping [abs_start, abs_end)"""
+        # Nothing starting earlier than the longest shift's length can still be running
+        first = bisect_left(self.starts, abs_start - self.longest)
+        last = bisect_left(self.starts, abs_end)
+        return [
+            shift for shift in self.shifts[first:last]
+            if shift.abs_end > abs_start and shift.shift_id != exclude_shift_id
+        ]
+
+    def hours_starting(self, abs_from: int, abs_to: int, exclude_shift_id: Optional[str] = None) -> float:
+        """Total duration of shifts starting in [abs_from, abs_to)"""
+        first = bisect_left(self.starts, abs_from)
+        last = bisect_left(self.starts, abs_to)
+        hours = self.hours_before[last] - self.hours_before[first]
+        excluded = self._by_id.get(exclude_shift_id)
+        if excluded is not None and abs_from <= excluded.abs_start < abs_to:
+            hours -= excluded.duration
+        return hours
+
+    def day_hours(self, day: int, exclude_shift_id: Optional[str] = None) -> float:
+        """Hours of shifts starting on a date ordinal"""
+        return self.hours_starting(day * MINUTES_PER_DAY, (day + 1) * MINUTES_PER_DAY, exclude_shift_id)
+
+    def week_hours(self, day: int, exclude_shift_id: Optional[str] = None) -> float:
+        """Hours of shifts starting in the Monday-Sunday week containing a date ordinal"""
+        monday = day - (day - 1) % 7
+        return self.hours_starting(monday * MINUTES_PER_DAY, (monday + 7) * MINUTES_PER_DAY, exclude_shift_id)
+
+    def previous(self, abs_start: int, exclude_shift_id: Optional[str] = None) -> Optional[WorkerShift]:
+        """Latest shift starting before ``abs_start``"""
+        i = bisect_left(self.starts, abs_start) - 1
+        while i >= 0 and self.shifts[i].shift_id == exclude_shift_id:
+            i -= 1
+        return self.shifts[i] if i >= 0 else None
+
+    def next(self, abs_start: int, exclude_shift_id: Optional[str] = None) -> Optional[WorkerShift]:
+        """Earliest shift starting at or after ``abs_start``"""
+        i = bisect_left(self.starts, abs_start)
+        while i < len(self.shifts) and self.shifts[i].shift_id == exclude_shift_id:
+            i += 1
+        return self.shifts[i] if i < len(self.shifts) else None
+
+    def continuous_run(self, shift: WorkerShift, exclude_shift_id: Optional[str] = None) -> Tuple[float, int, int]:
+        """(hours, abs_start, abs_end) of the run of back-to-back shifts containing ``shift``"""
+        hours = shift.duration
+        start, end = shift.abs_start, shift.abs_end
+        other = self.previous(start, exclude_shift_id)
+        while other is not None and other.abs_end == start:
+            hours += other.duration
+            start = other.abs_start
+            other = self.previous(start, exclude_shift_id)
+        other = self.next(end, exclude_shift_id)
+        while other is not None and other.abs_start == end:
+            hours += other.duration
+            end = other.abs_end
+            other = self.next(end, exclude_shift_id)
+        return hours, start, end
+
+    def same_day_neighbours(self, shift: WorkerShift) -> Tuple[Optional[WorkerShift], Optional[WorkerShift]]:
+        """Nearest other shifts before and after ``shift`` for the same participant on its date"""
+        first = bisect_left(self.starts, shift.day * MINUTES_PER_DAY)
+        last = bisect_left(self.starts, (shift.day + 1) * MINUTES_PER_DAY)
+        before = after = None
+        for other in self.shifts[first:last]:
+            if other.shift_id == shift.shift_id or other.participant != shift.participant:
+                continue
+            if other.abs_start < shift.abs_start:
+                before = other
+            elif after is None:
+                after = other
+        return before, after
+
+
+class ConflictIndex:
+    """Per-worker shifts ordered by absolute start, for point overlap queries"""
+
+    def __init__(self, timelines: Dict[Any, WorkerTimeline]):
+        self._schedules: Dict[str, ScheduleIndex] = {
+            str(worker_id): ScheduleIndex(timeline.shifts) for worker_id, timeline in timelines.items()
+        }
+
+    @classmethod
+    def build(cls, data: Dict[str, Any]) -> 'ConflictIndex':
+        """Index a roster's {participant_code: {date: [shifts]}} data"""
+        return cls(build_timelines(data))
+
+    @classmethod
+    def from_table(cls, table: ShiftTable) -> 'ConflictIndex':
+        """Index a section's ShiftTable"""
+        return cls(build_timelines_from_records(table))
+
+    def overlapping(self, worker_id: Any, abs_start: int, abs_end: int,
+                    exclude_shift_id: Optional[str] = None) -> List[WorkerShift]:
+        """A worker's shifts overlapping [abs_start, abs_end)"""
+        schedule = self._schedules.get(str(worker_id))
+        if schedule is None:
+            return []
+        return schedule.overlapping(abs_start, abs_end, exclude_shift_id)
+
+    def schedule(self, worker_id: Any) -> ScheduleIndex:
+        """A worker's ScheduleIndex (empty if they have no shifts)"""
+        return self._schedules.get(str(worker_id)) or ScheduleIndex(())
+
+    def conflicts(self, worker_id: Any, date: str, start_time: str, end_time: str,
+                  exclude_shift_id: Optional[str] = None) -> List[WorkerShift]:
+        """
+        Shifts the worker already has that a new date/start/end would overlap
+
+        Args:
+            exclude_shift_id: Ignore this shift (when re-checking an existing one)
+        """
+        abs_start, abs_end = absolute_span(
+            day_number(date), time_to_minutes(start_time), time_to_minutes(end_time)
+        )
+        return self.overlapping(worker_id, abs_start, abs_end, exclude_shift_id)
+
+
+# (version, index) per roster section
+_section_indexes: Dict[str, Tuple[int, ConflictIndex]] = {}
+
+def section_conflict_index(store: Any, week_type: str) -> ConflictIndex:
+    """ConflictIndex over a RosterStore section, rebuilt only after the section changes"""
+    version = store.version(week_type)
+    cached = _section_indexes.get(week_type)
+    if cached is None or cached[0] != version:
+        cached = _section_indexes[week_type] = (version, ConflictIndex.from_table(store.shift_table(week_type)))
+    return cached[1]
@@ -0,0 +1,164 @@
+"""
+Compact typed in-memory representation of roster shifts
+
+Shifts arrive as dicts with repeated string keys, nested under participant
+and date dicts. ShiftTable flattens a section's ``data`` into __slots__
+records with interned participant codes, dates, times and worker IDs, and
+can rebuild the exact JSON shape the API serves.
+"""
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+import sys
+
+# JSON key -> ShiftRecord slot for the fields every shift carries
+FIELD_SLOTS = {
+    'id': 'id',
+    'date': 'date',
+    'startTime': 'start_time',
+    'endTime': 'end_time',
+    'supportType': 'support_type',
+    'ratio': 'ratio',
+    'workers': 'workers',
+    'location': 'location',
+    'notes': 'notes',
+    'shiftNumber': 'shift_number',
+    'duration': 'duration',
+    'isSplitShift': 'is_split_shift',
+    'locked': 'locked',
+}
+
+_intern = sys.intern
+
+
+def _intern_value(value: Any) -> Any:
+    return _intern(value) if type(value) is str else value
+
+
+def time_to_minutes(time_str: Any) -> Optional[int]:
+    """Convert H:MM / HH:MM to minutes since midnight, or None if unparseable"""
+    try:
+        hours, minutes = str(time_str).split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+    except (ValueError, AttributeError):
+        return None
+
+
+class ShiftRecord:
+    """One shift with interned values; unknown JSON keys are kept in ``extra``"""
+
+    __slots__ = (
+        'participant', 'day', 'shape',
+        'id', 'date', 'start_time', 'end_time', 'support_type', 'ratio',
+        'workers', 'location', 'notes', 'shift_number', 'duration',
+        'is_split_shift', 'locked', 'start_minutes', 'end_minutes', 'extra',
+    )
+
+    def __init__(self, participant: str, day: str, shift: Dict[str, Any], shape: Tuple[str, ...]):
+        self.participant = participant
+        self.day = day
+        self.shape = shape
+        extra = None
+        for slot in FIELD_SLOTS.values():
+            setattr(self, slot, None)
+        for key, value in shift.items():
+            slot = FIELD_SLOTS.get(key)
+            if slot is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+            elif slot == 'workers':
+                self.workers = tuple(_intern_value(w) for w in value) if isinstance(value, list) else value
+            else:
+                setattr(self, slot, _intern_value(value))
+        self.extra = extra
+        self.start_minutes = time_to_minutes(self.start_time)
+        self.end_minutes = time_to_minutes(self.end_time)
+
+    @property
+    def hours(self) -> float:
+        """Duration as a float (0 when missing or unparseable)"""
+        try:
+            return float(self.duration or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get-style access by JSON key"""
+        if key not in self.shape:
+            return default
+        slot = FIELD_SLOTS.get(key)
+        if slot is None:
+            return self.extra[key]
+        value = getattr(self, slot)
+        return list(value) if slot == 'workers' and isinstance(value, tuple) else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Rebuild the shift dict with its original key order"""
+        return {key: self.get(key) for key in self.shape}
+
+
+class ShiftTable:
+    """
+    Flat list of ShiftRecords for one roster section's ``data``
+
+    The participant/date layout (including empty days and non-list values)
+    is kept so ``to_roster_data`` reproduces the stored JSON exactly.
+    """
+
+    def __init__(self):
+        self.records: List[ShiftRecord] = []
+        # participant -> date -> (start, end) slice into records, or the raw non-list value
+        self.layout: Dict[str, Any] = {}
+        self._shapes: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    @classmethod
+    def from_roster_data(cls, data: Dict[str, Any]) -> 'ShiftTable':
+        """Build a table from {participant_code: {date: [shifts]}}"""
+        table = cls()
+        for participant, dates in (data or {}).items():
+            participant = _intern(participant)
+            if not isinstance(dates, dict):
+                table.layout[participant] = dates
+                continue
+            days = table.layout[participant] = {}
+            for day, shifts in dates.items():
+                day = _intern(day)
+                if not isinstance(shifts, list):
+                    days[day] = shifts
+                    continue
+                start = len(table.records)
+                for shift in shifts:
+                    table.records.append(ShiftRecord(participant, day, shift, table._shape(shift)))
+                days[day] = (start, len(table.records))
+        return table
+
+    def _shape(self, shift: Dict[str, Any]) -> Tuple[str, ...]:
+        """Share one key tuple between all shifts with the same keys"""
+        shape = tuple(shift)
+        return self._shapes.setdefault(shape, shape)
+
+    def __iter__(self) -> Iterator[ShiftRecord]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def shifts_for(self, participant: str, day: str) -> List[ShiftRecord]:
+        """Records stored under one participant and date"""
+        bounds = self.layout.get(participant, {})
+        bounds = bounds.get(day) if isinstance(bounds, dict) else None
+        if not isinstance(bounds, tuple):
+            return []
+        return self.records[bounds[0]:bounds[1]]
+
+    def to_roster_data(self) -> Dict[str, Any]:
+        """Adapter back to the API's {participant_code: {date: [shift dicts]}} shape"""
+        data = {}
+        for participant, days in self.layout.items():
+            if not isinstance(days, dict):
+                data[participant] = days
+                continue
+            data[participant] = {
+                day: [r.to_dict() for r in self.records[bounds[0]:bounds[1]]] if isinstance(bounds, tuple) else bounds
+                for day, bounds in days.items()
+            }
+        return data
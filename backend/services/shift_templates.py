@@ -3,6 +3,7 @@ Shift templates for pre-validating common shift patterns
 """
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
 import json
 import logging
 from dataclasses import dataclass, asdict
@@ -10,6 +11,12 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Duration tolerance used by template matching, and the score a suggestion must beat
+DURATION_TOLERANCE = 0.5
+SUGGESTION_THRESHOLD = 0.7
+# Distinct shift signatures remembered by suggest_template
+SUGGESTION_CACHE_SIZE = 4096
+
 class ShiftTemplateType(Enum):
     """Types of shift templates"""
     STANDARD_DAY = "standard_day"
@@ -55,6 +62,46 @@ class ShiftTemplate:
         if self.validation_rules is None:
             self.validation_rules = {}
 
+class TemplateIndex:
+    """
+    Templates bucketed by the fields a suggestion has to match
+
+    A score above SUGGESTION_THRESHOLD can miss at most one of start time,
+    end time, duration and ratio, so every viable template either shares the
+    shift's (start_time, end_time) bucket or shares its ratio with a duration
+    inside the tolerance. Those two lookups give the candidates; only they
+    are scored.
+    """
+
+    def __init__(self, templates: List[ShiftTemplate]):
+        self.order = {template.id: position for position, template in enumerate(templates)}
+        self.by_times: Dict[Tuple[str, str], List[ShiftTemplate]] = {}
+        by_ratio: Dict[str, List[ShiftTemplate]] = {}
+        for template in templates:
+            self.by_times.setdefault((template.start_time, template.end_time), []).append(template)
+            by_ratio.setdefault(template.ratio, []).append(template)
+
+        # Per ratio, templates sorted by duration for nearest-duration lookups
+        self.by_ratio: Dict[str, Tuple[List[float], List[ShiftTemplate]]] = {}
+        for ratio, group in by_ratio.items():
+            group.sort(key=lambda t: t.duration)
+            self.by_ratio[ratio] = ([t.duration for t in group], group)
+
+    def candidates(self, shift_data: Dict[str, Any]) -> List[ShiftTemplate]:
+        """Templates that could score above the threshold, in registration order"""
+        found = {t.id: t for t in self.by_times.get((shift_data.get('startTime'), shift_data.get('endTime')), [])}
+
+        durations, group = self.by_ratio.get(shift_data.get('ratio'), ([], []))
+        duration = shift_data.get('duration', 0)
+        if group:
+            # Slightly wider than the tolerance; the scorer makes the exact call
+            low = bisect_left(durations, duration - DURATION_TOLERANCE - 1e-9)
+            high = bisect_right(durations, duration + DURATION_TOLERANCE + 1e-9)
+            for template in group[low:high]:
+                found[template.id] = template
+
+        return sorted(found.values(), key=lambda t: self.order[t.id])
+
 @dataclass
 class ValidationResult:
     """Validation result for a shift template"""
@@ -71,6 +118,8 @@ class ShiftTemplateManager:
     def __init__(self, templates_file: Optional[str] = None):
         self.templates: Dict[str, ShiftTemplate] = {}
         self.templates_file = templates_file or "shift_templates.json"
+        self._index: Optional[TemplateIndex] = None
+        self._suggestions: Dict[Tuple, Optional[ShiftTemplate]] = {}
         self._load_default_templates()
         self._load_templates_from_file()
     
@@ -160,6 +209,7 @@ class ShiftTemplateManager:
         
         for template in default_templates:
             self.templates[template.id] = template
+        self._invalidate()
         
         logger.info(f"Loaded {len(default_templates)} default shift templates")
     
@@ -172,6 +222,7 @@ class ShiftTemplateManager:
             for template_data in data.get('templates', []):
                 template = ShiftTemplate(**template_data)
                 self.templates[template.id] = template
+            self._invalidate()
             
             logger.info(f"Loaded {len(data.get('templates', []))} custom templates from {self.templates_file}")
         except FileNotFoundError:
@@ -194,6 +245,11 @@ class ShiftTemplateManager:
         except Exception as e:
             logger.error(f"Error saving templates to file: {e}")
     
+    def _invalidate(self):
+        """Drop the template index and remembered suggestions after a change"""
+        self._index = None
+        self._suggestions.clear()
+    
     def get_template(self, template_id: str) -> Optional[ShiftTemplate]:
         """Get a specific template by ID"""
         return self.templates.get(template_id)
@@ -213,6 +269,7 @@ class ShiftTemplateManager:
             return False
         
         self.templates[template.id] = template
+        self._invalidate()
         logger.info(f"Added template {template.id}: {template.name}")
         return True
     
@@ -223,6 +280,7 @@ class ShiftTemplateManager:
             return self.add_template(template)
         
         self.templates[template.id] = template
+        self._invalidate()
         logger.info(f"Updated template {template.id}: {template.name}")
         return True
     
@@ -233,6 +291,7 @@ class ShiftTemplateManager:
             return False
         
         template = self.templates.pop(template_id)
+        self._invalidate()
         logger.info(f"Deleted template {template_id}: {template.name}")
         return True
     
@@ -366,17 +425,50 @@ class ShiftTemplateManager:
     
     def suggest_template(self, shift_data: Dict[str, Any]) -> Optional[ShiftTemplate]:
         """Suggest the best matching template for a shift"""
+        signature = self._shift_signature(shift_data)
+        if signature is not None and signature in self._suggestions:
+            return self._suggestions[signature]
+        
+        duration = shift_data.get('duration', 0)
+        if isinstance(duration, (int, float)) and not isinstance(duration, bool):
+            if self._index is None:
+                self._index = TemplateIndex(list(self.templates.values()))
+            candidates = self._index.candidates(shift_data)
+        else:
+            # Let the scorer handle (and reject) unusual durations as before
+            candidates = list(self.templates.values())
+        
         best_match = None
         best_score = 0
         
-        for template in self.templates.values():
+        for template in candidates:
             score = self._calculate_template_match_score(shift_data, template)
             if score > best_score:
                 best_score = score
                 best_match = template
         
         # Only suggest if match score is above threshold
-        return best_match if best_score > 0.7 else None
+        suggestion = best_match if best_score > SUGGESTION_THRESHOLD else None
+        if signature is not None:
+            if len(self._suggestions) >= SUGGESTION_CACHE_SIZE:
+                self._suggestions.clear()
+            self._suggestions[signature] = suggestion
+        return suggestion
+    
+    @staticmethod
+    def _shift_signature(shift_data: Dict[str, Any]) -> Optional[Tuple]:
+        """The fields template scoring reads, or None if they are not hashable"""
+        tags = shift_data.get('tags', [])
+        signature = (
+            shift_data.get('startTime'), shift_data.get('endTime'), shift_data.get('duration', 0),
+            shift_data.get('ratio'), shift_data.get('funding_category'),
+            tuple(tags) if isinstance(tags, (list, tuple)) else tags,
+        )
+        try:
+            hash(signature)
+        except TypeError:
+            return None
+        return signature
     
     def _calculate_template_match_score(self, shift_data: Dict[str, Any], template: ShiftTemplate) -> float:
         """Calculate how well a shift matches a template (0-1 score)"""
@@ -392,7 +484,7 @@ class ShiftTemplateManager:
         
         # Check duration (20% weight)
         actual_duration = shift_data.get('duration', 0)
-        if abs(actual_duration - template.duration) <= 0.5:
+        if abs(actual_duration - template.duration) <= DURATION_TOLERANCE:
             score += 0.2
         total_checks += 0.2
         
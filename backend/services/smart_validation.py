@@ -1,12 +1,15 @@
 """
 Smart validation system that distinguishes between hard failures and business rule warnings
 """
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 import logging
 from datetime import datetime
 
+from .worker_timeline import WorkerShift, hour_of, worker_shift
+from .shift_conflicts import ScheduleIndex
+
 logger = logging.getLogger(__name__)
 
 class ValidationSeverity(Enum):
@@ -193,7 +196,7 @@ class SmartValidationEngine:
         # INFO RULES - Informational
         self.add_rule(SmartValidationRule(
             rule_id="split_shift_detected",
-            category=ValidationCategory.INFO,
+            category=ValidationCategory.BUSINESS,
             severity=ValidationSeverity.INFO,
             message="Split shift detected (verify this is intentional)",
             can_override=False,
@@ -240,73 +243,95 @@ class SmartValidationEngine:
         """Get a validation rule by ID"""
         return self.rules.get(rule_id)
     
-    def validate_shift(self, shift_data: Dict[str, Any], worker_schedule: List[Dict[str, Any]], 
-                      participant_config: Optional[Dict[str, Any]] = None) -> List[SmartValidationResult]:
-        """Validate a shift using smart rules"""
+    def validate_shift(self, shift_data: Dict[str, Any],
+                       worker_schedule: Union[ScheduleIndex, List[Dict[str, Any]]],
+                       participant_config: Optional[Dict[str, Any]] = None) -> List[SmartValidationResult]:
+        """
+        Validate a shift using smart rules
+
+        Args:
+            shift_data: The shift, with date, startTime, endTime and duration
+            worker_schedule: The worker's existing commitments. Pass a prebuilt
+                ScheduleIndex to check each shift in O(log n); a list of shift
+                dicts (with dates) is indexed on the fly. If the shift itself is
+                already in the schedule (same id), it is ignored there.
+            participant_config: Participant rules with optional hour limits
+        """
+        if not isinstance(worker_schedule, ScheduleIndex):
+            worker_schedule = ScheduleIndex.from_dicts(worker_schedule or [])
+        try:
+            shift = worker_shift(shift_data.get('participant', 'unknown'), shift_data['date'], shift_data)
+        except (KeyError, TypeError, ValueError):
+            # Can't be placed on the schedule; only the per-shift checks apply
+            shift = None
+        exclude = shift_data.get('id')
         results = []
         
-        # Check for double booking
-        if self._has_double_booking(shift_data, worker_schedule):
-            results.append(self.rules["double_booking"].create_result(
-                field="workers",
-                suggested_fix="Remove conflicting worker or reschedule shift"
-            ))
-        
-        # Check for overlapping shifts
-        if self._has_overlapping_shifts(shift_data, worker_schedule):
-            results.append(self.rules["overlapping_shifts"].create_result(
-                field="timing",
-                suggested_fix="Adjust shift times to avoid overlap"
-            ))
-        
-        # Check rest periods with smart severity
-        rest_hours = self._calculate_rest_hours(shift_data, worker_schedule)
-        if rest_hours < 4:  # Critical threshold
-            results.append(self.rules["insufficient_rest_critical"].create_result(
-                field="rest_period",
-                suggested_fix=f"Add {4 - rest_hours:.1f} hours rest between shifts",
-                metadata={"rest_hours": rest_hours, "minimum_required": 4}
-            ))
-        elif rest_hours < 8:  # Warning threshold
-            results.append(self.rules["insufficient_rest_warning"].create_result(
-                field="rest_period",
-                suggested_fix=f"Consider adding {8 - rest_hours:.1f} hours rest",
-                metadata={"rest_hours": rest_hours, "recommended": 8}
-            ))
-        
-        # Check weekly limits
-        weekly_hours = self._calculate_weekly_hours(worker_schedule, shift_data)
-        max_weekly = participant_config.get('max_weekly_hours', 40) if participant_config else 40
-        if weekly_hours > max_weekly:
-            results.append(self.rules["weekly_limit_exceeded"].create_result(
-                field="weekly_hours",
-                suggested_fix=f"Reduce weekly hours by {weekly_hours - max_weekly:.1f}h",
-                metadata={"current_hours": weekly_hours, "limit": max_weekly}
-            ))
-        
-        # Check daily limits
-        daily_hours = self._calculate_daily_hours(worker_schedule, shift_data)
-        max_daily = participant_config.get('max_daily_hours', 16) if participant_config else 16
-        if daily_hours > max_daily:
-            results.append(self.rules["daily_limit_exceeded"].create_result(
-                field="daily_hours",
-                suggested_fix=f"Reduce daily hours by {daily_hours - max_daily:.1f}h",
-                metadata={"current_hours": daily_hours, "limit": max_daily}
-            ))
-        
-        # Check split shift gaps
-        if self._is_split_shift(shift_data):
-            gap_hours = self._calculate_split_gap(shift_data, worker_schedule)
-            if gap_hours < 1 or gap_hours > 4:
-                results.append(self.rules["split_shift_gap"].create_result(
-                    field="split_gap",
-                    suggested_fix=f"Adjust gap to 1-4 hours (current: {gap_hours:.1f}h)",
-                    metadata={"gap_hours": gap_hours, "recommended_range": [1, 4]}
+        if shift is not None:
+            overlaps = worker_schedule.overlapping(shift.abs_start, shift.abs_end, exclude)
+            
+            # Check for double booking
+            if self._has_double_booking(shift, overlaps):
+                results.append(self.rules["double_booking"].create_result(
+                    field="workers",
+                    suggested_fix="Remove conflicting worker or reschedule shift"
                 ))
-            else:
-                results.append(self.rules["split_shift_detected"].create_result(
-                    metadata={"gap_hours": gap_hours, "is_valid": True}
+            
+            # Check for overlapping shifts
+            if self._has_overlapping_shifts(shift, overlaps):
+                results.append(self.rules["overlapping_shifts"].create_result(
+                    field="timing",
+                    suggested_fix="Adjust shift times to avoid overlap"
+                ))
+            
+            # Check rest periods with smart severity
+            rest_hours = self._calculate_rest_hours(shift, worker_schedule, exclude)
+            if rest_hours < 4:  # Critical threshold
+                results.append(self.rules["insufficient_rest_critical"].create_result(
+                    field="rest_period",
+                    suggested_fix=f"Add {4 - rest_hours:.1f} hours rest between shifts",
+                    metadata={"rest_hours": rest_hours, "minimum_required": 4}
+                ))
+            elif rest_hours < 8:  # Warning threshold
+                results.append(self.rules["insufficient_rest_warning"].create_result(
+                    field="rest_period",
+                    suggested_fix=f"Consider adding {8 - rest_hours:.1f} hours rest",
+                    metadata={"rest_hours": rest_hours, "recommended": 8}
                 ))
+            
+            # Check weekly limits
+            weekly_hours = self._calculate_weekly_hours(worker_schedule, shift, exclude)
+            max_weekly = participant_config.get('max_weekly_hours', 40) if participant_config else 40
+            if weekly_hours > max_weekly:
+                results.append(self.rules["weekly_limit_exceeded"].create_result(
+                    field="weekly_hours",
+                    suggested_fix=f"Reduce weekly hours by {weekly_hours - max_weekly:.1f}h",
+                    metadata={"current_hours": weekly_hours, "limit": max_weekly}
+                ))
+            
+            # Check daily limits
+            daily_hours = self._calculate_daily_hours(worker_schedule, shift, exclude)
+            max_daily = participant_config.get('max_daily_hours', 16) if participant_config else 16
+            if daily_hours > max_daily:
+                results.append(self.rules["daily_limit_exceeded"].create_result(
+                    field="daily_hours",
+                    suggested_fix=f"Reduce daily hours by {daily_hours - max_daily:.1f}h",
+                    metadata={"current_hours": daily_hours, "limit": max_daily}
+                ))
+            
+            # Check split shift gaps
+            if self._is_split_shift(shift_data):
+                gap_hours = self._calculate_split_gap(shift, worker_schedule)
+                if gap_hours < 1 or gap_hours > 4:
+                    results.append(self.rules["split_shift_gap"].create_result(
+                        field="split_gap",
+                        suggested_fix=f"Adjust gap to 1-4 hours (current: {gap_hours:.1f}h)",
+                        metadata={"gap_hours": gap_hours, "recommended_range": [1, 4]}
+                    ))
+                else:
+                    results.append(self.rules["split_shift_detected"].create_result(
+                        metadata={"gap_hours": gap_hours, "is_valid": True}
+                    ))
         
         # Check overnight staffing
         if self._is_overnight_shift(shift_data):
@@ -317,85 +342,105 @@ class SmartValidationEngine:
                     metadata={"required_workers": 2, "current_workers": len(shift_data.get('workers', []))}
                 ))
         
-        # Check continuous hours
-        continuous_hours = self._calculate_continuous_hours(worker_schedule, shift_data)
-        if continuous_hours > 12:
-            results.append(self.rules["continuous_hours_high"].create_result(
-                field="continuous_hours",
-                suggested_fix=f"Consider adding break (current: {continuous_hours:.1f}h continuous)",
-                metadata={"continuous_hours": continuous_hours, "recommended_max": 12}
-            ))
-        
-        # Check funding category changes
-        if self._has_funding_category_change(shift_data, worker_schedule):
-            results.append(self.rules["funding_category_change"].create_result(
-                field="funding_category",
-                suggested_fix="Verify funding category is correct",
-                metadata={"new_category": shift_data.get('funding_category')}
-            ))
-        
-        # Check weekend shifts
-        if self._is_weekend_shift(shift_data):
-            results.append(self.rules["weekend_shift"].create_result(
-                metadata={"is_weekend": True, "date": shift_data.get('date')}
-            ))
+        if shift is not None:
+            # Check continuous hours
+            continuous_hours = self._calculate_continuous_hours(worker_schedule, shift, exclude)
+            if continuous_hours > 12:
+                results.append(self.rules["continuous_hours_high"].create_result(
+                    field="continuous_hours",
+                    suggested_fix=f"Consider adding break (current: {continuous_hours:.1f}h continuous)",
+                    metadata={"continuous_hours": continuous_hours, "recommended_max": 12}
+                ))
+            
+            # Check funding category changes
+            if self._has_funding_category_change(shift, worker_schedule):
+                results.append(self.rules["funding_category_change"].create_result(
+                    field="funding_category",
+                    suggested_fix="Verify funding category is correct",
+                    metadata={"new_category": shift_data.get('funding_category')}
+                ))
+            
+            # Check weekend shifts
+            if self._is_weekend_shift(shift):
+                results.append(self.rules["weekend_shift"].create_result(
+                    metadata={"is_weekend": True, "date": shift_data.get('date')}
+                ))
         
         return results
     
-    def _has_double_booking(self, shift_data: Dict[str, Any], worker_schedule: List[Dict[str, Any]]) -> bool:
-        """Check for double booking"""
-        # Implementation would check for conflicts
-        return False  # Placeholder
+    def _has_double_booking(self, shift: WorkerShift, overlaps: List[WorkerShift]) -> bool:
+        """Worker already has an overlapping shift with a different participant"""
+        return any(other.participant != shift.participant for other in overlaps)
     
-    def _has_overlapping_shifts(self, shift_data: Dict[str, Any], worker_schedule: List[Dict[str, Any]]) -> bool:
-        """Check for overlapping shifts"""
-        # Implementation would check for overlaps
-        return False  # Placeholder
+    def _has_overlapping_shifts(self, shift: WorkerShift, overlaps: List[WorkerShift]) -> bool:
+        """Worker already has an overlapping shift with the same participant"""
+        return any(other.participant == shift.participant for other in overlaps)
     
-    def _calculate_rest_hours(self, shift_data: Dict[str, Any], worker_schedule: List[Dict[str, Any]]) -> float:
-        """Calculate rest hours between shifts"""
-        # Implementation would calculate actual rest
-        return 8.0  # Placeholder
+    def _calculate_rest_hours(self, shift: WorkerShift, schedule: ScheduleIndex,
+                              exclude: Optional[str]) -> float:
+        """Shortest rest to the neighbouring shifts (overlaps are reported separately)"""
+        rest = float('inf')
+        neighbours = (schedule.previous(shift.abs_start, exclude), schedule.next(shift.abs_start, exclude))
+        for other in neighbours:
+            if other is None:
+                continue
+            # The gaps inside a split shift are checked by split_shift_gap instead
+            if shift.is_split_shift and other.participant == shift.participant and other.day == shift.day:
+                continue
+            if other.abs_start < shift.abs_start:
+                gap = shift.abs_start - other.abs_end
+            else:
+                gap = other.abs_start - shift.abs_end
+            if gap >= 0:
+                rest = min(rest, gap / 60)
+        return rest
     
-    def _calculate_weekly_hours(self, worker_schedule: List[Dict[str, Any]], shift_data: Dict[str, Any]) -> float:
-        """Calculate weekly hours"""
-        # Implementation would calculate actual weekly hours
-        return 0.0  # Placeholder
+    def _calculate_weekly_hours(self, schedule: ScheduleIndex, shift: WorkerShift,
+                                exclude: Optional[str]) -> float:
+        """Hours in the shift's Monday-Sunday week, including the shift"""
+        return schedule.week_hours(shift.day, exclude) + shift.duration
     
-    def _calculate_daily_hours(self, worker_schedule: List[Dict[str, Any]], shift_data: Dict[str, Any]) -> float:
-        """Calculate daily hours"""
-        # Implementation would calculate actual daily hours
-        return 0.0  # Placeholder
+    def _calculate_daily_hours(self, schedule: ScheduleIndex, shift: WorkerShift,
+                               exclude: Optional[str]) -> float:
+        """Hours on the shift's date, including the shift"""
+        return schedule.day_hours(shift.day, exclude) + shift.duration
     
     def _is_split_shift(self, shift_data: Dict[str, Any]) -> bool:
         """Check if this is a split shift"""
         return shift_data.get('is_split_shift', False)
     
-    def _calculate_split_gap(self, shift_data: Dict[str, Any], worker_schedule: List[Dict[str, Any]]) -> float:
-        """Calculate split shift gap"""
-        # Implementation would calculate actual gap
-        return 2.0  # Placeholder
+    def _calculate_split_gap(self, shift: WorkerShift, schedule: ScheduleIndex) -> float:
+        """Gap to the nearest other part of the split (same participant, same day); 0 if none"""
+        before, after = schedule.same_day_neighbours(shift)
+        gaps = []
+        if before is not None:
+            gaps.append(shift.abs_start - before.abs_end)
+        if after is not None:
+            gaps.append(after.abs_start - shift.abs_end)
+        return max(0, min(gaps)) / 60 if gaps else 0.0
     
     def _is_overnight_shift(self, shift_data: Dict[str, Any]) -> bool:
         """Check if this is an overnight shift"""
-        start_hour = int(shift_data.get('startTime', '00:00').split(':')[0])
-        end_hour = int(shift_data.get('endTime', '00:00').split(':')[0])
+        start_hour = hour_of(shift_data.get('startTime', '00:00'))
+        end_hour = hour_of(shift_data.get('endTime', '00:00'))
         return start_hour >= 22 or end_hour <= 6 or start_hour > end_hour
     
-    def _calculate_continuous_hours(self, worker_schedule: List[Dict[str, Any]], shift_data: Dict[str, Any]) -> float:
-        """Calculate continuous work hours"""
-        # Implementation would calculate actual continuous hours
-        return 0.0  # Placeholder
+    def _calculate_continuous_hours(self, schedule: ScheduleIndex, shift: WorkerShift,
+                                    exclude: Optional[str]) -> float:
+        """Hours in the run of back-to-back shifts containing this one"""
+        return schedule.continuous_run(shift, exclude)[0]
     
-    def _has_funding_category_change(self, shift_data: Dict[str, Any], worker_schedule: List[Dict[str, Any]]) -> bool:
-        """Check for funding category changes"""
-        # Implementation would check for changes
-        return False  # Placeholder
+    def _has_funding_category_change(self, shift: WorkerShift, schedule: ScheduleIndex) -> bool:
+        """Funding category differs from the adjacent shift for the same participant that day"""
+        return any(
+            other is not None and other.funding_category != shift.funding_category
+            for other in schedule.same_day_neighbours(shift)
+        )
     
-    def _is_weekend_shift(self, shift_data: Dict[str, Any]) -> bool:
+    def _is_weekend_shift(self, shift: WorkerShift) -> bool:
         """Check if this is a weekend shift"""
-        # Implementation would check the date
-        return False  # Placeholder
+        # Ordinal 1 (0001-01-01) is a Monday
+        return (shift.day - 1) % 7 >= 5
     
     def get_validation_summary(self, results: List[SmartValidationResult]) -> Dict[str, Any]:
         """Get a summary of validation results"""
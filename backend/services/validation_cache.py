@@ -0,0 +1,108 @@
+"""
+Validation results cached by roster content
+
+The same unchanged roster section is validated again and again (the validate
+endpoints, the API validation route, the AI flow). ValidationCache keeps
+recent results under a hash of everything a result depends on: the section
+itself, the worker attributes the rules read (names and hour limits) and the
+validation config. Identical inputs return the stored result; the least
+recently used entries are evicted once the cache is full.
+"""
+from typing import Dict, Any, Callable, Optional
+from collections import OrderedDict
+import copy
+import hashlib
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Worker fields validation rules read; anything else can change without affecting results
+WORKER_FIELDS = ('full_name', 'max_hours')
+
+
+def validation_key(roster_data: Dict[str, Any], workers: Dict[str, Any],
+                   config: Optional[Dict[str, Any]], kind: str = 'enhanced') -> str:
+    """
+    Stable hash of a validation's inputs
+
+    Args:
+        roster_data: Roster section (or bare data) being validated
+        workers: {worker_id: worker}
+        config: Validation configuration
+        kind: Which validator produced the result
+    """
+    relevant_workers = {
+        str(worker_id): [worker.get(field) for field in WORKER_FIELDS]
+        for worker_id, worker in (workers or {}).items() if isinstance(worker, dict)
+    }
+    payload = json.dumps([kind, roster_data, relevant_workers, config], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class ValidationCache:
+    """LRU map from validation_key to result"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers may annotate results; never hand out the stored copy
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        stored = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def validate(self, roster_data: Dict[str, Any], workers: Dict[str, Any],
+                 config: Optional[Dict[str, Any]], compute: Callable[[], Dict[str, Any]],
+                 kind: str = 'enhanced') -> Dict[str, Any]:
+        """
+        Cached result for these inputs, running ``compute`` on a miss
+
+        Validation that runs concurrently for the same inputs may compute
+        twice; both results are identical, so the last one stored wins.
+        """
+        key = validation_key(roster_data, workers, config, kind)
+        result = self.get(key)
+        if result is not None:
+            return result
+        result = compute()
+        self.put(key, result)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# Global instance
+_validation_cache = None
+
+def get_validation_cache() -> ValidationCache:
+    """Get the global validation result cache"""
+    global _validation_cache
+    if _validation_cache is None:
+        _validation_cache = ValidationCache()
+    return _validation_cache
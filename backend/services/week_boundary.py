@@ -0,0 +1,76 @@
+"""
+Cached week boundary
+
+Rosters run Monday to Sunday in local time. WeekBoundary keeps the current
+week's start date and the timestamp of the next Monday 00:00, so checking
+whether the week has rolled over is a single float comparison until the
+boundary is actually crossed.
+"""
+from typing import Callable, Dict, Tuple
+from datetime import datetime, timedelta
+import threading
+import time
+
+
+def week_start(now: datetime) -> datetime:
+    """Monday 00:00 of the week containing ``now``"""
+    monday = now - timedelta(days=now.weekday())
+    return monday.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class WeekBoundary:
+    """Current week start, recomputed only once the week boundary has passed"""
+
+    def __init__(self, now: Callable[[], datetime] = datetime.now,
+                 clock: Callable[[], float] = time.time):
+        self._now = now
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._start = ''
+        self._end = ''
+        self._next_boundary = 0.0
+        self._monday = None
+        self._weeks: Dict[int, Tuple[str, str]] = {}
+        self._refresh()
+
+    def _refresh(self) -> None:
+        with self._lock:
+            now = self._now()
+            monday = week_start(now)
+            self._start = monday.strftime('%Y-%m-%d')
+            self._end = (monday + timedelta(days=6)).strftime('%Y-%m-%d')
+            self._monday = monday
+            self._weeks = {}
+            # Timestamps, not wall-clock subtraction, so a DST change during the week is counted
+            self._next_boundary = self._clock() + (monday + timedelta(days=7)).timestamp() - now.timestamp()
+
+    def _check(self) -> None:
+        if self._clock() >= self._next_boundary:
+            self._refresh()
+
+    @property
+    def current_start(self) -> str:
+        """YYYY-MM-DD of this week's Monday"""
+        self._check()
+        return self._start
+
+    def current_week(self) -> Tuple[str, str]:
+        """(Monday, Sunday) of this week as YYYY-MM-DD"""
+        self._check()
+        return self._start, self._end
+
+    def week(self, offset: int) -> Tuple[str, str]:
+        """(Monday, Sunday) of the week ``offset`` weeks from this one"""
+        self._check()
+        week = self._weeks.get(offset)
+        if week is None:
+            monday = self._monday + timedelta(weeks=offset)
+            week = self._weeks[offset] = (
+                monday.strftime('%Y-%m-%d'), (monday + timedelta(days=6)).strftime('%Y-%m-%d')
+            )
+        return week
+
+    def seconds_until_boundary(self) -> float:
+        """Seconds until next Monday 00:00"""
+        self._check()
+        return max(0.0, self._next_boundary - self._clock())
@@ -0,0 +1,352 @@
+"""
+Worker availability compiled for fast shift checks
+
+Each worker's availability_rule rows become one weekly bitmap of 15-minute
+slots (an int, bit ``weekday * 96 + slot`` with weekday 0 = Sunday as in the
+rules table), with is_full_day and wraps_midnight expanded. Their
+unavailability_periods become merged, sorted date-ordinal intervals. A shift
+is then checked with one mask AND and one binary search.
+
+UnavailabilityIndex answers date and date-range questions about
+unavailability_periods for the whole workforce without going back to the
+database.
+"""
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+from bisect import bisect_right
+from datetime import date, datetime, time
+import hashlib
+import json
+import logging
+import threading
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+FULL_WEEK = (1 << SLOTS_PER_WEEK) - 1
+
+# Rebuild the cached index at least this often, to pick up changes made by other processes
+AVAILABILITY_TTL_SECONDS = 300
+# After a failed load, wait this long before querying the database again
+AVAILABILITY_RETRY_SECONDS = 30
+
+
+def _minutes(value: Any) -> int:
+    """Minutes since midnight of a time, 'HH:MM' or 'HH:MM:SS' ('24:00' is 1440)"""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    parts = str(value).split(':')
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def _ordinal(value: Any) -> int:
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def slot_mask(start_slot: int, end_slot: int) -> int:
+    """Bits [start_slot, end_slot) of the week, wrapping from Saturday night into Sunday"""
+    if end_slot <= start_slot:
+        return 0
+    if end_slot - start_slot >= SLOTS_PER_WEEK:
+        return FULL_WEEK
+    length = end_slot - start_slot
+    mask = ((1 << length) - 1) << (start_slot % SLOTS_PER_WEEK)
+    return (mask | (mask >> SLOTS_PER_WEEK)) & FULL_WEEK
+
+
+def weekly_mask(rules: Iterable[Dict[str, Any]]) -> int:
+    """
+    Compile availability_rule rows into a weekly slot bitmap
+
+    Times are widened to whole slots. A rule that wraps midnight (or ends at
+    or before it starts) runs on into the next weekday.
+    """
+    mask = 0
+    for rule in rules:
+        day_slot = int(rule['weekday']) % 7 * SLOTS_PER_DAY
+        if rule.get('is_full_day'):
+            mask |= slot_mask(day_slot, day_slot + SLOTS_PER_DAY)
+            continue
+        if rule.get('from_time') is None or rule.get('to_time') is None:
+            continue
+        start = _minutes(rule['from_time'])
+        end = _minutes(rule['to_time'])
+        if rule.get('wraps_midnight') or end <= start:
+            end += 24 * 60
+        mask |= slot_mask(day_slot + start // SLOT_MINUTES, day_slot - (-end // SLOT_MINUTES))
+    return mask
+
+
+def merge_periods(periods: Iterable[Dict[str, Any]]) -> List[Tuple[int, int, str]]:
+    """unavailability_periods rows as sorted, merged (from, to, reason) date ordinals, inclusive"""
+    spans = sorted(
+        (_ordinal(p['from_date']), _ordinal(p['to_date']), p.get('reason') or 'Other')
+        for p in periods
+    )
+    merged: List[Tuple[int, int, str]] = []
+    for start, end, reason in spans:
+        if end < start:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            previous = merged[-1]
+            merged[-1] = (previous[0], max(previous[1], end), previous[2])
+        else:
+            merged.append((start, end, reason))
+    return merged
+
+
+class WorkerAvailability:
+    """One worker's compiled weekly availability and unavailable dates"""
+
+    __slots__ = ('mask', 'periods', '_starts')
+
+    def __init__(self, mask: Optional[int], periods: List[Tuple[int, int, str]]):
+        # None when the worker has no availability rules, i.e. no weekly restriction
+        self.mask = mask
+        self.periods = periods
+        self._starts = [p[0] for p in periods]
+
+    def unavailable_period(self, first_day: int, last_day: int) -> Optional[Tuple[int, int, str]]:
+        """The unavailability period covering any date in [first_day, last_day], if one does"""
+        i = bisect_right(self._starts, last_day) - 1
+        if i >= 0 and self.periods[i][1] >= first_day:
+            return self.periods[i]
+        return None
+
+    def covers(self, day: int, start: int, end_offset: int) -> bool:
+        """
+        Whether the weekly rules cover a stretch of time
+
+        Args:
+            day: Date ordinal the stretch starts on
+            start: Start, in minutes since that midnight
+            end_offset: End, in minutes since that midnight (past 1440 for overnight)
+        """
+        if self.mask is None:
+            return True
+        # Ordinal 1 (0001-01-01) is a Monday, so ordinal % 7 gives 0 = Sunday like the rules table
+        day_slot = day % 7 * SLOTS_PER_DAY
+        needed = slot_mask(day_slot + start // SLOT_MINUTES, day_slot - (-end_offset // SLOT_MINUTES))
+        return needed & ~self.mask == 0
+
+
+class AvailabilityIndex:
+    """Compiled availability for a set of workers"""
+
+    def __init__(self, workers: Dict[str, WorkerAvailability]):
+        self.workers = workers
+        # Changes whenever any worker's compiled availability does
+        payload = json.dumps(
+            sorted((worker_id, w.mask, w.periods) for worker_id, w in workers.items()), default=str
+        )
+        self.fingerprint = hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    @classmethod
+    def build(cls, rules: Iterable[Dict[str, Any]], periods: Iterable[Dict[str, Any]]) -> 'AvailabilityIndex':
+        """Compile availability_rule and unavailability_periods rows for every worker in them"""
+        rules_by_worker: Dict[str, List[Dict[str, Any]]] = {}
+        for rule in rules:
+            rules_by_worker.setdefault(str(rule['worker_id']), []).append(rule)
+        periods_by_worker: Dict[str, List[Dict[str, Any]]] = {}
+        for period in periods:
+            if period.get('worker_id') is not None:
+                periods_by_worker.setdefault(str(period['worker_id']), []).append(period)
+
+        workers = {}
+        for worker_id in rules_by_worker.keys() | periods_by_worker.keys():
+            try:
+                mask = weekly_mask(rules_by_worker[worker_id]) if worker_id in rules_by_worker else None
+                workers[worker_id] = WorkerAvailability(mask, merge_periods(periods_by_worker.get(worker_id, [])))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Skipping unreadable availability for worker {worker_id}: {e}")
+        return cls(workers)
+
+    def get(self, worker_id: Any) -> Optional[WorkerAvailability]:
+        return self.workers.get(str(worker_id))
+
+    def __len__(self) -> int:
+        return len(self.workers)
+
+
+class _IntervalNode:
+    """Centered interval tree node: the periods containing ``center``, plus subtrees"""
+
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+    def __init__(self, entries: List[Tuple[int, int, str, Dict[str, Any]]]):
+        points = sorted(p for entry in entries for p in entry[:2])
+        self.center = points[len(points) // 2]
+        here, left, right = [], [], []
+        for entry in entries:
+            if entry[1] < self.center:
+                left.append(entry)
+            elif entry[0] > self.center:
+                right.append(entry)
+            else:
+                here.append(entry)
+        self.by_start = sorted(here, key=lambda e: e[0])
+        self.by_end = sorted(here, key=lambda e: -e[1])
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+
+class UnavailabilityIndex:
+    """
+    unavailability_periods rows indexed for date and date-range queries
+
+    Periods sit in a centered interval tree for "who is unavailable at any
+    point in [from, to]", and per worker sorted by start with running
+    maximum ends for "is worker W unavailable on D". Both take O(log n)
+    plus the size of the answer. Rows are added and removed as periods are
+    created and deleted; the tree is rebuilt from memory each time.
+    """
+
+    def __init__(self, periods: Iterable[Dict[str, Any]] = ()):
+        self._rows: Dict[Any, Tuple[int, int, str, Dict[str, Any]]] = {}
+        self._anonymous = 0
+        for period in periods:
+            self._insert(period)
+        self._rebuild()
+
+    def _insert(self, period: Dict[str, Any]) -> bool:
+        try:
+            entry = (_ordinal(period['from_date']), _ordinal(period['to_date']), str(period['worker_id']), period)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Skipping unreadable unavailability period {period.get('id')}: {e}")
+            return False
+        if entry[1] < entry[0]:
+            return False
+        key = period.get('id')
+        if key is None:
+            self._anonymous += 1
+            key = ('anonymous', self._anonymous)
+        self._rows[key] = entry
+        return True
+
+    def _rebuild(self) -> None:
+        entries = list(self._rows.values())
+        by_worker: Dict[str, Tuple[List[int], List[int]]] = {}
+        grouped: Dict[str, List[Tuple[int, int, str, Dict[str, Any]]]] = {}
+        for entry in entries:
+            grouped.setdefault(entry[2], []).append(entry)
+        for worker_id, worker_entries in grouped.items():
+            worker_entries.sort(key=lambda e: e[0])
+            ends, latest = [], None
+            for entry in worker_entries:
+                latest = entry[1] if latest is None else max(latest, entry[1])
+                ends.append(latest)
+            by_worker[worker_id] = ([e[0] for e in worker_entries], ends)
+        # Swapped in whole so concurrent readers never see a half-built index
+        self._root = _IntervalNode(entries) if entries else None
+        self._by_worker = by_worker
+
+    def add(self, period: Dict[str, Any]) -> None:
+        """Index a newly created period"""
+        if self._insert(period):
+            self._rebuild()
+
+    def remove(self, period_id: Any) -> bool:
+        """Drop a deleted period; False if it wasn't indexed"""
+        key = next((k for k in (period_id, _as_int(period_id)) if k in self._rows), None)
+        if key is None:
+            return False
+        del self._rows[key]
+        self._rebuild()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def is_unavailable(self, worker_id: Any, on: Any) -> bool:
+        """Whether a worker has a period covering a date"""
+        entry = self._by_worker.get(str(worker_id))
+        if entry is None:
+            return False
+        starts, ends = entry
+        day = _ordinal(on)
+        i = bisect_right(starts, day) - 1
+        return i >= 0 and ends[i] >= day
+
+    def overlapping(self, from_date: Any, to_date: Any) -> List[Dict[str, Any]]:
+        """Period rows covering any date in [from_date, to_date], by start date"""
+        first, last = _ordinal(from_date), _ordinal(to_date)
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if last < node.center:
+                for entry in node.by_start:
+                    if entry[0] > last:
+                        break
+                    found.append(entry)
+                stack.append(node.left)
+            elif first > node.center:
+                for entry in node.by_end:
+                    if entry[1] < first:
+                        break
+                    found.append(entry)
+                stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                stack.extend((node.left, node.right))
+        found.sort(key=lambda e: (e[0], e[1], e[2]))
+        return [entry[3] for entry in found]
+
+    def unavailable_workers(self, from_date: Any, to_date: Any) -> Dict[str, List[Dict[str, Any]]]:
+        """{worker_id: [period rows]} for workers unavailable at any point in [from_date, to_date]"""
+        workers: Dict[str, List[Dict[str, Any]]] = {}
+        for period in self.overlapping(from_date, to_date):
+            workers.setdefault(str(period['worker_id']), []).append(period)
+        return workers
+
+
+def _as_int(value: Any) -> Any:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+# Cached index for the whole workforce: (built_at, index)
+_availability_index: Optional[Tuple[float, AvailabilityIndex]] = None
+_availability_failed_at: Optional[float] = None
+_availability_lock = threading.Lock()
+
+def get_availability_index(db: Any) -> AvailabilityIndex:
+    """
+    Compiled availability of every worker, loaded from the database
+
+    Rebuilt after invalidate_availability_index() and at least every
+    AVAILABILITY_TTL_SECONDS. If loading fails, the error is raised and
+    the database isn't asked again for AVAILABILITY_RETRY_SECONDS.
+    """
+    global _availability_index, _availability_failed_at
+    with _availability_lock:
+        now = monotonic()
+        if _availability_index is None or now - _availability_index[0] > AVAILABILITY_TTL_SECONDS:
+            if _availability_failed_at is not None and now - _availability_failed_at < AVAILABILITY_RETRY_SECONDS:
+                raise RuntimeError("Worker availability failed to load recently; retrying later")
+            try:
+                index = AvailabilityIndex.build(db.get_all_availability_rules(), db.get_all_unavailability_periods())
+            except Exception:
+                _availability_failed_at = now
+                raise
+            _availability_index = (now, index)
+            _availability_failed_at = None
+            logger.info(f"Compiled availability for {len(index)} workers")
+        return _availability_index[1]
+
+def invalidate_availability_index() -> None:
+    """Forget the cached index after availability rules or periods change"""
+    global _availability_index, _availability_failed_at
+    with _availability_lock:
+        _availability_index = None
+        _availability_failed_at = None
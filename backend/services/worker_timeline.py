@@ -0,0 +1,223 @@
+"""
+Shared per-worker timelines for validation rules
+
+Validators used to rebuild a worker -> shifts schedule inside every rule.
+build_timelines walks a roster's {participant_code: {date: [shifts]}} data
+once and gives each worker their shifts sorted by (date, start), grouped by
+day, with start/end minutes, day numbers and hour totals already computed.
+Rules in every validator read from the same structure. Daily, weekly and
+total hours come from one vectorized HoursTable pass over all workers.
+
+Each shift is normalized once to absolute minutes (abs_start/abs_end), so
+rest gaps and overnight spans are plain integer subtraction. Date and time
+strings repeat across shifts and validation runs; their parsed values are
+cached.
+"""
+from typing import Dict, List, Any, Iterable, Iterator, NamedTuple, Tuple
+from datetime import date as date_type, datetime
+from functools import lru_cache
+
+from .hours_aggregation import HoursTable, week_start
+from .shift_store import ShiftRecord
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class WorkerShift(NamedTuple):
+    """One shift as seen by one worker"""
+    participant: str
+    date: str
+    day: int            # date ordinal, so consecutive days differ by 1
+    start: int          # minutes since midnight
+    end: int
+    abs_start: int      # minutes since 0001-01-01, so shifts on any day compare directly
+    abs_end: int        # after abs_start; shifts ending at or before their start cross midnight
+    start_time: str
+    end_time: str
+    duration: float
+    shift_id: str
+    funding_category: str
+    is_split_shift: bool
+
+    @property
+    def shift_time(self) -> str:
+        return f"{self.start_time}-{self.end_time}"
+
+
+class WorkerTimeline:
+    """A worker's shifts in order, per day, with hour totals"""
+
+    __slots__ = ('worker_id', 'shifts', 'days', 'daily_hours', 'weekly_hours', 'total_hours')
+
+    def __init__(self, worker_id: Any):
+        self.worker_id = worker_id
+        self.shifts: List[WorkerShift] = []
+        self.days: Dict[str, List[WorkerShift]] = {}
+        self.daily_hours: Dict[str, float] = {}
+        self.weekly_hours: Dict[str, float] = {}   # Monday YYYY-MM-DD -> hours
+        self.total_hours = 0.0
+
+    def pairs(self) -> Iterator[Tuple[WorkerShift, WorkerShift]]:
+        """Each shift with the one after it"""
+        return zip(self.shifts, self.shifts[1:])
+
+    def rest_pairs(self) -> Iterator[Tuple[WorkerShift, WorkerShift, float]]:
+        """(shift, next shift, rest hours between them) for shifts on the same or consecutive days"""
+        for current, next_shift in zip(self.shifts, self.shifts[1:]):
+            if next_shift.day - current.day <= 1:
+                yield current, next_shift, (next_shift.abs_start - current.abs_end) / 60
+
+    def week_label(self, week: str) -> str:
+        """'in week of YYYY-MM-DD ' when the timeline spans several weeks, else ''"""
+        return f"in week of {week} " if len(self.weekly_hours) > 1 else ""
+
+    def week_shifts(self, week: str) -> List[WorkerShift]:
+        """Shifts in the Monday-Sunday week starting on ``week`` (YYYY-MM-DD)"""
+        monday = day_number(week)
+        return [shift for shift in self.shifts if week_start(shift.day) == monday]
+
+    def _finish(self, daily: Dict[int, float], weekly: Dict[int, float], total: float) -> None:
+        # Stable sort: shifts starting together keep roster order
+        self.shifts.sort(key=lambda s: (s.date, s.start))
+        for shift in self.shifts:
+            day_shifts = self.days.get(shift.date)
+            if day_shifts is None:
+                day_shifts = self.days[shift.date] = []
+                self.daily_hours[shift.date] = daily[shift.day]
+            day_shifts.append(shift)
+        self.weekly_hours = {
+            date_type.fromordinal(monday).isoformat(): hours for monday, hours in sorted(weekly.items())
+        }
+        self.total_hours = total
+
+
+@lru_cache(maxsize=4096)
+def time_to_minutes(time_str: str) -> int:
+    """Convert HH:MM to minutes since midnight"""
+    h, m = map(int, time_str.split(':'))
+    return h * 60 + m
+
+
+def absolute_span(day: int, start: int, end: int) -> Tuple[int, int]:
+    """(start, end) in minutes since 0001-01-01; an end at or before the start is the next day"""
+    abs_start = day * MINUTES_PER_DAY + start
+    return abs_start, abs_start + (end - start if end > start else end - start + MINUTES_PER_DAY)
+
+
+@lru_cache(maxsize=4096)
+def hour_of(time_str: str) -> int:
+    """Hour part of an H:MM / HH:MM time"""
+    return int(time_str.split(':')[0])
+
+
+@lru_cache(maxsize=4096)
+def day_number(date_str: str) -> int:
+    """Ordinal of a YYYY-MM-DD date"""
+    try:
+        return date_type.fromisoformat(date_str).toordinal()
+    except ValueError:
+        # Accepts unpadded dates such as 2025-1-5
+        return datetime.strptime(date_str, '%Y-%m-%d').toordinal()
+
+
+def worker_shift(participant: str, date: str, shift: Dict[str, Any]) -> WorkerShift:
+    """Normalize one roster shift dict on ``date``"""
+    day = day_number(date)
+    start = time_to_minutes(shift['startTime'])
+    end = time_to_minutes(shift['endTime'])
+    abs_start, abs_end = absolute_span(day, start, end)
+    return WorkerShift(
+        participant=participant,
+        date=date,
+        day=day,
+        start=start,
+        end=end,
+        abs_start=abs_start,
+        abs_end=abs_end,
+        start_time=shift['startTime'],
+        end_time=shift['endTime'],
+        duration=float(shift.get('duration', 0)),
+        shift_id=shift.get('id', 'unknown'),
+        funding_category=shift.get('funding_category', 'default'),
+        is_split_shift=shift.get('is_split_shift', False),
+    )
+
+
+def build_timelines(data: Dict[str, Any]) -> Dict[Any, WorkerTimeline]:
+    """
+    Walk a roster's data once into per-worker timelines
+
+    Args:
+        data: {participant_code: {date: [shifts]}}
+
+    Returns:
+        {worker_id: WorkerTimeline}, worker IDs exactly as they appear on shifts
+    """
+    timelines: Dict[Any, WorkerTimeline] = {}
+    for p_code, dates in data.items():
+        for date, shifts in dates.items():
+            for shift in shifts:
+                worker_ids = shift.get('workers', [])
+                if not worker_ids:
+                    continue
+                entry = worker_shift(p_code, date, shift)
+                for worker_id in worker_ids:
+                    timeline = timelines.get(worker_id)
+                    if timeline is None:
+                        timeline = timelines[worker_id] = WorkerTimeline(worker_id)
+                    timeline.shifts.append(entry)
+    return _finish_timelines(timelines)
+
+
+def record_shift(record: ShiftRecord) -> WorkerShift:
+    """Normalize one ShiftTable record, reusing its parsed start/end minutes"""
+    if record.start_minutes is None or record.end_minutes is None:
+        raise ValueError(f"Invalid shift times: {record.start_time}-{record.end_time}")
+    day = day_number(record.day)
+    abs_start, abs_end = absolute_span(day, record.start_minutes, record.end_minutes)
+    return WorkerShift(
+        participant=record.participant,
+        date=record.day,
+        day=day,
+        start=record.start_minutes,
+        end=record.end_minutes,
+        abs_start=abs_start,
+        abs_end=abs_end,
+        start_time=record.start_time,
+        end_time=record.end_time,
+        duration=record.hours,
+        shift_id=record.get('id', 'unknown'),
+        funding_category=record.get('funding_category', 'default'),
+        is_split_shift=record.get('is_split_shift', False),
+    )
+
+
+def build_timelines_from_records(records: Iterable[ShiftRecord]) -> Dict[Any, WorkerTimeline]:
+    """
+    build_timelines over a ShiftTable's records instead of the nested dicts
+
+    Records without a parseable date or times can't be placed on a timeline
+    and are skipped.
+    """
+    timelines: Dict[Any, WorkerTimeline] = {}
+    for record in records:
+        if not record.workers:
+            continue
+        try:
+            entry = record_shift(record)
+        except (TypeError, ValueError):
+            continue
+        for worker_id in record.workers:
+            timeline = timelines.get(worker_id)
+            if timeline is None:
+                timeline = timelines[worker_id] = WorkerTimeline(worker_id)
+            timeline.shifts.append(entry)
+    return _finish_timelines(timelines)
+
+
+def _finish_timelines(timelines: Dict[Any, WorkerTimeline]) -> Dict[Any, WorkerTimeline]:
+    hours = HoursTable.from_timelines(timelines)
+    daily, weekly, totals = hours.daily(), hours.weekly(), hours.totals()
+    for worker_id, timeline in timelines.items():
+        timeline._finish(daily[worker_id], weekly[worker_id], totals[worker_id])
+    return timelines
@@ -1,6 +1,9 @@
 #!/bin/bash
 # Start Sunday Copy Scheduler
+#
+# Deprecated: the API server now runs the week transition itself at the
+# Monday 00:00 boundary. Only start this when the API server is not running.
 
 cd "$(dirname "$0")"
 source venv/bin/activate
-python sunday_copy_scheduler.py
+python sunday_copy_scheduler.py --standalone
@@ -2,15 +2,20 @@
 """
 Sunday 3am Week Transition Scheduler
 Automatically transitions roster data every Sunday at 3am
+
+DEPRECATED: the API server (server.py) now transitions weeks itself at the
+Monday 00:00 boundary, under a lock. Running this process alongside it races
+with the server's writes, so it only starts with --standalone.
 """
 
 import schedule
 import time
 import logging
-import json
 import sys
 from datetime import datetime, timedelta
-from pathlib import Path
+
+from services.roster_store import get_roster_store
+from services.roster_archive import get_roster_archive
 
 # Configure logging
 logging.basicConfig(
@@ -52,26 +57,27 @@ def get_week_after_next_dates():
     week_after_sunday = week_after_monday + timedelta(days=6)
     return week_after_monday.strftime('%Y-%m-%d'), week_after_sunday.strftime('%Y-%m-%d')
 
+# Same store (and write lock) as the API server
+ROSTER_STORE = get_roster_store()
+
 def load_roster_data():
-    """Load roster data from file"""
-    roster_file = Path(__file__).parent / 'roster_data.json'
-    if not roster_file.exists():
-        logger.error("Roster data file not found!")
-        return {}
-    
+    """Open the per-section roster store"""
     try:
-        with open(roster_file, 'r') as f:
-            return json.load(f)
+        store = ROSTER_STORE.open()
     except Exception as e:
         logger.error(f"Error loading roster data: {e}")
         return {}
+    
+    if not len(store):
+        logger.error("Roster data file not found!")
+        return {}
+    return store
 
 def save_roster_data(data):
-    """Save roster data to file"""
-    roster_file = Path(__file__).parent / 'roster_data.json'
+    """Journal the transitioned week sections"""
     try:
-        with open(roster_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        for key in ('roster', 'roster_next', 'roster_after'):
+            ROSTER_STORE.save(key)
         logger.info("Roster data saved successfully")
         return True
     except Exception as e:
@@ -89,61 +95,66 @@ def perform_week_transition():
             logger.error("No roster data to transition")
             return False
         
-        # Get correct dates
-        current_start, current_end = get_current_week_dates()
-        next_start, next_end = get_next_week_dates()
-        after_start, after_end = get_week_after_next_dates()
+        # Hold the store's write lock so a running API server can't transition at the same time
+        with ROSTER_STORE.transaction('roster', 'roster_next', 'roster_after'):
+            # Get correct dates
+            current_start, current_end = get_current_week_dates()
+            next_start, next_end = get_next_week_dates()
+            after_start, after_end = get_week_after_next_dates()
         
-        logger.info(f"📅 Transitioning to week: {current_start} to {current_end}")
+            logger.info(f"📅 Transitioning to week: {current_start} to {current_end}")
         
-        # Check if transition is needed
-        current_roster = data.get('roster', {})
-        if current_roster.get('start_date') == current_start:
-            logger.info("✅ Week transition already up to date")
-            return True
+            # Check if transition is needed
+            current_roster = data.get('roster', {})
+            if current_roster.get('start_date') == current_start:
+                logger.info("✅ Week transition already up to date")
+                return True
         
-        # Move next week data to current week
-        next_roster = data.get('roster_next', {})
-        if not next_roster.get('data'):
-            logger.warning("⚠️ No next week data available for transition")
-            return False
+            # Move next week data to current week
+            next_roster = data.get('roster_next', {})
+            if not next_roster.get('data'):
+                logger.warning("⚠️ No next week data available for transition")
+                return False
         
-        logger.info("📋 Moving next week data to current week...")
-        data['roster'] = {
-            'week_type': next_roster.get('week_type', 'weekA'),
-            'start_date': current_start,
-            'end_date': current_end,
-            'data': next_roster.get('data', {})
-        }
+            # Keep the outgoing week in the archive before it's replaced
+            get_roster_archive().archive(current_roster)
+            
+            logger.info("📋 Moving next week data to current week...")
+            data['roster'] = {
+                'week_type': next_roster.get('week_type', 'weekA'),
+                'start_date': current_start,
+                'end_date': current_end,
+                'data': next_roster.get('data', {})
+            }
         
-        # Move week after data to next week
-        after_roster = data.get('roster_after', {})
-        logger.info("📋 Moving week after data to next week...")
-        data['roster_next'] = {
-            'week_type': after_roster.get('week_type', 'weekA'),
-            'start_date': next_start,
-            'end_date': next_end,
-            'data': after_roster.get('data', {})
-        }
+            # Move week after data to next week
+            after_roster = data.get('roster_after', {})
+            logger.info("📋 Moving week after data to next week...")
+            data['roster_next'] = {
+                'week_type': after_roster.get('week_type', 'weekA'),
+                'start_date': next_start,
+                'end_date': next_end,
+                'data': after_roster.get('data', {})
+            }
         
-        # Clear week after for new planning
-        data['roster_after'] = {
-            'week_type': 'weekA',
-            'start_date': after_start,
-            'end_date': after_end,
-            'data': {}
-        }
+            # Clear week after for new planning
+            data['roster_after'] = {
+                'week_type': 'weekA',
+                'start_date': after_start,
+                'end_date': after_end,
+                'data': {}
+            }
         
-        # Save the transitioned data
-        if save_roster_data(data):
-            logger.info("✅ Week transition completed successfully!")
-            logger.info(f"   Current week: {current_start} to {current_end}")
-            logger.info(f"   Next week: {next_start} to {next_end}")
-            logger.info(f"   Week after: {after_start} to {after_end}")
-            return True
-        else:
-            logger.error("❌ Failed to save transitioned data")
-            return False
+            # Save the transitioned data
+            if save_roster_data(data):
+                logger.info("✅ Week transition completed successfully!")
+                logger.info(f"   Current week: {current_start} to {current_end}")
+                logger.info(f"   Next week: {next_start} to {next_end}")
+                logger.info(f"   Week after: {after_start} to {after_end}")
+                return True
+            else:
+                logger.error("❌ Failed to save transitioned data")
+                return False
             
     except Exception as e:
         logger.error(f"❌ Error during week transition: {e}")
@@ -156,6 +167,13 @@ def test_transition():
 
 def main():
     """Main scheduler function"""
+    if '--standalone' not in sys.argv:
+        logger.warning(
+            "⚠️ Week transitions now run inside the API server at the week boundary; "
+            "this scheduler is deprecated. Use --standalone only when the API server is not running."
+        )
+        return
+    
     logger.info("🚀 Starting Sunday 3am Week Transition Scheduler")
     logger.info("📅 Will run every Sunday at 3:00 AM")
     
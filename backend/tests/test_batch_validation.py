@@ -0,0 +1,147 @@
+"""
+Tests for whole-batch shift validation
+"""
+import asyncio
+from services.batch_validation import BatchValidationService, BatchValidationRequest
+
+
+def shift(shift_id, participant, date, start, end, duration, workers):
+    return {"id": shift_id, "participant": participant, "date": date, "startTime": start,
+            "endTime": end, "duration": duration, "workers": workers, "ratio": "1:1"}
+
+
+def validate(shifts, **options):
+    request = BatchValidationRequest(shifts=shifts, workers={"1": {"full_name": "A"}}, participants={},
+                                     template_validation=False, **options)
+    result = asyncio.run(BatchValidationService().validate_batch(request))
+    return {r["shift_id"]: r for r in result.results}
+
+
+def enhanced(result):
+    return next(v for v in result["validations"] if v["type"] == "enhanced")
+
+
+def test_cross_shift_rules_see_the_whole_batch():
+    results = validate([
+        shift("a", "P001", "2025-10-20", "09:00", "13:00", 4, ["1"]),
+        shift("b", "P002", "2025-10-20", "12:00", "16:00", 4, ["1"]),
+        shift("c", "P001", "2025-10-21", "09:00", "11:00", 2, ["2"]),
+    ], smart_validation=False, participant_specific=False)
+
+    assert results["a"]["status"] == "error"
+    assert any("double-booked" in e for e in enhanced(results["a"])["errors"])
+    assert any("double-booked" in e for e in enhanced(results["b"])["errors"])
+    assert results["c"]["status"] == "success"
+    assert enhanced(results["c"])["errors"] == []
+
+
+def test_findings_are_reported_on_the_shifts_they_concern():
+    night = dict(shift("night", "P001", "2025-10-22", "22:00", "06:00", 8, ["1"]), ratio="2:1")
+    results = validate([
+        shift("a", "P001", "2025-10-20", "06:00", "15:00", 9, ["1"]),
+        shift("b", "P002", "2025-10-20", "14:00", "22:00", 8, ["1"]),
+        shift("c", "P001", "2025-10-22", "09:00", "11:00", 2, ["1"]),
+        night,
+    ], smart_validation=False, participant_specific=False)
+
+    conflict = [e for e in enhanced(results["a"])["errors"] if "double-booked" in e]
+    assert len(conflict) == 1 and enhanced(results["b"])["errors"] == conflict
+    assert any("DAILY LIMIT" in w for w in enhanced(results["b"])["warnings"])
+    assert enhanced(results["c"])["errors"] == []
+    assert not any("DAILY LIMIT" in w or "OVERNIGHT" in w for w in enhanced(results["c"])["warnings"])
+    assert any("OVERNIGHT UNDERSTAFFED" in w for w in enhanced(results["night"])["warnings"])
+
+
+def test_bad_shift_only_fails_itself():
+    results = validate([
+        shift("ok", "P001", "2025-10-20", "09:00", "13:00", 4, ["1"]),
+        shift("bad", "P001", "not-a-date", "09:00", "13:00", 4, ["1"]),
+    ], smart_validation=False, participant_specific=False)
+
+    assert results["ok"]["status"] == "success"
+    assert results["bad"]["status"] == "error"
+    assert "Invalid shift date/time" in enhanced(results["bad"])["error"]
+
+
+def test_schedules_are_shared_in_time_order():
+    from services.batch_validation import BatchContext
+    from services.participant_validation_config import ParticipantValidationManager
+
+    shifts = [
+        shift("late", "P001", "2025-10-21", "09:00", "13:00", 4, ["1"]),
+        shift("early", "P002", "2025-10-20", "09:00", "13:00", 4, ["1", "2"]),
+        shift("other", "P002", "2025-10-20", "14:00", "15:00", 1, ["2"]),
+    ]
+    context = BatchContext(shifts, {}, {}, ParticipantValidationManager("/nonexistent.json"))
+
+    assert [s["id"] for s in context.worker_schedule(0)] == ["early"]
+    assert [s["id"] for s in context.worker_schedule(1)] == ["other", "late"]
+    assert [s["id"] for s in context.worker_schedule(0, preceding_only=True)] == ["early"]
+    assert context.worker_schedule(1, preceding_only=True) == []
+
+
+def test_shared_shifts_are_checked_per_worker():
+    shifts = [shift("pair", "P001", "2025-10-24", "09:00", "17:00", 8, ["1", "2"])]
+    for worker in ["1", "2"]:
+        shifts += [shift(f"{worker}-{day}", "P002", f"2025-10-{day}", "09:00", "17:00", 8, [worker])
+                   for day in (20, 21, 22)]
+    results = validate(shifts, participant_specific=False)
+
+    smart = next(v for v in results["pair"]["validations"] if v["type"] == "smart")
+    assert "weekly_limit_exceeded" not in {r["rule_id"] for r in smart["results"]}
+
+
+def test_partitions_keep_shared_workers_and_cells_together():
+    from services.batch_validation import partition_batch
+
+    shifts = [
+        shift("a", "P1", "2025-10-20", "09:00", "10:00", 1, ["1"]),
+        shift("b", "P2", "2025-10-20", "09:00", "10:00", 1, ["2"]),
+        shift("c", "P3", "2025-10-20", "09:00", "10:00", 1, ["1", "3"]),
+        shift("d", "P4", "2025-10-20", "09:00", "10:00", 1, ["3"]),
+        shift("e", "P5", "2025-10-20", "09:00", "10:00", 1, []),
+        shift("f", "P6", "2025-10-21", "09:00", "10:00", 1, ["4"]),
+        shift("g", "P6", "2025-10-21", "11:00", "12:00", 1, ["5"]),
+    ]
+    partitions = partition_batch(shifts, 4)
+
+    assert sorted(i for p in partitions for i in p) == [0, 1, 2, 3, 4, 5, 6]
+    assert [0, 2, 3] in partitions and [5, 6] in partitions
+    assert len(partitions) == 4
+
+
+def test_process_pool_matches_single_pass(monkeypatch):
+    import random
+    import services.batch_validation as module
+
+    random.seed(5)
+    shifts = []
+    for i in range(120):
+        start = random.randint(0, 20)
+        worker = random.randint(1, 12)
+        shifts.append(shift(f"s{i}", f"P{worker % 4}", f"2025-10-{20 + i % 7}", f"{start:02d}:00",
+                            f"{start + 3:02d}:00", 3, [str(worker)]))
+    del shifts[5]["id"]
+    request = BatchValidationRequest(shifts=shifts, workers={}, participants={}, template_validation=False)
+
+    service = BatchValidationService()
+    expected = asyncio.run(service.validate_batch(request)).results
+
+    monkeypatch.setattr(module, "PARALLEL_MIN_SHIFTS", 10)
+    service.processes = 2
+
+    async def stream():
+        return [event async for event in service.stream_batch(request)]
+
+    try:
+        events = asyncio.run(stream())
+        parallel = asyncio.run(service.validate_batch(request)).results
+    finally:
+        service.close()
+
+    assert events[0]["event"] == "start" and events[0]["partitions"] > 1
+    assert events[-1]["event"] == "complete" and events[-1]["total_shifts"] == 120
+    streamed = [r for event in events if event["event"] == "partition" for r in event["results"]]
+    assert sorted(streamed, key=lambda r: r["shift_id"]) == sorted(expected, key=lambda r: r["shift_id"])
+    assert parallel == expected
+    assert expected[5]["shift_id"] == "shift_5"
@@ -0,0 +1,69 @@
+"""
+Tests for vectorized hour aggregation
+"""
+import random
+from datetime import date
+from services.hours_aggregation import HoursTable, week_start
+from services.worker_timeline import build_timelines
+from validation_rules import RosterValidator
+from services.enhanced_validation_service import EnhancedValidationService
+
+
+def shift(start, duration, workers):
+    return {"id": f"s{random.random()}", "startTime": start, "endTime": "23:00", "duration": duration, "workers": workers}
+
+
+def test_grouped_sums_match_python_loops():
+    random.seed(3)
+    rows = [(random.choice(["1", "2", 3]), date(2025, 10, random.randint(1, 28)).toordinal(), random.choice([1, 2.5, 8]))
+            for _ in range(500)]
+    table = HoursTable(*zip(*rows))
+
+    daily, weekly, totals = {}, {}, {}
+    for worker, day, hours in rows:
+        daily.setdefault(worker, {}).setdefault(day, 0.0)
+        daily[worker][day] += hours
+        weekly.setdefault(worker, {}).setdefault(week_start(day), 0.0)
+        weekly[worker][week_start(day)] += hours
+        totals[worker] = totals.get(worker, 0.0) + hours
+
+    assert table.daily() == daily
+    assert table.weekly() == weekly
+    assert table.totals() == totals
+    assert HoursTable([], [], []).daily() == {}
+
+
+def test_weeks_run_monday_to_sunday():
+    assert date.fromordinal(week_start(date(2025, 10, 26).toordinal())) == date(2025, 10, 20)
+    assert date.fromordinal(week_start(date(2025, 10, 27).toordinal())) == date(2025, 10, 27)
+
+
+def test_flat_shifts_for_reports():
+    table = HoursTable.from_shifts([
+        {"duration": 8.0, "workers": ["w1"], "date": "2025-10-20"},
+        {"duration": 6.0, "workers": ["w1", "w2"]},
+        {"duration": 1.0, "workers": ["w2"], "date": "20/10/2025"},
+    ])
+
+    assert table.totals() == {"w1": 14.0, "w2": 7.0}
+    assert table.total() == 21.0
+
+
+def test_weekly_limits_apply_per_week():
+    data = {"P001": {
+        "2025-10-24": [shift("09:00", 10, ["1"])],
+        "2025-10-27": [shift("09:00", 10, ["1"])],
+        "2025-10-28": [shift("09:00", 12, ["1"])],
+    }}
+    timeline = build_timelines(data)["1"]
+
+    assert timeline.weekly_hours == {"2025-10-20": 10.0, "2025-10-27": 22.0}
+    assert timeline.total_hours == 32.0
+
+    errors, _ = RosterValidator(data, {"1": {"full_name": "A", "max_hours": 20}}).validate_all()
+    limit_errors = [e for e in errors if "MAX HOURS" in e]
+    assert limit_errors == ["❌ MAX HOURS EXCEEDED: A has 22.0h in week of 2025-10-27 (max: 20h)"]
+
+    service = EnhancedValidationService({"1": {"full_name": "A"}}, {"max_daily_hours": 16, "max_weekly_hours": 20})
+    service.check_continuous_hours({"data": data})
+    assert service.warnings == ["⚠️ WEEKLY LIMIT: A has 22.0h in week of 2025-10-27 (max recommended: 20h)"]
@@ -0,0 +1,106 @@
+"""
+Tests for incremental roster validation
+"""
+import copy
+from services.incremental_validation import IncrementalValidator, workers_in_cells
+from services.enhanced_validation_service import EnhancedValidationService
+from services.roster_index import RosterIndex, changed_cells
+from services.roster_store import diff_ops
+
+
+WORKERS = {
+    "1": {"id": 1, "full_name": "Alice", "max_hours": 10},
+    "2": {"id": 2, "full_name": "Bob"},
+    "3": {"id": 3, "full_name": "Cara"},
+}
+
+CONFIG = EnhancedValidationService({})._get_default_config()
+
+DATA = {
+    "P001": {
+        "2025-10-20": [
+            {"id": "s1", "startTime": "09:00", "endTime": "17:00", "duration": 8, "workers": ["1", "2"]},
+            {"id": "s2", "startTime": "22:00", "endTime": "06:00", "duration": 8, "ratio": "2:1", "workers": ["3"]}
+        ]
+    },
+    "P002": {
+        "2025-10-20": [{"id": "s3", "startTime": "16:00", "endTime": "18:00", "duration": 2, "workers": ["1"]}],
+        "2025-10-21": [{"id": "s4", "startTime": "09:00", "endTime": "11:00", "duration": 2, "workers": ["2"]}]
+    }
+}
+
+
+def full_result(data):
+    return EnhancedValidationService(WORKERS, CONFIG).validate_roster_data({"data": data})
+
+
+def save(validator, index, old, new):
+    cells = changed_cells(diff_ops(["roster"], {"data": old}, {"data": new}), old, new)
+    index.update(new, cells)
+    validator.mark_changed("roster", cells, old)
+    return cells
+
+
+def test_full_run_matches_enhanced_validation():
+    result = IncrementalValidator().validate("roster", DATA, RosterIndex.build(DATA), WORKERS, CONFIG)
+    expected = full_result(DATA)
+
+    assert sorted(result["errors"]) == sorted(expected["errors"])
+    assert sorted(result["warnings"]) == sorted(expected["warnings"])
+    assert result["valid"] is False
+
+
+def test_revalidates_only_changed_workers_and_merges_cache():
+    validator = IncrementalValidator()
+    index = RosterIndex.build(DATA)
+    validator.validate("roster", DATA, index, WORKERS, CONFIG)
+
+    data = copy.deepcopy(DATA)
+    data["P002"]["2025-10-20"] = [{"id": "s3", "startTime": "18:00", "endTime": "20:00", "duration": 2, "workers": ["2"]}]
+    cells = save(validator, index, DATA, data)
+
+    assert cells == {("P002", "2025-10-20")}
+    assert workers_in_cells(DATA, cells) | workers_in_cells(data, cells) == {"1", "2"}
+
+    result = validator.validate("roster", data, index, WORKERS, CONFIG)
+    expected = full_result(data)
+    assert sorted(result["errors"]) == sorted(expected["errors"])
+    assert sorted(result["warnings"]) == sorted(expected["warnings"])
+    assert sorted(result["info"]) == sorted(expected["info"])
+
+
+def test_untouched_workers_are_not_rerun(monkeypatch):
+    validator = IncrementalValidator()
+    index = RosterIndex.build(DATA)
+    validator.validate("roster", DATA, index, WORKERS, CONFIG)
+
+    data = copy.deepcopy(DATA)
+    data["P002"]["2025-10-21"][0]["endTime"] = "12:00"
+    save(validator, index, DATA, data)
+
+    seen = []
+    original = EnhancedValidationService.check_worker_conflicts
+
+    def spy(self, roster_data):
+        for dates in roster_data["data"].values():
+            for shifts in dates.values():
+                for shift in shifts:
+                    seen.extend(shift["workers"])
+        return original(self, roster_data)
+
+    monkeypatch.setattr(EnhancedValidationService, "check_worker_conflicts", spy)
+    validator.validate("roster", data, index, WORKERS, CONFIG)
+
+    assert set(seen) == {"2"}
+
+
+def test_changed_workers_invalidate_cache():
+    validator = IncrementalValidator()
+    index = RosterIndex.build(DATA)
+    validator.validate("roster", DATA, index, WORKERS, CONFIG)
+
+    workers = copy.deepcopy(WORKERS)
+    workers["1"]["max_hours"] = 40
+    result = validator.validate("roster", DATA, index, workers, CONFIG)
+
+    assert not any("WEEKLY LIMIT EXCEEDED" in error for error in result["errors"])
@@ -0,0 +1,85 @@
+"""
+Tests for participant validation configs and schedule-based participant rules
+"""
+import json
+import os
+from services.participant_validation_config import ParticipantValidationManager, ParticipantValidationLevel
+from services.shift_conflicts import ScheduleIndex
+
+
+def shift(shift_id, date, start, end, duration, **extra):
+    return {"id": shift_id, "participant": "P001", "date": date, "startTime": start,
+            "endTime": end, "duration": duration, "workers": ["1"], **extra}
+
+
+def write_configs(path, **overrides):
+    config = {"participant_id": "P001", "participant_name": "Pat", "validation_level": "standard", **overrides}
+    path.write_text(json.dumps({"configs": [config]}))
+
+
+def fields(results):
+    return [r["field"] for r in results]
+
+
+def test_configs_reload_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "participants.json"
+    write_configs(path, min_rest_hours=8.0)
+    manager = ParticipantValidationManager(str(path))
+    rules = manager.get_rules("P001")
+
+    assert manager.refresh() is False
+    assert manager.get_rules("P001") is rules
+
+    write_configs(path, min_rest_hours=11.0)
+    os.utime(path, ns=(0, 10**18))
+    assert manager.get_rules("P001").config.min_rest_hours == 11.0
+
+    manager.apply_validation_level("P001", ParticipantValidationLevel.RELAXED)
+    manager.save_configs_to_file()
+    assert manager.refresh() is False
+    assert manager.get_rules("P001").config.min_rest_hours == 4.0
+
+
+def test_rules_use_the_worker_schedule(tmp_path):
+    manager = ParticipantValidationManager(str(tmp_path / "missing.json"))
+    schedule = ScheduleIndex.from_dicts([
+        shift("night", "2025-10-20", "22:00", "06:00", 8),
+        shift("day", "2025-10-21", "10:00", "14:00", 4),
+        shift("late", "2025-10-21", "14:00", "20:00", 6),
+        shift("evening", "2025-10-21", "21:00", "23:00", 2),
+        shift("other-week", "2025-10-28", "10:00", "14:00", 4),
+    ])
+
+    day = shift("day", "2025-10-21", "10:00", "14:00", 4)
+
+    results = manager.validate_participant_shift("P001", day, schedule)
+    assert fields(results) == ["rest_period"]
+    assert results[0]["message"] == "Insufficient rest: 4.0h (minimum: 8.0h)"
+
+    config = manager.get_config("P001")
+    config.max_continuous_hours = 9.0
+    config.max_daily_hours = 11.0
+    manager.update_config(config)
+    results = manager.validate_participant_shift("P001", day, schedule)
+    assert fields(results) == ["rest_period", "continuous_hours", "daily_hours"]
+    assert "10.0h" in results[1]["message"] and "12.0h" in results[2]["message"]
+
+
+def test_meal_break_is_checked_only_when_recorded(tmp_path):
+    manager = ParticipantValidationManager(str(tmp_path / "missing.json"))
+    schedule = ScheduleIndex.from_dicts([shift("late", "2025-10-20", "12:00", "15:00", 3)])
+
+    assert manager.validate_participant_shift("P001", shift("a", "2025-10-20", "09:00", "17:00", 8), []) == []
+    assert manager.validate_participant_shift("P001", shift("a", "2025-10-20", "09:00", "17:00", 8, break_minutes=30), []) == []
+    assert fields(manager.validate_participant_shift("P001", shift("a", "2025-10-20", "09:00", "17:00", 8, break_minutes=15), [])) == ["meal_break"]
+    assert fields(manager.validate_participant_shift("P001", shift("a", "2025-10-20", "09:00", "12:00", 3, break_minutes=0), schedule)) == ["meal_break"]
+
+
+def test_weekend_restriction_reads_the_date(tmp_path):
+    manager = ParticipantValidationManager(str(tmp_path / "missing.json"))
+    config = manager.get_or_create_config("P001")
+    config.weekend_restriction = True
+    manager.update_config(config)
+
+    assert fields(manager.validate_participant_shift("P001", shift("a", "2025-10-25", "09:00", "12:00", 3), [])) == ["weekend"]
+    assert manager.validate_participant_shift("P001", shift("a", "2025-10-24", "09:00", "12:00", 3), []) == []
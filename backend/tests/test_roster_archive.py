@@ -0,0 +1,82 @@
+"""
+Tests for the compressed roster archive
+"""
+import gzip
+import json
+from datetime import date
+import pytest
+from services.roster_archive import RosterArchive
+
+
+def week(start, end, dates):
+    return {
+        "week_type": "weekA",
+        "start_date": start,
+        "end_date": end,
+        "data": {"P001": {d: [{"id": f"s-{d}", "startTime": "09:00", "endTime": "17:00", "workers": ["1"]}] for d in dates}}
+    }
+
+
+def test_one_compressed_record_per_week(tmp_path):
+    archive = RosterArchive(tmp_path)
+    archive.archive(week("2025-10-20", "2025-10-26", ["2025-10-20", "2025-10-26"]))
+    archive.archive(week("2025-10-27", "2025-11-02", ["2025-10-28"]))
+
+    assert archive.weeks() == ["2025-10-20", "2025-10-27"]
+    with gzip.open(tmp_path / "2025-10-20.json.gz", "rb") as f:
+        assert json.loads(f.read())["start_date"] == "2025-10-20"
+
+
+def test_query_reads_only_overlapping_weeks(tmp_path, monkeypatch):
+    archive = RosterArchive(tmp_path)
+    archive.archive(week("2025-10-13", "2025-10-19", ["2025-10-15"]))
+    archive.archive(week("2025-10-20", "2025-10-26", ["2025-10-20", "2025-10-26"]))
+    archive.archive(week("2025-10-27", "2025-11-02", ["2025-10-28"]))
+
+    opened = []
+    original = archive.get_week
+
+    def spy(monday):
+        opened.append(monday.isoformat())
+        return original(monday)
+
+    monkeypatch.setattr(archive, "get_week", spy)
+    result = archive.query(date(2025, 10, 22), date(2025, 10, 28))
+
+    assert opened == ["2025-10-20", "2025-10-27"]
+    assert sorted(result["data"]["P001"]) == ["2025-10-26", "2025-10-28"]
+    assert [w["start_date"] for w in result["weeks"]] == ["2025-10-20", "2025-10-27"]
+
+
+def test_rearchiving_replaces_the_week_and_skips_undated(tmp_path):
+    archive = RosterArchive(tmp_path)
+    archive.archive(week("2025-10-20", "2025-10-26", ["2025-10-20"]))
+    archive.archive(week("2025-10-20", "2025-10-26", ["2025-10-21"]))
+
+    assert archive.archive(week("", "", ["2025-10-22"])) is None
+    assert list(archive.get_week(date(2025, 10, 23))["data"]["P001"]) == ["2025-10-21"]
+
+
+def test_invalid_ranges_are_rejected(tmp_path):
+    archive = RosterArchive(tmp_path)
+
+    with pytest.raises(ValueError):
+        archive.query(date(2025, 10, 28), date(2025, 10, 20))
+    with pytest.raises(ValueError):
+        archive.query(date(2024, 1, 1), date(2025, 12, 31))
+
+
+def test_planner_transition_archives_the_outgoing_roster(tmp_path, monkeypatch):
+    server = pytest.importorskip("server")
+    archive = RosterArchive(tmp_path)
+    outgoing = week("2025-10-20", "2025-10-26", ["2025-10-21"])
+    planner = week("2025-10-27", "2025-11-02", ["2025-10-28"])
+    monkeypatch.setattr(server, "roster_archive", archive)
+    monkeypatch.setattr(server, "ROSTER_DATA", {"roster": outgoing, "planner": planner})
+
+    previous = server._transition_planner(planner)
+
+    assert previous == {"roster": outgoing, "planner": planner}
+    assert archive.weeks() == ["2025-10-20"]
+    assert server.ROSTER_DATA["roster"]["data"] == planner["data"]
+    assert server.ROSTER_DATA["planner"]["data"] == {}
@@ -0,0 +1,62 @@
+"""
+Tests for roster secondary indexes
+"""
+import copy
+from services.roster_index import RosterIndex, changed_cells, resolve
+
+
+DATA = {
+    "P001": {
+        "2025-10-20": [
+            {"id": "s1", "startTime": "09:00", "endTime": "17:00", "workers": ["1", "2"]},
+            {"id": "s2", "startTime": "17:00", "endTime": "21:00", "workers": [3]}
+        ],
+        "2025-10-21": [{"id": "s3", "startTime": "09:00", "endTime": "12:00", "workers": ["1"]}]
+    },
+    "P002": {
+        "2025-10-21": [{"startTime": "13:00", "endTime": "15:00", "workers": ["1"]}]
+    }
+}
+
+
+def test_build_indexes_workers_dates_and_ids():
+    index = RosterIndex.build(DATA)
+
+    assert [loc.shift_id for loc in index.worker_locations("1")] == ["s1", "s3", "P002/2025-10-21/0"]
+    assert index.workers_on("2025-10-20") == {"1", "2", "3"}
+    assert resolve(DATA, index.locate("s3"))["endTime"] == "12:00"
+    assert index.dates() == ["2025-10-20", "2025-10-21"]
+
+
+def test_update_reindexes_only_changed_cells():
+    index = RosterIndex.build(DATA)
+    data = copy.deepcopy(DATA)
+    data["P001"]["2025-10-20"] = [{"id": "s1", "startTime": "09:00", "endTime": "17:00", "workers": ["4"]}]
+
+    index.update(data, {("P001", "2025-10-20")})
+
+    assert index.workers_on("2025-10-20") == {"4"}
+    assert "2" not in index.by_worker
+    assert index.locate("s2") is None
+    assert [loc.shift_id for loc in index.worker_locations("1")] == ["s3", "P002/2025-10-21/0"]
+
+
+def test_update_removes_deleted_participant():
+    index = RosterIndex.build(DATA)
+    data = copy.deepcopy(DATA)
+    del data["P002"]
+
+    index.update(data, changed_cells([{"op": "del", "path": ["roster", "data", "P002"]}], DATA, data))
+
+    assert index.date_locations("2025-10-21")[0].participant == "P001"
+    assert len(index.date_locations("2025-10-21")) == 1
+
+
+def test_changed_cells_from_ops():
+    ops = [
+        {"op": "set", "path": ["roster", "data", "P001", "2025-10-20"], "value": []},
+        {"op": "set", "path": ["roster", "start_date"], "value": "2025-10-20"}
+    ]
+
+    assert changed_cells(ops) == {("P001", "2025-10-20")}
+    assert changed_cells([{"op": "set", "path": ["roster"], "value": {}}]) is None
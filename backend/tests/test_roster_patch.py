@@ -0,0 +1,73 @@
+"""
+Tests for shift-level roster edits
+"""
+import copy
+import pytest
+from services.roster_patch import ShiftPatch, ShiftPatchError
+from services.roster_index import RosterIndex
+
+
+DATA = {
+    "P001": {
+        "2025-10-20": [
+            {"id": "s1", "date": "2025-10-20", "startTime": "09:00", "endTime": "17:00", "workers": ["1"]},
+            {"id": "s2", "date": "2025-10-20", "startTime": "17:00", "endTime": "21:00", "workers": ["2"]}
+        ]
+    },
+    "P002": {
+        "2025-10-21": [{"id": "s3", "date": "2025-10-21", "startTime": "09:00", "endTime": "12:00", "workers": ["1"]}]
+    }
+}
+
+
+def make_patch():
+    data = copy.deepcopy(DATA)
+    return ShiftPatch(data, RosterIndex.build(data)), data
+
+
+def test_batch_of_operations_touches_only_its_cells():
+    patch, data = make_patch()
+    original_cell = data["P001"]["2025-10-20"]
+
+    applied = patch.apply([
+        {"op": "update", "id": "s2", "shift": {"workers": ["3"]}},
+        {"op": "move", "id": "s1", "participant": "P002", "date": "2025-10-21", "position": 0},
+        {"op": "add", "participant": "P003", "date": "2025-10-22", "shift": {"id": "s4", "startTime": "08:00"}},
+        {"op": "delete", "id": "s3"}
+    ])
+
+    assert [a["op"] for a in applied] == ["update", "move", "add", "delete"]
+    assert patch.cells == {("P001", "2025-10-20"), ("P002", "2025-10-21"), ("P003", "2025-10-22")}
+    assert data["P001"]["2025-10-20"] == [dict(DATA["P001"]["2025-10-20"][1], workers=["3"])]
+    assert data["P002"]["2025-10-21"] == [dict(DATA["P001"]["2025-10-20"][0], date="2025-10-21")]
+    assert data["P003"]["2025-10-22"] == [{"id": "s4", "startTime": "08:00", "date": "2025-10-22"}]
+    # The cell lists were replaced, not edited, so the old values are intact
+    assert original_cell == DATA["P001"]["2025-10-20"]
+    assert patch.previous_data["P001"]["2025-10-20"] is original_cell
+    assert patch.index.locate("s1").participant == "P002"
+    assert patch.index.locate("s3") is None
+    assert patch.index.locate("s2").position == 0
+
+
+def test_failed_batch_is_rolled_back():
+    patch, data = make_patch()
+
+    with pytest.raises(ShiftPatchError) as error:
+        patch.apply([
+            {"op": "delete", "id": "s1"},
+            {"op": "add", "participant": "P009", "date": "2025-10-22", "shift": {}},
+            {"op": "update", "id": "missing", "shift": {}}
+        ])
+
+    assert error.value.not_found
+    assert data == DATA
+    assert patch.index.locate("s1").position == 0
+    assert patch.index.workers_on("2025-10-22") == set()
+
+
+def test_add_rejects_duplicate_ids():
+    patch, data = make_patch()
+
+    with pytest.raises(ShiftPatchError):
+        patch.apply([{"op": "add", "participant": "P001", "date": "2025-10-20", "shift": {"id": "s1"}}])
+    assert data == DATA
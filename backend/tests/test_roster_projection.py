@@ -0,0 +1,47 @@
+"""
+Tests for memoized template projection
+"""
+from services.roster_projection import TemplateProjections, shift_dates
+
+
+SOURCE = {
+    "week_type": "weekA",
+    "start_date": "2025-10-20",
+    "end_date": "2025-10-26",
+    "data": {
+        "P001": {
+            "2025-10-20": [{"id": "s1", "date": "2025-10-20", "startTime": "09:00", "workers": ["1"]}],
+            "2025-10-26": [],
+            "notes": "kept"
+        },
+        "P002": ["legacy"]
+    }
+}
+
+
+def test_shift_dates_moves_dates_and_keeps_source_intact():
+    data = shift_dates(SOURCE["data"], 7)
+
+    assert data["P001"]["2025-10-27"] == [{"id": "s1", "date": "2025-10-27", "startTime": "09:00", "workers": ["1"]}]
+    assert data["P001"]["2025-11-02"] == []
+    assert data["P001"]["notes"] == "kept"
+    assert data["P002"] == ["legacy"]
+    assert SOURCE["data"]["P001"]["2025-10-20"][0]["date"] == "2025-10-20"
+
+
+def test_projection_is_reused_until_version_changes():
+    projections = TemplateProjections()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return SOURCE
+
+    first = projections.get("roster", 1, 7, load)
+    assert projections.get("roster", 1, 7, load) is first
+    assert len(loads) == 1
+
+    assert projections.get("roster", 1, 14, load) is not first
+    assert projections.get("roster", 2, 7, load) is not first
+    assert len(loads) == 3
+    assert first["week_type"] == "weekA"
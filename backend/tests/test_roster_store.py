@@ -0,0 +1,262 @@
+"""
+Tests for the sharded, journaled roster store
+"""
+import json
+import pytest
+from services.roster_store import RosterStore, VersionConflict, diff_ops, apply_ops
+
+
+ROSTER_SECTION = {
+    "week_type": "weekA",
+    "start_date": "2025-10-20",
+    "end_date": "2025-10-26",
+    "data": {
+        "P001": {
+            "2025-10-20": [{"id": "s1", "startTime": "09:00", "endTime": "17:00", "workers": ["1"]}],
+            "2025-10-21": [{"id": "s2", "startTime": "09:00", "endTime": "17:00", "workers": ["2"]}]
+        }
+    }
+}
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    """Single-file roster_data.json as written before sharding"""
+    path = tmp_path / "roster_data.json"
+    path.write_text(json.dumps({
+        "roster": ROSTER_SECTION,
+        "roster_last": {"week_type": "weekB", "data": {"P001": {}}}
+    }))
+    return path
+
+
+@pytest.fixture
+def store(tmp_path, legacy_file):
+    """Store migrated from the legacy file"""
+    return RosterStore(tmp_path / "roster_data", legacy_snapshot=legacy_file).open()
+
+
+def test_diff_only_touches_changed_day():
+    old = {"data": {"P001": {"2025-10-20": [1], "2025-10-21": [2]}}}
+    new = {"data": {"P001": {"2025-10-20": [1], "2025-10-21": [3]}}}
+
+    ops = diff_ops(["roster"], old, new)
+
+    assert ops == [{"op": "set", "path": ["roster", "data", "P001", "2025-10-21"], "value": [3]}]
+
+
+def test_diff_records_deletions():
+    ops = diff_ops(["roster"], {"data": {"P001": {}, "P002": {}}}, {"data": {"P001": {}}})
+
+    assert ops == [{"op": "del", "path": ["roster", "data", "P002"]}]
+
+
+def test_apply_ops_creates_missing_parents():
+    data = {}
+    apply_ops(data, [{"op": "set", "path": ["planner", "data", "P001"], "value": {}}])
+
+    assert data == {"planner": {"data": {"P001": {}}}}
+
+
+def test_legacy_file_is_split_into_sections(store):
+    assert (store.directory / "roster.json").exists()
+    assert (store.directory / "roster_last.json").exists()
+    assert sorted(store) == ["roster", "roster_last"]
+
+
+def test_sections_load_lazily(store):
+    assert store["roster"]["start_date"] == "2025-10-20"
+
+    assert store.is_loaded("roster")
+    assert not store.is_loaded("roster_last")
+
+
+def test_save_only_touches_changed_section(store):
+    last_snapshot = (store.directory / "roster_last.json").read_text()
+    roster_snapshot = (store.directory / "roster.json").read_text()
+    previous = dict(store["roster"])
+    store["roster"]["data"] = {
+        "P001": {
+            "2025-10-20": [{"id": "s1", "startTime": "09:00", "endTime": "15:00", "workers": ["1"]}],
+            "2025-10-21": ROSTER_SECTION["data"]["P001"]["2025-10-21"]
+        }
+    }
+
+    store.save("roster", previous)
+
+    assert (store.directory / "roster.json").read_text() == roster_snapshot
+    assert (store.directory / "roster_last.json").read_text() == last_snapshot
+    assert not (store.directory / "roster_last.journal").exists()
+    entries = [json.loads(line) for line in (store.directory / "roster.journal").read_text().splitlines()]
+    assert len(entries) == 1
+    assert entries[0]["ops"][0]["path"] == ["roster", "data", "P001", "2025-10-20"]
+
+
+def test_reopen_replays_journal(store):
+    store["planner"] = {"week_type": "weekB", "data": {}}
+    store.save("planner")
+
+    reopened = RosterStore(store.directory).open()
+
+    assert reopened["planner"] == {"week_type": "weekB", "data": {}}
+    assert reopened["roster"]["start_date"] == "2025-10-20"
+
+
+def test_reopen_ignores_torn_final_entry(store):
+    store["planner"] = {"data": {}}
+    store.save("planner")
+    with open(store.directory / "planner.journal", "a") as f:
+        f.write('{"ops": [{"op": "set"')
+
+    reopened = RosterStore(store.directory).open()
+
+    assert reopened["planner"] == {"data": {}}
+
+
+def test_deleted_section_removes_its_files(store):
+    del store["roster_last"]
+    store.save("roster_last")
+
+    assert "roster_last" not in RosterStore(store.directory).open()
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    roster_store = RosterStore(tmp_path / "roster_data", compact_every=3).open()
+    roster_store["planner"] = {"data": {}}
+
+    for i in range(3):
+        previous = dict(roster_store["planner"])
+        roster_store["planner"] = {"data": {f"P00{i}": {}}}
+        roster_store.save("planner", previous)
+
+    # Only a marker carrying the section version is left in the journal
+    marker = json.loads((roster_store.directory / "planner.journal").read_text())
+    assert marker == {"v": 3, "ops": []}
+    snapshot = json.loads((roster_store.directory / "planner.json").read_text())
+    assert snapshot == {"data": {"P002": {}}}
+
+
+def test_migration_replays_single_file_journal(tmp_path, legacy_file):
+    legacy_file.with_suffix(".journal").write_text(json.dumps(
+        {"ops": [{"op": "set", "path": ["roster", "week_type"], "value": "weekB"}]}
+    ) + "\n")
+
+    migrated = RosterStore(tmp_path / "roster_data", legacy_snapshot=legacy_file).open()
+
+    assert migrated["roster"]["week_type"] == "weekB"
+
+
+def test_shift_table_is_cached_until_section_changes(store):
+    table = store.shift_table("roster")
+    assert len(table) == 2
+    assert store.shift_table("roster") is table
+
+    previous = dict(store["roster"])
+    store["roster"]["data"] = {}
+    store.save("roster", previous)
+
+    assert len(store.shift_table("roster")) == 0
+
+
+def test_index_follows_saves_incrementally(store):
+    index = store.index("roster")
+    assert {loc.shift_id for loc in index.worker_locations("2")} == {"s2"}
+
+    previous = dict(store["roster"])
+    store["roster"] = dict(previous, data={
+        "P001": {
+            "2025-10-20": ROSTER_SECTION["data"]["P001"]["2025-10-20"],
+            "2025-10-21": [{"id": "s2", "startTime": "09:00", "endTime": "17:00", "workers": ["3"]}]
+        }
+    })
+    store.save("roster", previous)
+
+    assert store.index("roster") is index
+    assert index.worker_locations("2") == []
+    assert index.workers_on("2025-10-21") == {"3"}
+
+
+def test_version_is_persisted_per_section(tmp_path):
+    store = RosterStore(tmp_path / "roster_data").open()
+    store["roster"] = {"data": {}}
+    store.save("roster")
+    saved = store.version("roster")
+    assert saved == 1
+    assert store.version("planner") == 0
+
+    previous = dict(store["roster"])
+    store.save("roster", previous)
+    assert store.version("roster") == saved
+
+    store["roster"]["data"] = {"P001": {}}
+    store.save("roster", previous)
+    store.compact("roster")
+    assert store.version("roster") == 2
+
+    assert RosterStore(tmp_path / "roster_data").open().version("roster") == 2
+
+
+def test_other_processes_writes_are_picked_up(tmp_path):
+    first = RosterStore(tmp_path / "roster_data").open()
+    second = RosterStore(tmp_path / "roster_data").open()
+    first["roster"] = {"data": {"P001": {}}}
+    first.save("roster")
+
+    assert second["roster"] == {"data": {"P001": {}}}
+
+    with first.transaction("roster", expected={"roster": 1}):
+        previous = dict(first["roster"])
+        first["roster"]["data"] = {"P002": {}}
+        first.save("roster", previous)
+
+    # Appended entry is replayed on the next read
+    assert second["roster"] == {"data": {"P002": {}}}
+    assert second.version("roster") == 2
+
+    first.compact("roster")
+    with first.transaction("roster"):
+        previous = dict(first["roster"])
+        first["roster"] = {"data": {}}
+        first.save("roster", previous)
+
+    # Snapshot replaced underneath: re-read from scratch
+    assert second["roster"] == {"data": {}}
+    assert second.version("roster") == 3
+
+
+def test_stale_version_is_rejected(tmp_path):
+    first = RosterStore(tmp_path / "roster_data").open()
+    second = RosterStore(tmp_path / "roster_data").open()
+    first["roster"] = {"data": {}}
+    first.save("roster")
+    seen = second.version("roster")
+
+    with first.transaction("roster", expected={"roster": seen}):
+        first["roster"] = {"data": {"P001": {}}}
+        first.save("roster")
+
+    with pytest.raises(VersionConflict) as conflict:
+        with second.transaction("roster", expected={"roster": seen}):
+            pass
+    assert conflict.value.actual == 2
+
+
+def test_save_cells_journals_only_the_given_cells(tmp_path):
+    store = RosterStore(tmp_path / "roster_data").open()
+    store["roster"] = {"data": {"P001": {"2025-10-20": [{"id": "s1"}], "2025-10-21": [{"id": "s2"}]}}}
+    store.save("roster")
+    index = store.index("roster")
+
+    store["roster"]["data"]["P001"]["2025-10-20"] = [{"id": "s3", "workers": ["1"]}]
+    del store["roster"]["data"]["P001"]["2025-10-21"]
+    cells = store.save_cells("roster", {("P001", "2025-10-20"), ("P001", "2025-10-21")})
+
+    assert cells == {("P001", "2025-10-20"), ("P001", "2025-10-21")}
+    last = json.loads((tmp_path / "roster_data" / "roster.journal").read_text().splitlines()[-1])
+    assert {tuple(op["path"]) for op in last["ops"]} == {
+        ("roster", "data", "P001", "2025-10-20"), ("roster", "data", "P001", "2025-10-21")
+    }
+    assert index.worker_locations("1")[0].shift_id == "s3"
+
+    reopened = RosterStore(tmp_path / "roster_data").open()
+    assert reopened["roster"]["data"] == {"P001": {"2025-10-20": [{"id": "s3", "workers": ["1"]}]}}
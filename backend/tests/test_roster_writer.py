@@ -0,0 +1,77 @@
+"""
+Tests for write-behind roster persistence
+"""
+import threading
+from services.roster_writer import RosterWriteBehind
+
+
+class FakeTable:
+    def __init__(self, fail=False):
+        self.sections = {"roster": {"v": 1}, "planner": {"v": 1}}
+        self.writes = []
+        self.fail = fail
+
+    def load(self, keys):
+        return {key: dict(self.sections[key]) for key in keys if key in self.sections}
+
+    def write(self, batch):
+        if self.fail:
+            return False
+        self.writes.append(batch)
+        return True
+
+
+def test_burst_of_saves_is_one_write_with_latest_state():
+    table = FakeTable()
+    writer = RosterWriteBehind(table.load, table.write, delay=60)
+
+    for version in range(2, 30):
+        table.sections["planner"]["v"] = version
+        writer.mark("planner")
+    writer.mark("roster")
+
+    assert table.writes == []
+    assert writer.flush()
+    assert table.writes == [{"planner": {"v": 29}, "roster": {"v": 1}}]
+    assert writer.pending == set()
+
+
+def test_unmirrored_sections_are_ignored():
+    table = FakeTable()
+    writer = RosterWriteBehind(table.load, table.write, delay=60)
+
+    writer.mark("P001", "admin")
+
+    assert writer.pending == set()
+    assert writer.flush()
+    assert table.writes == []
+
+
+def test_failed_write_stays_pending_until_close():
+    table = FakeTable(fail=True)
+    writer = RosterWriteBehind(table.load, table.write, delay=60)
+    writer.mark("planner")
+
+    assert not writer.flush()
+    assert writer.pending == {"planner"}
+
+    table.fail = False
+    assert writer.close()
+    assert table.writes == [{"planner": {"v": 1}}]
+
+
+def test_window_flushes_on_its_own():
+    table = FakeTable()
+    written = threading.Event()
+
+    def write(batch):
+        table.write(batch)
+        written.set()
+        return True
+
+    writer = RosterWriteBehind(table.load, write, delay=0.01)
+    writer.mark("roster")
+    writer.mark("roster")
+
+    assert written.wait(2)
+    assert table.writes == [{"roster": {"v": 1}}]
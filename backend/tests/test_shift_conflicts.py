@@ -0,0 +1,76 @@
+"""
+Tests for sweep-line overlap detection and point conflict queries
+"""
+import random
+from services.shift_conflicts import overlapping_pairs, ConflictIndex
+from services.worker_timeline import build_timelines
+from services.enhanced_validation_service import EnhancedValidationService
+
+
+def shift(shift_id, start, end, workers=("1",)):
+    return {"id": shift_id, "startTime": start, "endTime": end, "duration": 1, "workers": list(workers)}
+
+
+def pair_ids(data, worker="1"):
+    return {
+        tuple(sorted((a.shift_id, b.shift_id)))
+        for a, b in overlapping_pairs(build_timelines(data)[worker].shifts)
+    }
+
+
+def test_long_shift_overlaps_every_shift_it_spans():
+    data = {
+        "P001": {"2025-10-20": [shift("long", "08:00", "20:00")]},
+        "P002": {"2025-10-20": [shift("a", "09:00", "10:00"), shift("b", "12:00", "13:00"), shift("c", "20:00", "21:00")]}
+    }
+
+    assert pair_ids(data) == {("a", "long"), ("b", "long")}
+
+
+def test_cross_midnight_shift_overlaps_next_morning():
+    data = {
+        "P001": {"2025-10-20": [shift("night", "22:00", "07:00")]},
+        "P002": {"2025-10-21": [shift("morning", "06:00", "10:00"), shift("later", "10:00", "11:00")]}
+    }
+
+    assert pair_ids(data) == {("morning", "night")}
+
+    errors = EnhancedValidationService({}).validate_roster_data({"data": data})["errors"]
+    assert any("double-booked" in error and "22:00-07:00" in error for error in errors)
+
+
+def test_matches_brute_force():
+    random.seed(7)
+    data = {}
+    for p in range(4):
+        for d in range(20, 27):
+            shifts = []
+            for n in range(random.randint(0, 3)):
+                start = random.randint(0, 47) * 30
+                end = random.randint(0, 47) * 30
+                shifts.append(shift(f"P{p}-{d}-{n}", f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"))
+            data.setdefault(f"P{p}", {})[f"2025-10-{d}"] = shifts
+
+    shifts = build_timelines(data)["1"].shifts
+    expected = {
+        tuple(sorted((a.shift_id, b.shift_id)))
+        for i, a in enumerate(shifts) for b in shifts[i + 1:]
+        if a.abs_start < b.abs_end and b.abs_start < a.abs_end
+    }
+    assert pair_ids(data) == expected
+
+
+def test_point_queries():
+    data = {
+        "P001": {
+            "2025-10-20": [shift("night", "22:00", "06:00", ("1", "2"))],
+            "2025-10-21": [shift("day", "09:00", "17:00", ("1",))]
+        }
+    }
+    index = ConflictIndex.build(data)
+
+    assert [s.shift_id for s in index.conflicts("1", "2025-10-21", "05:00", "08:00")] == ["night"]
+    assert [s.shift_id for s in index.conflicts(1, "2025-10-21", "16:00", "18:00")] == ["day"]
+    assert index.conflicts("1", "2025-10-21", "06:00", "09:00") == []
+    assert index.conflicts("1", "2025-10-21", "09:00", "17:00", exclude_shift_id="day") == []
+    assert index.conflicts("3", "2025-10-21", "09:00", "17:00") == []
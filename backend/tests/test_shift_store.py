@@ -0,0 +1,86 @@
+"""
+Tests for the compact shift store
+"""
+import copy
+from services.shift_store import ShiftTable, time_to_minutes
+from services.worker_timeline import build_timelines, build_timelines_from_records
+
+
+ROSTER = {
+    "GRA001": {
+        "2025-10-20": [
+            {
+                "id": "shift_1", "date": "2025-10-20", "startTime": "6:00", "endTime": "8:00",
+                "supportType": "Self-Care", "ratio": "1:1", "workers": ["135"], "location": "1",
+                "notes": "", "shiftNumber": "G20251020600", "duration": 2, "isSplitShift": False,
+                "locked": True
+            },
+            {
+                "id": "shift_2", "startTime": "22:00", "endTime": "06:00", "workers": ["135", "140"],
+                "duration": 8.0, "funding_category": "core"
+            }
+        ],
+        "2025-10-21": []
+    },
+    "LIB001": {},
+    "2025-10-22": "stray value"
+}
+
+
+def test_round_trip_reproduces_json_shape():
+    table = ShiftTable.from_roster_data(copy.deepcopy(ROSTER))
+
+    assert table.to_roster_data() == ROSTER
+    assert list(table.to_roster_data()["GRA001"]["2025-10-20"][0]) == list(ROSTER["GRA001"]["2025-10-20"][0])
+
+
+def test_records_are_typed_and_interned():
+    table = ShiftTable.from_roster_data(copy.deepcopy(ROSTER))
+    first, second = table.records
+
+    assert len(table) == 2
+    assert first.workers == ("135",)
+    assert first.workers[0] is second.workers[0]
+    assert first.start_minutes == 360 and second.end_minutes == 360
+    assert second.hours == 8.0
+    assert second.extra == {"funding_category": "core"}
+    assert second.get("supportType", "n/a") == "n/a"
+
+
+def test_shapes_are_shared():
+    roster = {"P001": {"2025-10-20": [{"id": "a", "workers": []}, {"id": "b", "workers": []}]}}
+    table = ShiftTable.from_roster_data(roster)
+
+    assert table.records[0].shape is table.records[1].shape
+
+
+def test_shifts_for_participant_day():
+    table = ShiftTable.from_roster_data(copy.deepcopy(ROSTER))
+
+    assert [r.id for r in table.shifts_for("GRA001", "2025-10-20")] == ["shift_1", "shift_2"]
+    assert table.shifts_for("GRA001", "2025-10-21") == []
+    assert table.shifts_for("LIB001", "2025-10-20") == []
+
+
+def test_time_to_minutes():
+    assert time_to_minutes("6:30") == 390
+    assert time_to_minutes("bad") is None
+
+
+def test_timelines_from_records_match_the_dicts():
+    roster = {
+        "P001": {"2025-10-20": [
+            {"id": "a", "startTime": "22:00", "endTime": "06:00", "duration": 8, "workers": ["1", "2"],
+             "funding_category": "core", "is_split_shift": True},
+            {"id": "b", "startTime": "bad", "endTime": "06:00", "duration": 8, "workers": ["1"]},
+        ]},
+        "P002": {"2025-10-21": [{"id": "c", "startTime": "9:00", "endTime": "17:00", "duration": 8, "workers": ["1"]}]},
+    }
+    from_records = build_timelines_from_records(ShiftTable.from_roster_data(roster))
+    del roster["P001"]["2025-10-20"][1]
+    from_dicts = build_timelines(roster)
+
+    assert from_records.keys() == from_dicts.keys()
+    for worker_id, timeline in from_dicts.items():
+        assert from_records[worker_id].shifts == timeline.shifts
+        assert from_records[worker_id].weekly_hours == timeline.weekly_hours
@@ -0,0 +1,49 @@
+"""
+Tests for indexed shift template suggestions
+"""
+import random
+from services.shift_templates import ShiftTemplate, ShiftTemplateManager, ShiftTemplateType
+
+
+def manager_with(count):
+    random.seed(11)
+    manager = ShiftTemplateManager("/nonexistent/templates.json")
+    for i in range(count):
+        start = random.randint(6, 14)
+        manager.add_template(ShiftTemplate(
+            id=f"p{i}", name=f"Participant {i}", description="", template_type=ShiftTemplateType.CUSTOM,
+            start_time=f"{start:02d}:00", end_time=f"{start + random.choice([4, 6, 8]):02d}:00",
+            duration=random.choice([3.5, 4.0, 6.0, 7.5, 8.0]), ratio=random.choice(["1:1", "2:1"]),
+            funding_category=random.choice(["core", "capacity"]), tags=[random.choice(["day", "p"])],
+        ))
+    return manager
+
+
+def linear_suggestion(manager, shift):
+    scored = [(manager._calculate_template_match_score(shift, t), t) for t in manager.templates.values()]
+    best_score, best = max(scored, key=lambda pair: pair[0])
+    return best if best_score > 0.7 else None
+
+
+def test_index_suggests_what_a_full_scan_would():
+    manager = manager_with(300)
+    for _ in range(400):
+        start = random.randint(5, 15)
+        shift = {"startTime": f"{start:02d}:00", "endTime": f"{start + random.choice([4, 8]):02d}:00",
+                 "duration": random.choice([3.0, 4.0, 4.5, 7.6, 8.0, 10.0]), "ratio": random.choice(["1:1", "2:1", None]),
+                 "funding_category": random.choice(["core", "capacity"]), "tags": random.choice([[], ["day"]])}
+        assert manager.suggest_template(shift) is linear_suggestion(manager, shift)
+
+
+def test_suggestions_follow_template_changes():
+    manager = ShiftTemplateManager("/nonexistent/templates.json")
+    shift = {"startTime": "07:00", "endTime": "15:00", "duration": 8.0, "ratio": "1:1", "funding_category": "core"}
+    assert manager.suggest_template(shift) is None
+
+    template = ShiftTemplate(id="early", name="Early", description="", template_type=ShiftTemplateType.CUSTOM,
+                             start_time="07:00", end_time="15:00", duration=8.0, ratio="1:1", funding_category="core")
+    manager.add_template(template)
+    assert manager.suggest_template(shift) is template
+
+    manager.delete_template("early")
+    assert manager.suggest_template(shift) is None
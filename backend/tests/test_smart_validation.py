@@ -0,0 +1,71 @@
+"""
+Tests for smart validation against an indexed worker schedule
+"""
+from services.smart_validation import SmartValidationEngine
+from services.shift_conflicts import ScheduleIndex
+
+
+def shift(shift_id, date, start, end, duration, participant="P001", **extra):
+    return {"id": shift_id, "participant": participant, "date": date, "startTime": start,
+            "endTime": end, "duration": duration, "workers": ["1"], **extra}
+
+
+SCHEDULE = [
+    shift("mon-am", "2025-10-20", "06:00", "14:00", 8),
+    shift("mon-pm", "2025-10-20", "14:00", "20:00", 6),
+    shift("tue", "2025-10-21", "09:00", "17:00", 8),
+    shift("night", "2025-10-22", "22:00", "06:00", 8, participant="P002"),
+    shift("next-week", "2025-10-27", "09:00", "17:00", 8),
+]
+
+
+def rules(new_shift, schedule=SCHEDULE, config=None):
+    engine = SmartValidationEngine()
+    return {r.rule_id: r for r in engine.validate_shift(new_shift, ScheduleIndex.from_dicts(schedule), config)}
+
+
+def test_index_answers_hours_and_neighbours():
+    index = ScheduleIndex.from_dicts(SCHEDULE)
+    monday = index.shifts[0].day
+
+    assert index.day_hours(monday) == 14.0
+    assert index.day_hours(monday, exclude_shift_id="mon-pm") == 8.0
+    assert index.week_hours(monday) == 30.0
+    assert index.week_hours(monday + 7) == 8.0
+    assert index.previous(index.shifts[2].abs_start).shift_id == "mon-pm"
+    assert index.next(index.shifts[2].abs_start, exclude_shift_id="tue").shift_id == "night"
+    assert [s.shift_id for s in index.overlapping(index.shifts[3].abs_end - 60, index.shifts[3].abs_end)] == ["night"]
+
+
+def test_double_booking_and_overlap_by_participant():
+    found = rules(shift("new", "2025-10-23", "05:00", "07:00", 2))
+    assert "double_booking" in found and "overlapping_shifts" not in found
+
+    found = rules(shift("new", "2025-10-21", "16:00", "18:00", 2))
+    assert "overlapping_shifts" in found and "double_booking" not in found
+
+
+def test_rest_is_measured_to_real_neighbours():
+    found = rules(shift("new", "2025-10-23", "09:00", "12:00", 3))
+    assert found["insufficient_rest_critical"].metadata["rest_hours"] == 3.0
+
+    found = rules(shift("new", "2025-10-25", "09:00", "12:00", 3))
+    assert not {"insufficient_rest_critical", "insufficient_rest_warning"} & set(found)
+
+
+def test_hour_limits_and_continuous_runs():
+    found = rules(shift("new", "2025-10-20", "20:00", "23:00", 3), config={"max_weekly_hours": 32})
+    assert found["weekly_limit_exceeded"].metadata["current_hours"] == 33.0
+    assert found["daily_limit_exceeded"].metadata["current_hours"] == 17.0
+    assert found["continuous_hours_high"].metadata["continuous_hours"] == 17.0
+
+
+def test_existing_shift_is_not_counted_twice():
+    found = rules(dict(SCHEDULE[2]))
+    assert "overlapping_shifts" not in found
+    assert "daily_limit_exceeded" not in found
+
+
+def test_weekend_and_unplaceable_shifts():
+    assert "weekend_shift" in rules(shift("sat", "2025-10-25", "09:00", "12:00", 3))
+    assert rules({"startTime": "09:00", "endTime": "12:00", "duration": 3}) == {}
@@ -0,0 +1,48 @@
+"""
+Tests for the content-keyed validation result cache
+"""
+from services.validation_cache import ValidationCache, validation_key
+
+SECTION = {"data": {"P001": {"2025-10-20": [
+    {"id": "s1", "startTime": "09:00", "endTime": "17:00", "duration": 8, "workers": ["1"]}
+]}}}
+WORKERS = {"1": {"full_name": "A", "max_hours": 20, "phone": "0400"}}
+CONFIG = {"min_rest_hours": 8}
+
+
+def test_key_tracks_only_relevant_inputs():
+    key = validation_key(SECTION, WORKERS, CONFIG)
+
+    assert key == validation_key({"data": dict(SECTION["data"])}, {"1": dict(WORKERS["1"])}, dict(CONFIG))
+    assert key == validation_key(SECTION, {"1": {**WORKERS["1"], "phone": "0411"}}, CONFIG)
+    assert key != validation_key(SECTION, {"1": {**WORKERS["1"], "max_hours": 30}}, CONFIG)
+    assert key != validation_key(SECTION, WORKERS, {"min_rest_hours": 10})
+    assert key != validation_key(SECTION, WORKERS, CONFIG, kind="legacy")
+
+
+def test_identical_inputs_skip_validation():
+    cache = ValidationCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"valid": True, "errors": []}
+
+    first = cache.validate(SECTION, WORKERS, CONFIG, compute)
+    first["errors"].append("caller annotation")
+    second = cache.validate(SECTION, WORKERS, CONFIG, compute)
+
+    assert len(calls) == 1
+    assert second == {"valid": True, "errors": []}
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_is_evicted():
+    cache = ValidationCache(maxsize=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1} and cache.get("c") == {"n": 3}
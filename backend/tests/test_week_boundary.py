@@ -0,0 +1,55 @@
+"""
+Tests for the cached week boundary
+"""
+import time
+from datetime import datetime, timedelta
+from services.week_boundary import WeekBoundary, week_start
+
+
+class FakeTime:
+    def __init__(self, now):
+        self.now = now
+
+    def datetime(self):
+        return self.now
+
+    def clock(self):
+        return self.now.timestamp()
+
+
+def test_week_start_is_monday_midnight():
+    assert week_start(datetime(2025, 10, 26, 23, 59)) == datetime(2025, 10, 20)
+    assert week_start(datetime(2025, 10, 27, 0, 0)) == datetime(2025, 10, 27)
+
+
+def test_rolls_over_only_at_the_boundary():
+    fake = FakeTime(datetime(2025, 10, 26, 23, 0))
+    boundary = WeekBoundary(now=fake.datetime, clock=fake.clock)
+
+    assert boundary.current_week() == ("2025-10-20", "2025-10-26")
+    assert boundary.week(-1) == ("2025-10-13", "2025-10-19")
+    assert boundary.week(2) == ("2025-11-03", "2025-11-09")
+    assert boundary.seconds_until_boundary() == 3600
+
+    fake.now += timedelta(minutes=59)
+    assert boundary.current_start == "2025-10-20"
+
+    fake.now += timedelta(minutes=1)
+    assert boundary.current_start == "2025-10-27"
+    assert boundary.week(1) == ("2025-11-03", "2025-11-09")
+
+
+def test_boundary_counts_a_dst_change(monkeypatch):
+    monkeypatch.setenv("TZ", "Australia/Sydney")
+    time.tzset()
+    try:
+        # Clocks go forward at 02:00 on Sunday 5 October 2025: 22 real hours to Monday
+        fake = FakeTime(datetime(2025, 10, 5, 1, 0))
+        boundary = WeekBoundary(now=fake.datetime, clock=fake.clock)
+        assert boundary.seconds_until_boundary() == 22 * 3600
+
+        fake.now = datetime(2025, 10, 6, 0, 0)
+        assert boundary.current_start == "2025-10-06"
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,167 @@
+"""
+Tests for compiled worker availability
+"""
+import random
+from datetime import date, timedelta
+from unittest.mock import Mock
+from services.worker_availability import (
+    AvailabilityIndex, UnavailabilityIndex, get_availability_index, invalidate_availability_index, merge_periods
+)
+from services.enhanced_validation_service import EnhancedValidationService
+
+# weekday 0 = Sunday, as stored in availability_rule
+RULES = [
+    {"worker_id": 1, "weekday": 1, "from_time": "09:00:00", "to_time": "17:00:00"},
+    {"worker_id": 1, "weekday": 3, "is_full_day": True},
+    {"worker_id": 1, "weekday": 6, "from_time": "22:00", "to_time": "06:00", "wraps_midnight": True},
+]
+PERIODS = [
+    {"worker_id": 1, "from_date": "2025-11-10", "to_date": "2025-11-12", "reason": "Leave"},
+    {"worker_id": 1, "from_date": "2025-11-11", "to_date": "2025-11-14", "reason": "Leave"},
+    {"worker_id": 2, "from_date": "2025-11-03", "to_date": "2025-11-03", "reason": "Sick"},
+]
+
+
+def day(iso):
+    return date.fromisoformat(iso).toordinal()
+
+
+def test_weekly_bitmap_expands_full_days_and_midnight_wraps():
+    worker = AvailabilityIndex.build(RULES, []).get(1)
+
+    assert worker.covers(day("2025-11-03"), 9 * 60, 17 * 60)            # Monday
+    assert not worker.covers(day("2025-11-03"), 8 * 60 + 45, 12 * 60)
+    assert not worker.covers(day("2025-11-04"), 9 * 60, 17 * 60)        # Tuesday
+    assert worker.covers(day("2025-11-05"), 0, 24 * 60)                 # Wednesday, full day
+    assert worker.covers(day("2025-11-08"), 22 * 60, 30 * 60)           # Saturday night into Sunday
+    assert not worker.covers(day("2025-11-08"), 22 * 60, 31 * 60)
+
+
+def test_periods_merge_and_answer_by_binary_search():
+    assert merge_periods(PERIODS[:2]) == [(day("2025-11-10"), day("2025-11-14"), "Leave")]
+
+    index = AvailabilityIndex.build([], PERIODS)
+    assert index.get(1).unavailable_period(day("2025-11-14"), day("2025-11-15")) is not None
+    assert index.get(1).unavailable_period(day("2025-11-15"), day("2025-11-16")) is None
+    assert index.get(2).unavailable_period(day("2025-11-02"), day("2025-11-03"))[2] == "Sick"
+    assert index.get(2).covers(day("2025-11-04"), 0, 60)  # no rules, no weekly restriction
+
+
+def test_validation_reports_unavailable_and_outside_hours():
+    data = {"data": {"P001": {
+        "2025-11-03": [{"id": "a", "startTime": "09:00", "endTime": "17:00", "duration": 8, "workers": ["1"]}],
+        "2025-11-04": [{"id": "b", "startTime": "09:00", "endTime": "12:00", "duration": 3, "workers": ["1"]}],
+        "2025-11-09": [{"id": "c", "startTime": "22:00", "endTime": "00:00", "duration": 2, "workers": ["1"]}],
+        "2025-11-11": [{"id": "d", "startTime": "09:00", "endTime": "12:00", "duration": 3, "workers": ["1"]}],
+    }}}
+    service = EnhancedValidationService({"1": {"full_name": "A"}}, None, AvailabilityIndex.build(RULES, PERIODS))
+    service.check_availability_compliance(data)
+
+    assert service.errors == ["❌ UNAVAILABLE: A is unavailable (Leave) on 2025-11-11 for P001 (09:00-12:00)"]
+    assert [w.split(" for ")[0] for w in service.warnings] == [
+        "⚠️ OUTSIDE AVAILABILITY: A is rostered on 2025-11-04",
+        "⚠️ OUTSIDE AVAILABILITY: A is rostered on 2025-11-09",
+    ]
+
+    service = EnhancedValidationService({"1": {"full_name": "A"}})
+    service.check_availability_compliance(data)
+    assert service.errors == [] and service.warnings == []
+
+
+def test_fingerprint_follows_compiled_availability():
+    assert AvailabilityIndex.build(RULES, PERIODS).fingerprint == AvailabilityIndex.build(RULES[::-1], PERIODS).fingerprint
+    assert AvailabilityIndex.build(RULES, PERIODS).fingerprint != AvailabilityIndex.build(RULES[:2], PERIODS).fingerprint
+
+
+def test_shared_index_loads_through_the_database_class():
+    from database import SupabaseDatabase
+
+    db = SupabaseDatabase.__new__(SupabaseDatabase)
+    db.client = Mock()
+    rows = {"availability_rule": RULES, "unavailability_periods": PERIODS}
+    db.client.table.side_effect = lambda name: Mock(**{"select.return_value.execute.return_value.data": rows[name]})
+
+    invalidate_availability_index()
+    try:
+        index = get_availability_index(db)
+        assert index.fingerprint == AvailabilityIndex.build(RULES, PERIODS).fingerprint
+        assert get_availability_index(db) is index
+    finally:
+        invalidate_availability_index()
+
+
+def test_failed_loads_are_not_retried_immediately():
+    db = Mock()
+    db.get_all_availability_rules.side_effect = ConnectionError("down")
+
+    invalidate_availability_index()
+    try:
+        for _ in range(2):
+            try:
+                get_availability_index(db)
+            except Exception:
+                pass
+        assert db.get_all_availability_rules.call_count == 1
+    finally:
+        invalidate_availability_index()
+
+
+def test_interval_index_matches_a_scan():
+    random.seed(7)
+    base = date(2025, 1, 1)
+    periods = []
+    for i in range(300):
+        start = base + timedelta(days=random.randint(0, 300))
+        periods.append({"id": i, "worker_id": random.randint(1, 40), "from_date": start.isoformat(),
+                        "to_date": (start + timedelta(days=random.randint(0, 20))).isoformat()})
+    index = UnavailabilityIndex(periods)
+
+    for _ in range(200):
+        first = base + timedelta(days=random.randint(-10, 330))
+        last = first + timedelta(days=random.randint(0, 6))
+        expected = {p["id"] for p in periods if p["from_date"] <= last.isoformat() and p["to_date"] >= first.isoformat()}
+        assert {p["id"] for p in index.overlapping(first, last)} == expected
+
+        worker = random.randint(1, 40)
+        assert index.is_unavailable(worker, first) == any(
+            p["worker_id"] == worker and p["from_date"] <= first.isoformat() <= p["to_date"] for p in periods
+        )
+
+
+def test_interval_index_follows_creates_and_deletes():
+    index = UnavailabilityIndex([{"id": 1, "worker_id": 5, "from_date": "2025-11-03", "to_date": "2025-11-04"}])
+    index.add({"id": 2, "worker_id": 6, "from_date": "2025-11-06", "to_date": "2025-11-20"})
+
+    assert set(index.unavailable_workers("2025-11-03", "2025-11-09")) == {"5", "6"}
+    assert index.remove("1") is True
+    assert index.remove(1) is False
+    assert set(index.unavailable_workers("2025-11-03", "2025-11-09")) == {"6"}
+    assert not index.is_unavailable(5, date(2025, 11, 3))
+
+
+def test_database_keeps_the_index_current_on_every_write_path():
+    from database import SupabaseDatabase
+
+    db = SupabaseDatabase.__new__(SupabaseDatabase)
+    db.client = Mock()
+    table = db.client.table.return_value
+    table.select.return_value.execute.return_value.data = [
+        {"id": 1, "worker_id": 5, "from_date": "2025-11-03", "to_date": "2025-11-04"}
+    ]
+    db._unavailability = None
+    assert db._check_worker_unavailability(5, date(2025, 11, 3))
+
+    table.insert.return_value.execute.return_value.data = [
+        {"id": 2, "worker_id": 6, "from_date": "2025-11-05", "to_date": "2025-11-06"}
+    ]
+    db.add_unavailability_period("6", "2025-11-05", "2025-11-06")
+    table.insert.return_value.execute.return_value.data = [
+        {"id": 3, "worker_id": 7, "from_date": "2025-11-05", "to_date": "2025-11-06"}
+    ]
+    db.create_unavailability_period(7, "2025-11-05", "2025-11-06", "Leave")
+    assert set(db.get_unavailable_workers("2025-11-03", "2025-11-09")) == {"5", "6", "7"}
+
+    table.delete.return_value.eq.return_value.execute.return_value.data = [{"id": 1}]
+    assert db.delete_unavailability_period("1")
+    assert not db._check_worker_unavailability(5, date(2025, 11, 3))
+    assert table.select.return_value.execute.call_count == 1
@@ -0,0 +1,63 @@
+"""
+Tests for shared worker timelines
+"""
+from services.worker_timeline import build_timelines
+from services.enhanced_validation_service import EnhancedValidationService
+
+
+DATA = {
+    "P001": {
+        "2025-10-21": [{"id": "s3", "startTime": "13:00", "endTime": "15:00", "duration": 2, "workers": ["1"]}],
+        "2025-10-20": [
+            {"id": "s2", "startTime": "14:00", "endTime": "18:00", "duration": 4, "workers": ["1", "2"]},
+            {"id": "s1", "startTime": "08:00", "endTime": "12:00", "duration": 4, "workers": ["1"]}
+        ]
+    },
+    "P002": {
+        "2025-10-20": [{"id": "s4", "startTime": "22:00", "endTime": "06:00", "duration": 8, "workers": []}]
+    }
+}
+
+
+def test_one_sorted_timeline_per_worker():
+    timelines = build_timelines(DATA)
+
+    assert set(timelines) == {"1", "2"}
+    worker = timelines["1"]
+    assert [s.shift_id for s in worker.shifts] == ["s1", "s2", "s3"]
+    assert list(worker.days) == ["2025-10-20", "2025-10-21"]
+    assert worker.daily_hours == {"2025-10-20": 8.0, "2025-10-21": 2.0}
+    assert worker.total_hours == 10.0
+    assert worker.shifts[0].start == 480 and worker.shifts[0].end == 720
+    assert worker.shifts[2].day - worker.shifts[0].day == 1
+    assert [(a.shift_id, b.shift_id) for a, b in worker.pairs()] == [("s1", "s2"), ("s2", "s3")]
+
+
+def test_rules_share_one_build(monkeypatch):
+    import services.enhanced_validation_service as module
+    builds = []
+    original = module.build_timelines
+
+    def counting(data):
+        builds.append(data)
+        return original(data)
+
+    monkeypatch.setattr(module, "build_timelines", counting)
+    EnhancedValidationService({}).validate_roster_data({"data": DATA})
+
+    assert len(builds) == 1
+
+
+def test_rest_is_measured_across_midnight():
+    data = {
+        "P001": {
+            "2025-10-20": [{"id": "night", "startTime": "22:00", "endTime": "06:00", "duration": 8, "workers": ["1"]}],
+            "2025-10-21": [{"id": "day", "startTime": "10:00", "endTime": "18:00", "duration": 8, "workers": ["1"]}]
+        }
+    }
+
+    rests = [(a.shift_id, b.shift_id, hours) for a, b, hours in build_timelines(data)["1"].rest_pairs()]
+    assert rests == [("night", "day", 4.0)]
+
+    warnings = EnhancedValidationService({}).validate_roster_data({"data": data})["warnings"]
+    assert any("4.0h rest" in warning for warning in warnings)
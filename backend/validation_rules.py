@@ -7,11 +7,13 @@ DEPRECATED: This file is being replaced by enhanced_validation_service.py
 Maintained for backward compatibility
 """
 
-from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 import logging
 from services.enhanced_validation_service import EnhancedValidationService
 from services.validation_config import get_validation_config
+from services.validation_cache import get_validation_cache
+from services.worker_timeline import build_timelines, hour_of, time_to_minutes
+from services.shift_conflicts import overlapping_pairs
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +34,7 @@ class RosterValidator:
         """
         self.roster = roster_data
         self.workers = workers
+        self._timelines = None
         self.errors = []
         self.warnings = []
     
@@ -42,6 +45,7 @@ class RosterValidator:
         """
         self.errors = []
         self.warnings = []
+        self._timelines = None
         
         self.check_worker_ratios()
         self.check_double_bookings()
@@ -73,97 +77,49 @@ class RosterValidator:
                         )
     
     def check_double_bookings(self):
-        """Detect if a worker is scheduled at two places at the same time"""
-        worker_schedule = {}  # {worker_id: [(date, start, end, participant, funding_category)]}
-        
-        for p_code, dates in self.roster.items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    start = self._time_to_minutes(shift['startTime'])
-                    end = self._time_to_minutes(shift['endTime'])
-                    
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_schedule:
-                            worker_schedule[worker_id] = []
-                        worker_schedule[worker_id].append({
-                            'date': date,
-                            'start': start,
-                            'end': end,
-                            'participant': p_code,
-                            'shift_time': f"{shift['startTime']}-{shift['endTime']}",
-                            'funding_category': shift.get('funding_category', 'default'),
-                            'shift_id': shift.get('id', 'unknown')
-                        })
-        
-        # Check for overlaps
-        for worker_id, schedule in worker_schedule.items():
+        """Detect if a worker is scheduled at two places at the same time (including across midnight)"""
+        for worker_id, timeline in self._worker_timelines().items():
             worker_name = self._get_worker_name(worker_id)
-            schedule.sort(key=lambda x: (x['date'], x['start']))
             
-            for i in range(len(schedule) - 1):
-                current = schedule[i]
-                next_shift = schedule[i + 1]
-                
-                if current['date'] == next_shift['date']:
-                    # Only flag as conflict if:
-                    # 1. Different participants (true conflict)
-                    # 2. Same participant but overlapping times (invalid split shift)
-                    if current['participant'] != next_shift['participant']:
-                        # Check for overlap - this is a real conflict
-                        if current['end'] > next_shift['start']:
-                            self.errors.append(
-                                f"❌ WORKER CONFLICT: {worker_name} on {current['date']} "
-                                f"scheduled for {current['participant']} ({current['shift_time']}) "
-                                f"AND {next_shift['participant']} ({next_shift['shift_time']})"
-                            )
-                    elif current['participant'] == next_shift['participant']:
-                        # Same participant - check if this is a valid split shift
-                        if current['end'] > next_shift['start']:
-                            # Overlapping times for same participant - this is invalid
-                            self.errors.append(
-                                f"❌ INVALID SPLIT SHIFT: {worker_name} on {current['date']} "
-                                f"has overlapping times {current['shift_time']} and {next_shift['shift_time']} "
-                                f"for {current['participant']}"
-                            )
-                        elif current['end'] == next_shift['start']:
-                            # Back-to-back shifts for same participant - this is valid for different funding categories
-                            current_funding = current.get('funding_category', 'default')
-                            next_funding = next_shift.get('funding_category', 'default')
-                            if current_funding == next_funding:
-                                self.warnings.append(
-                                    f"ℹ️ SPLIT SHIFT: {worker_name} on {current['date']} "
-                                    f"has back-to-back shifts {current['shift_time']} and {next_shift['shift_time']} "
-                                    f"for {current['participant']} with same funding category"
-                                )
+            # Every overlapping pair, including long and cross-midnight shifts
+            for current, next_shift in overlapping_pairs(timeline.shifts):
+                if current.participant != next_shift.participant:
+                    # Different participants - this is a real conflict
+                    self.errors.append(
+                        f"❌ WORKER CONFLICT: {worker_name} on {current.date} "
+                        f"scheduled for {current.participant} ({current.shift_time}) "
+                        f"AND {next_shift.participant} ({next_shift.shift_time})"
+                    )
+                else:
+                    # Overlapping times for same participant - this is invalid
+                    self.errors.append(
+                        f"❌ INVALID SPLIT SHIFT: {worker_name} on {current.date} "
+                        f"has overlapping times {current.shift_time} and {next_shift.shift_time} "
+                        f"for {current.participant}"
+                    )
+            
+            for current, next_shift in timeline.pairs():
+                # Back-to-back shifts for same participant - this is valid for different funding categories
+                if (current.date == next_shift.date and current.participant == next_shift.participant
+                        and current.abs_end == next_shift.abs_start):
+                    if current.funding_category == next_shift.funding_category:
+                        self.warnings.append(
+                            f"ℹ️ SPLIT SHIFT: {worker_name} on {current.date} "
+                            f"has back-to-back shifts {current.shift_time} and {next_shift.shift_time} "
+                            f"for {current.participant} with same funding category"
+                        )
     
     def check_continuous_hours(self):
         """Check for excessive continuous working hours (12+ hours)"""
-        worker_schedule = {}
-        
-        for p_code, dates in self.roster.items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_schedule:
-                            worker_schedule[worker_id] = {}
-                        if date not in worker_schedule[worker_id]:
-                            worker_schedule[worker_id][date] = []
-                        
-                        worker_schedule[worker_id][date].append({
-                            'start': shift['startTime'],
-                            'end': shift['endTime'],
-                            'duration': float(shift.get('duration', 0))
-                        })
-        
         # Check daily totals
-        for worker_id, dates in worker_schedule.items():
+        for worker_id, timeline in self._worker_timelines().items():
             worker_name = self._get_worker_name(worker_id)
             
-            for date, day_shifts in dates.items():
-                total_hours = sum(s['duration'] for s in day_shifts)
+            for date, day_shifts in timeline.days.items():
+                total_hours = timeline.daily_hours[date]
                 
                 if total_hours >= 12:
-                    times = ', '.join([f"{s['start']}-{s['end']}" for s in day_shifts])
+                    times = ', '.join([s.shift_time for s in day_shifts])
                     self.errors.append(
                         f"❌ EXCESSIVE HOURS: {worker_name} on {date} "
                         f"scheduled for {total_hours:.1f} hours ({times})"
@@ -171,83 +127,42 @@ class RosterValidator:
     
     def check_weekly_max_hours(self):
         """Check if workers exceed their maximum weekly hours"""
-        worker_weekly_hours = {}
-        
-        for p_code, dates in self.roster.items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_weekly_hours:
-                            worker_weekly_hours[worker_id] = 0
-                        worker_weekly_hours[worker_id] += float(shift.get('duration', 0))
-        
-        for worker_id, total_hours in worker_weekly_hours.items():
+        for worker_id, timeline in self._worker_timelines().items():
             worker_data = self.workers.get(str(worker_id), {})
             worker_name = worker_data.get('full_name', f'Worker-{worker_id}')
             max_hours = worker_data.get('max_hours')
             
             if max_hours:
-                if total_hours > max_hours:
-                    self.errors.append(
-                        f"❌ MAX HOURS EXCEEDED: {worker_name} has {total_hours:.1f}h "
-                        f"(max: {max_hours}h)"
-                    )
+                # One Monday-Sunday week at a time
+                for week, total_hours in timeline.weekly_hours.items():
+                    if total_hours > max_hours:
+                        self.errors.append(
+                            f"❌ MAX HOURS EXCEEDED: {worker_name} has {total_hours:.1f}h "
+                            f"{timeline.week_label(week)}(max: {max_hours}h)"
+                        )
     
     def check_break_times(self):
         """Check for adequate break times between shifts"""
-        worker_schedule = {}
-        
-        for p_code, dates in self.roster.items():
-            for date, shifts in dates.items():
-                for shift in shifts:
-                    for worker_id in shift.get('workers', []):
-                        if worker_id not in worker_schedule:
-                            worker_schedule[worker_id] = []
-                        worker_schedule[worker_id].append({
-                            'date': date,
-                            'start': shift['startTime'],
-                            'end': shift['endTime'],
-                            'duration': float(shift.get('duration', 0))
-                        })
-        
-        # Sort and check gaps
-        for worker_id, schedule in worker_schedule.items():
+        # Check gaps between consecutive shifts
+        for worker_id, timeline in self._worker_timelines().items():
             worker_name = self._get_worker_name(worker_id)
-            schedule.sort(key=lambda x: (x['date'], x['start']))
             
-            for i in range(len(schedule) - 1):
-                current = schedule[i]
-                next_shift = schedule[i + 1]
-                
-                # Check if on consecutive days or same day
-                current_date = datetime.strptime(current['date'], '%Y-%m-%d')
-                next_date = datetime.strptime(next_shift['date'], '%Y-%m-%d')
-                
-                if (next_date - current_date).days <= 1:
-                    # Calculate break time
-                    current_end_mins = self._time_to_minutes(current['end'])
-                    next_start_mins = self._time_to_minutes(next_shift['start'])
-                    
-                    if current_date == next_date:
-                        break_hours = (next_start_mins - current_end_mins) / 60
-                    else:
-                        # Overnight
-                        break_hours = ((24 * 60 - current_end_mins) + next_start_mins) / 60
-                    
-                    if break_hours < 10 and (current['duration'] + next_shift['duration']) >= 16:
-                        self.warnings.append(
-                            f"⚠️ SHORT BREAK: {worker_name} has {break_hours:.1f}h break "
-                            f"between {current['date']} ({current['start']}-{current['end']}) "
-                            f"and {next_shift['date']} ({next_shift['start']}-{next_shift['end']})"
-                        )
+            # Break runs from the end of one shift to the start of the next, across midnight
+            for current, next_shift, break_hours in timeline.rest_pairs():
+                if break_hours < 10 and (current.duration + next_shift.duration) >= 16:
+                    self.warnings.append(
+                        f"⚠️ SHORT BREAK: {worker_name} has {break_hours:.1f}h break "
+                        f"between {current.date} ({current.shift_time}) "
+                        f"and {next_shift.date} ({next_shift.shift_time})"
+                    )
     
     def check_overnight_staffing(self):
         """Ensure overnight shifts (10PM-6AM) have adequate staffing"""
         for p_code, dates in self.roster.items():
             for date, shifts in dates.items():
                 for shift in shifts:
-                    start_hour = int(shift['startTime'].split(':')[0])
-                    end_hour = int(shift['endTime'].split(':')[0])
+                    start_hour = hour_of(shift['startTime'])
+                    end_hour = hour_of(shift['endTime'])
                     
                     # Overnight shift
                     if start_hour >= 22 or end_hour <= 6:
@@ -260,10 +175,15 @@ class RosterValidator:
                                 f"{shift['startTime']}-{shift['endTime']} needs 2:1 ratio"
                             )
     
+    def _worker_timelines(self):
+        """Per-worker timelines of the roster, built once and shared by every rule"""
+        if self._timelines is None:
+            self._timelines = build_timelines(self.roster)
+        return self._timelines
+    
     def _time_to_minutes(self, time_str: str) -> int:
         """Convert HH:MM to minutes since midnight"""
-        h, m = map(int, time_str.split(':'))
-        return h * 60 + m
+        return time_to_minutes(time_str)
     
     def _get_worker_name(self, worker_id: str) -> str:
         """Get worker display name"""
@@ -310,9 +230,11 @@ def validate_roster_data_enhanced(roster_data: dict, workers: dict, config: dict
         validation_config = get_validation_config()
         config = config or validation_config.get_config()
         
-        # Use enhanced validation service
-        validator = EnhancedValidationService(workers, config)
-        result = validator.validate_roster_data(roster_data)
+        # Use enhanced validation service; unchanged inputs come from the cache
+        result = get_validation_cache().validate(
+            roster_data, workers, config,
+            lambda: EnhancedValidationService(workers, config).validate_roster_data(roster_data)
+        )
         
         logger.info(f"Enhanced validation completed: {result['summary']}")
         return result